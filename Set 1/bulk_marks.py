@@ -0,0 +1,249 @@
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import os
+import time
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+from mark_accessing_sys import fix_invalid_value, process_multiple_students_marks
+
+
+class MarkError(NamedTuple):
+    """One mark fragment that could not be parsed."""
+    student: str
+    fragment: str
+    reason: str
+
+
+def parse_mark_str(student: str, mark_str: str) -> Tuple[Dict[str, int | float], List[MarkError]]:
+    """Parse one student's mark string like mark_str_to_dict_revised, but never raise.
+
+    Fragments that cannot be parsed are left out of the record and reported instead; the other
+    fragments are fixed with fix_invalid_value as usual.
+
+    Args:
+        student (str): The student name, used in the error report.
+        mark_str (str): A string containing comma-separated key:value pairs.
+
+    Returns:
+        Tuple[Dict[str, int | float], List[MarkError]]: The marks that parsed and the errors.
+    """
+    result = {}
+    errors = []
+    if not isinstance(mark_str, str):
+        return result, [MarkError(student, repr(mark_str), "not a string")]
+    for grade in mark_str.split(','): # e.g., "A1: 99"
+        if ':' not in grade:
+            errors.append(MarkError(student, grade.strip(), "missing ':'"))
+            continue
+        key, value = grade.split(':', 1)
+        key = key.strip()
+        if not key:
+            errors.append(MarkError(student, grade.strip(), "missing assignment name"))
+            continue
+        try:
+            num = float(value.strip())
+        except ValueError:
+            errors.append(MarkError(student, grade.strip(), "non-numeric value"))
+            continue
+        fixed = fix_invalid_value(num)
+        is_finite = fixed != float('inf') and fixed != float('-inf')
+        if is_finite and fixed == int(fixed): # integer value
+            result[key] = int(fixed)
+        else:
+            result[key] = fixed
+    return result, errors
+
+
+def _parse_chunk(items: List[Tuple[str, str]]) -> Tuple[Dict[str, Dict[str, int | float]], List[MarkError]]:
+    """Parse a chunk of (student, mark string) pairs in a worker process."""
+    records = {}
+    errors = []
+    for student, mark_str in items:
+        records[student], student_errors = parse_mark_str(student, mark_str)
+        errors.extend(student_errors)
+    return records, errors
+
+
+def _encode_chunk(items: List[Tuple[str, str]]) -> tuple:
+    """Parse a chunk in a worker and pack its records into flat arrays for the trip back.
+
+    Returns:
+        tuple: The students, the chunk's assignment names, and per mark an array('i') of assignment
+        codes and an array('d') of values, an array('i') of record lengths, and the errors.
+    """
+    students = []
+    columns: Dict[str, int] = {}
+    codes, marks, sizes = array('i'), array('d'), array('i')
+    errors = []
+    for student, mark_str in items:
+        record, student_errors = parse_mark_str(student, mark_str)
+        students.append(student)
+        sizes.append(len(record))
+        for split, value in record.items():
+            codes.append(columns.setdefault(split, len(columns)))
+            marks.append(value)
+        errors.extend(student_errors)
+    return students, list(columns), codes, marks, sizes, errors
+
+
+class PackedMarks(NamedTuple):
+    """Processed marks as flat arrays, the layout export_marks writes to .npz files."""
+    students: List[str]
+    assignments: List[str]
+    student_idx: np.ndarray     # per mark, position of its student in students
+    assignment_idx: np.ndarray  # per mark, position of its assignment in assignments
+    marks: np.ndarray           # per mark, the value (-inf = invalid)
+
+
+class _PackedBuilder:
+    """Concatenates _encode_chunk results in order, mapping chunk assignment codes to global ones."""
+    def __init__(self) -> None:
+        self.students: List[str] = []
+        self.columns: Dict[str, int] = {}
+        self.parts: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self.errors: List[MarkError] = []
+
+    def add(self, packed: tuple) -> None:
+        students, columns, codes, marks, sizes, errors = packed
+        remap = np.array([self.columns.setdefault(c, len(self.columns)) for c in columns], dtype=np.int64)
+        rows = np.repeat(np.arange(len(self.students), len(self.students) + len(students), dtype=np.int64),
+                         np.frombuffer(sizes, dtype=np.int32))
+        cols = remap[np.frombuffer(codes, dtype=np.int32)] if len(codes) else np.zeros(0, dtype=np.int64)
+        self.parts.append((rows, cols, np.frombuffer(marks, dtype=np.float64)))
+        self.students.extend(students)
+        self.errors.extend(errors)
+
+    def result(self) -> Tuple[PackedMarks, List[MarkError]]:
+        rows, cols, marks = (np.concatenate([part[i] for part in self.parts]) if self.parts
+                             else np.zeros(0, dtype=np.int64 if i < 2 else np.float64) for i in range(3))
+        students = self.students
+        last = {student: i for i, student in enumerate(students)}
+        if len(last) != len(students):
+            # Like a dict, a student listed twice keeps the first position and the last record
+            keep = np.zeros(len(students), dtype=bool)
+            positions = np.fromiter(last.values(), dtype=np.int64, count=len(last))
+            keep[positions] = True
+            new_pos = np.zeros(len(students), dtype=np.int64)
+            new_pos[positions] = np.arange(len(last))
+            mask = keep[rows]
+            order = np.argsort(new_pos[rows[mask]], kind='stable')
+            rows, cols, marks = new_pos[rows[mask]][order], cols[mask][order], marks[mask][order]
+            students = list(last)
+        return PackedMarks(students, list(self.columns), rows, cols, marks), self.errors
+
+
+def parse_marks_bulk(
+        mark_source: Dict[str, str] | Iterable[Tuple[str, str]],
+        workers: int | None = None,
+        chunk_size: int = 10000,
+        packed: bool = False
+    ) -> Tuple[Dict[str, Dict[str, int | float]] | PackedMarks, List[MarkError]]:
+    """Parse the marks of a whole cohort across a process pool, collecting errors instead of raising.
+
+    The input is cut into chunks of chunk_size students; at most 2 * workers chunks are in flight,
+    so a stream is never read into memory ahead of the workers. Inputs of a single chunk are
+    parsed in this process, where starting a pool would cost more than it saves.
+
+    Building a dict per student dominates the cost in the parent, where unpickling the workers'
+    dicts is the cheapest way to build them. With packed=True, workers send flat arrays instead
+    and the parent never creates per-student objects (see benchmark()).
+
+    Args:
+        mark_source (Dict[str, str] | Iterable[Tuple[str, str]]): Student -> mark string, or a stream
+            of (student, mark string) pairs.
+        workers (int | None, optional): Number of worker processes. Defaults to None (one per CPU).
+        chunk_size (int, optional): Students per chunk. Defaults to 10000.
+        packed (bool, optional): Return the records as PackedMarks arrays. Defaults to False.
+
+    Returns:
+        Tuple[Dict[str, Dict[str, int | float]] | PackedMarks, List[MarkError]]: The records, in input
+        order, as process_multiple_students_marks returns them (a student listed twice keeps the last
+        record), or the same records packed; and every fragment that could not be parsed.
+    """
+    items = iter(mark_source.items() if isinstance(mark_source, dict) else mark_source)
+    parse = _encode_chunk if packed else _parse_chunk
+    builder = _PackedBuilder() if packed else None
+    records = {}
+    errors = []
+
+    def collect(result):
+        if packed:
+            builder.add(result)
+        else:
+            chunk_records, chunk_errors = result
+            records.update(chunk_records)
+            errors.extend(chunk_errors)
+
+    first = list(islice(items, chunk_size))
+    second = list(islice(items, chunk_size))
+    if not second:
+        collect(parse(first))
+        return builder.result() if packed else (records, errors)
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque([pool.submit(parse, first), pool.submit(parse, second)])
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                break
+            if len(pending) >= max_pending: # results are collected in submission order
+                collect(pending.popleft().result())
+            pending.append(pool.submit(parse, chunk))
+        while pending:
+            collect(pending.popleft().result())
+    return builder.result() if packed else (records, errors)
+
+
+def benchmark(n_students: int = 1000000, n_assignments: int = 3, workers: int | None = None) -> Dict[str, float]:
+    """Time parse_marks_bulk, with dict and packed output, against process_multiple_students_marks.
+
+    Args:
+        n_students (int, optional): Number of students. Defaults to 1000000.
+        n_assignments (int, optional): Marks per student. Defaults to 3.
+        workers (int | None, optional): Number of worker processes. Defaults to None (one per CPU).
+
+    Returns:
+        Dict[str, float]: Seconds taken by each method (also printed); raises AssertionError if the outputs differ.
+    """
+    values = ["99", "200", "-100", "72.5", "100.0", "0", "45.25"]
+    mark_dict = {
+        f"student{i}": ", ".join(f"A{j + 1}: {values[(i + j) % len(values)]}" for j in range(n_assignments))
+        for i in range(n_students)
+    }
+    timings = {}
+    start = time.perf_counter()
+    expected = process_multiple_students_marks(mark_dict)
+    timings["process_multiple_students_marks"] = time.perf_counter() - start
+    start = time.perf_counter()
+    records, _ = parse_marks_bulk(mark_dict, workers)
+    timings["parse_marks_bulk"] = time.perf_counter() - start
+    start = time.perf_counter()
+    packed, _ = parse_marks_bulk(mark_dict, workers, packed=True)
+    timings["parse_marks_bulk(packed=True)"] = time.perf_counter() - start
+    assert records == expected, "parse_marks_bulk output differs"
+    unpacked = {student: {} for student in packed.students}
+    for r, c, m in zip(packed.student_idx.tolist(), packed.assignment_idx.tolist(), packed.marks.tolist()):
+        unpacked[packed.students[r]][packed.assignments[c]] = m
+    assert list(unpacked) == list(expected) and unpacked == expected, "packed output differs"
+    for name, seconds in timings.items():
+        print(f"{name}: {seconds:.2f}s")
+    return timings
+
+
+# WARNING!!! *DO NOT* REMOVE THIS LINE
+# THIS ENSURES THAT THE CODE BELOW ONLY RUNS WHEN YOU HIT THE GREEN `Run` BUTTON, AND NOT THE BLUE `Test` BUTTON
+if __name__ == "__main__":
+    mark_unprocessed = {
+        "Jueqing": "A1: 99, A2: 200, A3: -100",
+        "Trang"  : "A1: 300, A2 100, A3: abc"
+    }
+    records, errors = parse_marks_bulk(mark_unprocessed)
+    print(records)
+    for error in errors:
+        print(f"{error.student}: {error.fragment!r} ({error.reason})")
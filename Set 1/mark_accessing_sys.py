@@ -116,6 +116,7 @@ def after_login(user_info, mark_unprocessed, user_name):
         print("2.Re-Login")
         print("3.Show mark records")
         print("4.Show summarization")
+        print("5.Export marks")
         logged_choice=input("Your choice (number only): ")
         # choose exit, stop loop
         if logged_choice == "1":
@@ -159,6 +160,15 @@ def after_login(user_info, mark_unprocessed, user_name):
                 print(f"  Average Mark: {summary['average_mark']}")
                 print(f"  Valid Count: {summary['valid_count']}")
                 print(f"  Invalid Count: {summary['invalid_count']}")
+        # Export records and summaries to a file and continue the loop
+        elif logged_choice == "5":
+            from marks_export import export_marks # imported here: marks_export imports this module
+            print("==================================")
+            export_path = input("Export file (.csv, .jsonl or .npz): ").strip()
+            try:
+                export_marks(mark_unprocessed, export_path)
+            except (OSError, ValueError) as e:
+                print(f"Export failed: {e}")
 
 
 
@@ -0,0 +1,110 @@
+import gc
+import time
+from typing import Dict
+
+from mark_accessing_sys import mark_str_to_dict_revised, process_multiple_students_marks
+
+# Normalized mark of every raw value string seen (e.g. " 200" -> -inf), up to a bound; marks repeat
+# a lot, so most values are looked up instead of being converted, range-checked and re-converted
+_MARK_CACHE: Dict[str, int | float] = {}
+_MARK_CACHE_SIZE = 65536
+
+
+def _to_mark(value: str) -> int | float:
+    """Convert and fix one raw value string exactly like mark_str_to_dict_revised, memoized."""
+    mark = _MARK_CACHE.get(value)
+    if mark is not None:
+        return mark
+    num = float(value.strip())
+    if not 0 <= num <= 100: # invalid range, as fix_invalid_value
+        mark = float('-inf')
+    else:
+        mark = int(num) if num == int(num) else num
+    if len(_MARK_CACHE) < _MARK_CACHE_SIZE:
+        _MARK_CACHE[value] = mark
+    return mark
+
+
+def scan_mark_str(mark_str: str) -> Dict[str, int | float]:
+    """Parse a mark string in one pass over its pairs.
+
+    Each pair is cut once with partition() and its value goes through the mark cache, which does
+    the range check and the int/float normalization in the same lookup. The result is the same as
+    mark_str_to_dict_revised's; malformed strings are handed to it so they raise the same error.
+
+    Args:
+        mark_str (str): A string containing comma-separated key:value pairs.
+
+    Returns:
+        Dict[str, int | float]: A dictionary representation of the marks with invalid values fixed.
+    """
+    cache = _MARK_CACHE
+    result = {}
+    for grade in mark_str.split(','): # e.g., "A1: 99"
+        key, colon, value = grade.partition(':')
+        if not colon or ':' in value:
+            return mark_str_to_dict_revised(mark_str)
+        mark = cache.get(value)
+        result[key.strip()] = mark if mark is not None else _to_mark(value)
+    return result
+
+
+def scan_marks_batch(mark_dict: Dict[str, str]) -> Dict[str, Dict[str, int | float]]:
+    """Parse every student's marks with scan_mark_str, with the cyclic GC paused.
+
+    Building a million small dicts otherwise triggers the cyclic GC over and over for nothing.
+    The result is the same as process_multiple_students_marks', including the error raised for
+    the first malformed string.
+
+    Args:
+        mark_dict (Dict[str, str]): A dictionary where keys are student names and values are their marks as strings.
+
+    Returns:
+        Dict[str, Dict[str, int | float]]: A dictionary mapping student names to their processed marks dictionaries.
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return {student: scan_mark_str(marks) for student, marks in mark_dict.items()}
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def benchmark(n_students: int = 1000000, n_assignments: int = 3) -> Dict[str, float]:
+    """Time the scanners against process_multiple_students_marks on a generated cohort.
+
+    Args:
+        n_students (int, optional): Number of students. Defaults to 1000000.
+        n_assignments (int, optional): Marks per student. Defaults to 3.
+
+    Returns:
+        Dict[str, float]: Seconds taken by each method (also printed); raises AssertionError if the outputs differ.
+    """
+    values = ["99", "200", "-100", "72.5", "100.0", "0", "45.25"]
+    mark_dict = {
+        f"student{i}": ", ".join(f"A{j + 1}: {values[(i + j) % len(values)]}" for j in range(n_assignments))
+        for i in range(n_students)
+    }
+    timings = {}
+    start = time.perf_counter()
+    expected = process_multiple_students_marks(mark_dict)
+    timings["process_multiple_students_marks"] = time.perf_counter() - start
+    start = time.perf_counter()
+    per_string = {student: scan_mark_str(marks) for student, marks in mark_dict.items()}
+    timings["scan_mark_str"] = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = scan_marks_batch(mark_dict)
+    timings["scan_marks_batch"] = time.perf_counter() - start
+    assert per_string == expected and batch == expected, "scanner output differs"
+    for name, seconds in timings.items():
+        print(f"{name}: {seconds:.2f}s")
+    return timings
+
+
+# WARNING!!! *DO NOT* REMOVE THIS LINE
+# THIS ENSURES THAT THE CODE BELOW ONLY RUNS WHEN YOU HIT THE GREEN `Run` BUTTON, AND NOT THE BLUE `Test` BUTTON
+if __name__ == "__main__":
+    print(scan_mark_str("A1: 99, A2: 200, A3: -100"))
+    print(scan_marks_batch({"Jueqing": "A1: 99, A2: 200, A3: -100", "Trang": "A1: 300, A2: 100, A3: 100"}))
+    benchmark()
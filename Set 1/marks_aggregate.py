@@ -0,0 +1,231 @@
+import heapq
+import math
+from collections import Counter
+from typing import Dict, Optional
+
+from mark_accessing_sys import mark_str_to_dict_revised
+
+
+class _AssignmentStats:
+    """Running statistics of the valid marks of one assignment."""
+    __slots__ = ("valid_count", "partials", "mean", "m2", "counts", "min_heap", "max_heap")
+
+    def __init__(self) -> None:
+        self.valid_count = 0
+        # Exact sum of the marks as non-overlapping float partials (Shewchuk's algorithm, which
+        # math.fsum uses), so a removal subtracts exactly what the insertion added
+        self.partials = []
+        # Welford's running mean and sum of squared deviations
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Multiplicity of every mark, with lazily pruned heaps for min and max; a heap holding more
+        # than twice the distinct marks present is rebuilt, so churn cannot grow it without bound
+        self.counts: Counter = Counter()
+        self.min_heap = []
+        self.max_heap = []
+
+    def _add_to_sum(self, x: float) -> None:
+        """Add x to the exact sum held in self.partials."""
+        i = 0
+        for y in self.partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                self.partials[i] = lo
+                i += 1
+            x = hi
+        self.partials[i:] = [x]
+
+    def total(self) -> float:
+        """Return the sum of the marks, correctly rounded."""
+        return math.fsum(self.partials)
+
+    def add(self, value: int | float) -> None:
+        self.valid_count += 1
+        self._add_to_sum(float(value))
+        delta = value - self.mean
+        self.mean += delta / self.valid_count
+        self.m2 += delta * (value - self.mean)
+        if self.counts[value] == 0:
+            heapq.heappush(self.min_heap, value)
+            heapq.heappush(self.max_heap, -value)
+        self.counts[value] += 1
+        if len(self.min_heap) > 2 * len(self.counts):
+            self.min_heap = list(self.counts)
+            heapq.heapify(self.min_heap)
+        if len(self.max_heap) > 2 * len(self.counts):
+            self.max_heap = [-v for v in self.counts]
+            heapq.heapify(self.max_heap)
+
+    def remove(self, value: int | float) -> None:
+        self.valid_count -= 1
+        self._add_to_sum(-float(value))
+        if self.valid_count == 0:
+            self.mean = self.m2 = 0.0
+        else: # Welford's update run backwards
+            old_mean = self.mean
+            self.mean = (self.valid_count + 1) * old_mean / self.valid_count - value / self.valid_count
+            self.m2 = max(self.m2 - (value - old_mean) * (value - self.mean), 0.0)
+        self.counts[value] -= 1
+        if self.counts[value] == 0:
+            del self.counts[value]
+
+    def minimum(self) -> float:
+        while self.min_heap and self.min_heap[0] not in self.counts:
+            heapq.heappop(self.min_heap)
+        return self.min_heap[0] if self.min_heap else float('-inf')
+
+    def maximum(self) -> float:
+        while self.max_heap and -self.max_heap[0] not in self.counts:
+            heapq.heappop(self.max_heap)
+        return -self.max_heap[0] if self.max_heap else float('-inf')
+
+
+def _is_valid(value) -> bool:
+    """A valid mark is a finite number (fix_invalid_value turns out-of-range marks into -inf)."""
+    is_finite = value != float('inf') and value != float('-inf')
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and is_finite and value == value
+
+
+class MarksAggregate:
+    """
+    Per-assignment summaries kept up to date as student marks are inserted, replaced and removed.
+
+    Each update costs O(assignments of the student) (O(log n) more for the min/max heaps), and
+    summary() answers in O(1). Like summarize_marks, a student without a mark for an assignment
+    counts as invalid for it. The average divides the exact sum of the marks, correctly rounded
+    (math.fsum), by their count. summarize_marks adds the marks up left to right in float, so when
+    that sum picks up rounding error (fractional marks over many students) the two averages differ
+    in their last few bits, by that error; for whole marks they are always equal.
+    """
+    def __init__(self, mark_dict: Optional[Dict[str, str]] = None) -> None:
+        """Create an aggregate, optionally from a dictionary of unprocessed mark strings.
+
+        Args:
+            mark_dict (Optional[Dict[str, str]], optional): Student -> mark string. Defaults to None.
+
+        Returns:
+            None
+        """
+        self.records: Dict[str, Dict[str, int | float]] = {}
+        self._stats: Dict[str, _AssignmentStats] = {}
+        for student, marks in (mark_dict or {}).items():
+            self.set_student(student, marks)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, student: str) -> bool:
+        return student in self.records
+
+    def set_student(self, student: str, mark_str: str) -> None:
+        """Insert or replace one student's marks from their mark string (e.g. "A1: 99, A2: 200").
+
+        Args:
+            student (str): The student name.
+            mark_str (str): The unprocessed mark string.
+
+        Returns:
+            None
+        """
+        self.set_record(student, mark_str_to_dict_revised(mark_str))
+
+    def set_record(self, student: str, record: Dict[str, int | float]) -> None:
+        """Insert or replace one student's processed marks.
+
+        Args:
+            student (str): The student name.
+            record (Dict[str, int | float]): Assignment -> mark, as mark_str_to_dict_revised returns it.
+
+        Returns:
+            None
+        """
+        if student in self.records:
+            for split, value in self.records[student].items():
+                if _is_valid(value):
+                    self._stats[split].remove(value)
+        self.records[student] = dict(record)
+        for split, value in record.items():
+            if _is_valid(value):
+                self._stats.setdefault(split, _AssignmentStats()).add(value)
+
+    def remove_student(self, student: str) -> None:
+        """Remove one student's marks.
+
+        Args:
+            student (str): The student name.
+
+        Returns:
+            None
+        """
+        for split, value in self.records.pop(student).items():
+            if _is_valid(value):
+                self._stats[split].remove(value)
+
+    def valid_count(self, split: str) -> int:
+        """Return the number of students with a valid mark for an assignment."""
+        stats = self._stats.get(split)
+        return stats.valid_count if stats else 0
+
+    def invalid_count(self, split: str) -> int:
+        """Return the number of students with an invalid or missing mark for an assignment."""
+        return len(self.records) - self.valid_count(split)
+
+    def average(self, split: str) -> int | float:
+        """Return the average valid mark of an assignment (negative infinity if there is none)."""
+        stats = self._stats.get(split)
+        if not stats or stats.valid_count == 0: # no valid marks case
+            return float('-inf')
+        avg = stats.total() / stats.valid_count
+        return int(avg) if avg == int(avg) else avg
+
+    def summary(self, split: str) -> dict:
+        """Summarize one assignment, with the same result as summarize_marks.
+
+        Args:
+            split (str): The assignment to summarize (e.g., "A1").
+
+        Returns:
+            dict: The average mark and the valid and invalid counts.
+        """
+        if not self.records: # empty input case
+            return {"average_mark": float('-inf'), "invalid_count": 0, "valid_count": 0}
+        return {"average_mark": self.average(split),
+                "invalid_count": self.invalid_count(split),
+                "valid_count": self.valid_count(split)}
+
+    def stats(self, split: str) -> dict:
+        """Return summary() plus the minimum, maximum and population variance of the valid marks.
+
+        Args:
+            split (str): The assignment (e.g., "A1").
+
+        Returns:
+            dict: The summary with "min_mark", "max_mark" and "variance" added (negative infinity for the
+            extremes and 0.0 for the variance when there are no valid marks).
+        """
+        result = self.summary(split)
+        stats = self._stats.get(split)
+        valid = stats is not None and stats.valid_count > 0
+        result["min_mark"] = stats.minimum() if valid else float('-inf')
+        result["max_mark"] = stats.maximum() if valid else float('-inf')
+        result["variance"] = stats.m2 / stats.valid_count if valid else 0.0
+        return result
+
+    def assignments(self) -> list:
+        """Return the assignments that have at least one valid mark, sorted."""
+        return sorted(split for split, stats in self._stats.items() if stats.valid_count)
+
+
+# WARNING!!! *DO NOT* REMOVE THIS LINE
+# THIS ENSURES THAT THE CODE BELOW ONLY RUNS WHEN YOU HIT THE GREEN `Run` BUTTON, AND NOT THE BLUE `Test` BUTTON
+if __name__ == "__main__":
+    aggregate = MarksAggregate({
+        "Jueqing": "A1: 99, A2: 200, A3: -100",
+        "Trang"  : "A1: 300, A2: 100, A3: 100"
+    })
+    print(aggregate.stats("A1"))
+    aggregate.set_student("Trang", "A1: 80, A2: 100, A3: 100")
+    print(aggregate.stats("A1"))
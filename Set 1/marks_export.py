@@ -0,0 +1,193 @@
+from array import array
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from mark_scanner import scan_mark_str
+
+# Lines are joined and written in one call per batch of this many students
+_BATCH = 10000
+
+
+def _stream_records(mark_source: Dict[str, str] | Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, Dict[str, int | float]]]:
+    """Parse students one at a time, so a cohort is never held as processed records."""
+    items = mark_source.items() if isinstance(mark_source, dict) else mark_source
+    for student, marks in items:
+        yield student, scan_mark_str(marks)
+
+
+class _RunningSummaries:
+    """summarize_marks for every assignment at once, accumulated while the records stream past."""
+    def __init__(self) -> None:
+        self.n_students = 0
+        self.totals: Dict[str, List] = {} # assignment -> [running total, valid count]
+
+    def add(self, record: Dict[str, int | float]) -> None:
+        self.n_students += 1
+        for split, value in record.items():
+            entry = self.totals.setdefault(split, [0.0, 0])
+            if value != float('inf') and value != float('-inf'): # valid mark
+                entry[0] += float(value)
+                entry[1] += 1
+
+    def summaries(self) -> Dict[str, dict]:
+        """Return {assignment: summary} for every assignment seen, sorted by assignment."""
+        result = {}
+        for split in sorted(self.totals):
+            total, valid_count = self.totals[split]
+            if valid_count == 0: # no valid marks case
+                average = float('-inf')
+            else:
+                avg = total / valid_count
+                average = int(avg) if avg == int(avg) else avg
+            result[split] = {"average_mark": average,
+                             "invalid_count": self.n_students - valid_count,
+                             "valid_count": valid_count}
+        return result
+
+
+def _summary_path(path: str) -> str:
+    """Return the file the CSV export writes assignment summaries to (marks.csv -> marks_summary.csv)."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_summary{ext}"
+
+
+def _json_mark(value: int | float) -> int | float | None:
+    """JSON has no infinity: invalid marks and averages without valid marks are written as null."""
+    return None if value == float('-inf') else value
+
+
+def _csv_field(text: str) -> str:
+    """Quote a CSV field if it needs it."""
+    if any(c in text for c in ',"\r\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def _export_csv(records, path: str, running: _RunningSummaries, buffer_size: int) -> int:
+    count = 0
+    lines = ["student,assignment,mark"]
+    with open(path, 'w', encoding='utf-8', newline='', buffering=buffer_size) as f:
+        for student, record in records:
+            running.add(record)
+            name = _csv_field(student)
+            for split, value in record.items():
+                lines.append(f"{name},{_csv_field(split)},{value}")
+            count += 1
+            if count % _BATCH == 0:
+                f.write("\n".join(lines) + "\n")
+                lines = []
+        if lines:
+            f.write("\n".join(lines) + "\n")
+    lines = ["assignment,average_mark,valid_count,invalid_count"]
+    for split, summary in running.summaries().items():
+        lines.append(f"{_csv_field(split)},{summary['average_mark']},{summary['valid_count']},{summary['invalid_count']}")
+    with open(_summary_path(path), 'w', encoding='utf-8', newline='') as f:
+        f.write("\n".join(lines) + "\n")
+    return count
+
+
+def _export_jsonl(records, path: str, running: _RunningSummaries, buffer_size: int) -> int:
+    count = 0
+    lines = []
+    with open(path, 'w', encoding='utf-8', buffering=buffer_size) as f:
+        for student, record in records:
+            running.add(record)
+            marks = {split: _json_mark(value) for split, value in record.items()}
+            lines.append(json.dumps({"student": student, "marks": marks}))
+            count += 1
+            if count % _BATCH == 0:
+                f.write("\n".join(lines) + "\n")
+                lines = []
+        # Summary lines follow the records
+        for split, summary in running.summaries().items():
+            lines.append(json.dumps({"assignment": split,
+                                     "average_mark": _json_mark(summary["average_mark"]),
+                                     "valid_count": summary["valid_count"],
+                                     "invalid_count": summary["invalid_count"]}))
+        if lines:
+            f.write("\n".join(lines) + "\n")
+    return count
+
+
+def _export_npz(records, path: str, running: _RunningSummaries) -> int:
+    # Marks go into typed arrays (a few bytes each), never into per-student dicts
+    students: List[str] = []
+    columns: Dict[str, int] = {}
+    student_idx, assignment_idx, marks = array('q'), array('q'), array('d')
+    for student, record in records:
+        running.add(record)
+        for split, value in record.items():
+            student_idx.append(len(students))
+            assignment_idx.append(columns.setdefault(split, len(columns)))
+            marks.append(value)
+        students.append(student)
+    summaries = running.summaries()
+    np.savez(
+        path,
+        students=np.array(students, dtype=str),
+        assignments=np.array(list(columns), dtype=str),
+        student_idx=np.frombuffer(student_idx, dtype=np.int64),
+        assignment_idx=np.frombuffer(assignment_idx, dtype=np.int64),
+        marks=np.frombuffer(marks, dtype=np.float64),
+        summary_assignments=np.array(list(summaries), dtype=str),
+        summary_average=np.array([s["average_mark"] for s in summaries.values()], dtype=np.float64),
+        summary_valid=np.array([s["valid_count"] for s in summaries.values()], dtype=np.int64),
+        summary_invalid=np.array([s["invalid_count"] for s in summaries.values()], dtype=np.int64),
+    )
+    return len(students)
+
+
+def export_marks(
+        mark_source: Dict[str, str] | Iterable[Tuple[str, str]],
+        path: str,
+        fmt: str | None = None,
+        buffer_size: int = 1 << 20
+    ) -> Dict[str, dict]:
+    """Export processed mark records and the summaries of every assignment.
+
+    Students are parsed one at a time as they are written, and lines are written in large batches
+    through a large file buffer instead of one call per mark.
+
+    Formats:
+        csv    One "student,assignment,mark" row per mark; the summaries go to <name>_summary.csv.
+        jsonl  One {"student", "marks"} object per student, then one {"assignment", "average_mark",
+               "valid_count", "invalid_count"} object per assignment. Invalid marks are null.
+        npz    Arrays students, assignments and, per mark, student_idx, assignment_idx and marks
+               (-inf = invalid), plus summary_assignments, summary_average, summary_valid and summary_invalid.
+
+    Args:
+        mark_source (Dict[str, str] | Iterable[Tuple[str, str]]): Student -> unprocessed mark string,
+            or a stream of (student, mark string) pairs.
+        path (str): The output file.
+        fmt (str | None, optional): "csv", "jsonl" or "npz". Defaults to None (taken from the extension).
+        buffer_size (int, optional): Size of the file buffer in bytes. Defaults to 1 MiB.
+
+    Returns:
+        Dict[str, dict]: {assignment: summary}, each equal to summarize_marks on the processed records.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip('.')).lower()
+    records = _stream_records(mark_source)
+    running = _RunningSummaries()
+    if fmt == "csv":
+        count = _export_csv(records, path, running, buffer_size)
+    elif fmt in ("jsonl", "json"):
+        count = _export_jsonl(records, path, running, buffer_size)
+    elif fmt == "npz":
+        count = _export_npz(records, path, running)
+    else:
+        raise ValueError(f"Unknown export format {fmt!r}, expected 'csv', 'jsonl' or 'npz'")
+    print(f"Exported {count} students to {path}")
+    return running.summaries()
+
+
+# WARNING!!! *DO NOT* REMOVE THIS LINE
+# THIS ENSURES THAT THE CODE BELOW ONLY RUNS WHEN YOU HIT THE GREEN `Run` BUTTON, AND NOT THE BLUE `Test` BUTTON
+if __name__ == "__main__":
+    mark_unprocessed = {
+        "Jueqing": "A1: 99, A2: 200, A3: -100",
+        "Trang"  : "A1: 300, A2: 100, A3: 100"
+    }
+    print(export_marks(mark_unprocessed, "marks.csv"))
@@ -0,0 +1,74 @@
+import math
+import random
+
+from mark_accessing_sys import process_multiple_students_marks, summarize_marks
+from marks_aggregate import MarksAggregate
+
+MARKS = {
+    "Jueqing": "A1: 99, A2: 200, A3: -100",
+    "Trang": "A1: 300, A2: 100, A3: 100",
+    "Sam": "A1: 45, A3: 70",
+}
+
+
+def _random_marks(rng, n_students, fractional):
+    marks = {}
+    for i in range(n_students):
+        values = [round(rng.uniform(-10, 110), 1) if fractional else rng.randint(-10, 110) for _ in range(3)]
+        marks[f"s{i}"] = ", ".join(f"A{j + 1}: {v}" for j, v in enumerate(values) if rng.random() < 0.9)
+    return {student: mark_str for student, mark_str in marks.items() if mark_str}
+
+
+def _churn(aggregate, rng, n_students, fractional, n_ops=300):
+    """Replace and remove random students, re-adding removed ones at the end."""
+    for _ in range(n_ops):
+        student = f"s{rng.randrange(n_students)}"
+        if student in aggregate and rng.random() < 0.4:
+            aggregate.remove_student(student)
+        else:
+            aggregate.set_student(student, next(iter(_random_marks(rng, 1, fractional).values()), "A1: 50"))
+
+
+def test_summary_matches_summarize_marks():
+    aggregate = MarksAggregate(MARKS)
+    records = process_multiple_students_marks(MARKS)
+    for split in ("A1", "A2", "A3", "A4"):
+        assert aggregate.summary(split) == summarize_marks(records, split)
+    assert MarksAggregate().summary("A1") == summarize_marks({}, "A1")
+
+
+def test_whole_marks_match_summarize_marks_after_replacements_and_removals():
+    rng = random.Random(3)
+    aggregate = MarksAggregate(_random_marks(rng, 500, fractional=False))
+    _churn(aggregate, rng, 500, fractional=False)
+    for split in ("A1", "A2", "A3"):
+        assert aggregate.summary(split) == summarize_marks(aggregate.records, split)
+
+
+def test_fractional_average_is_the_correctly_rounded_mean():
+    rng = random.Random(5)
+    aggregate = MarksAggregate(_random_marks(rng, 500, fractional=True))
+    _churn(aggregate, rng, 500, fractional=True)
+    for split in ("A1", "A2", "A3"):
+        valid = [r[split] for r in aggregate.records.values() if split in r and math.isfinite(r[split])]
+        expected = summarize_marks(aggregate.records, split)
+        assert aggregate.average(split) == math.fsum(valid) / len(valid)
+        assert math.isclose(aggregate.average(split), expected["average_mark"], rel_tol=1e-12)
+        assert aggregate.valid_count(split) == expected["valid_count"]
+        assert aggregate.invalid_count(split) == expected["invalid_count"]
+
+
+def test_stats_follow_replacements_and_removals():
+    aggregate = MarksAggregate(MARKS)
+    aggregate.set_student("Trang", "A1: 80, A2: 100, A3: 100")
+    stats = aggregate.stats("A1")
+    assert (stats["min_mark"], stats["max_mark"]) == (45, 99)
+    assert math.isclose(stats["variance"], sum((v - 224 / 3) ** 2 for v in (99, 80, 45)) / 3)
+    aggregate.remove_student("Jueqing")
+    stats = aggregate.stats("A1")
+    assert (stats["average_mark"], stats["min_mark"], stats["max_mark"]) == (62.5, 45, 80)
+    aggregate.remove_student("Trang")
+    aggregate.remove_student("Sam")
+    assert aggregate.stats("A1") == {"average_mark": float('-inf'), "invalid_count": 0, "valid_count": 0,
+                                     "min_mark": float('-inf'), "max_mark": float('-inf'), "variance": 0.0}
+    assert aggregate.assignments() == []
@@ -0,0 +1,65 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from mark_accessing_sys import process_multiple_students_marks, summarize_marks
+from marks_export import export_marks
+
+MARKS = {
+    "Jueqing": "A1: 99, A2: 200, A3: -100",
+    "Trang": "A1: 33.3, A2: 100, A3: 66.7",
+    "Lee, Sam": "A1: 45, A3: 70",
+}
+
+
+def _expected_summaries():
+    records = process_multiple_students_marks(MARKS)
+    return {split: summarize_marks(records, split) for split in ("A1", "A2", "A3")}
+
+
+def test_csv_export_writes_marks_and_summaries(tmp_path):
+    path = tmp_path / "marks.csv"
+    assert export_marks(MARKS, str(path)) == _expected_summaries()
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    records = process_multiple_students_marks(MARKS)
+    assert rows[0] == ["student", "assignment", "mark"]
+    assert rows[1:] == [[s, a, str(v)] for s, record in records.items() for a, v in record.items()]
+    with open(tmp_path / "marks_summary.csv", encoding="utf-8", newline="") as f:
+        summary = list(csv.DictReader(f))
+    assert [row["assignment"] for row in summary] == ["A1", "A2", "A3"]
+    assert float(summary[1]["average_mark"]) == 100 and summary[1]["invalid_count"] == "2"
+
+
+def test_jsonl_export_writes_null_for_invalid_marks(tmp_path):
+    path = tmp_path / "marks.jsonl"
+    export_marks(list(MARKS.items()), str(path))
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0] == {"student": "Jueqing", "marks": {"A1": 99, "A2": None, "A3": None}}
+    assert lines[1]["marks"] == {"A1": 33.3, "A2": 100, "A3": 66.7}
+    summaries = {line["assignment"]: line for line in lines[3:]}
+    assert summaries["A3"] == {"assignment": "A3", "average_mark": _expected_summaries()["A3"]["average_mark"],
+                               "valid_count": 2, "invalid_count": 1}
+
+
+def test_npz_export_round_trips(tmp_path):
+    path = tmp_path / "marks.npz"
+    export_marks(MARKS, str(path))
+    data = np.load(path)
+    students, assignments = data["students"].tolist(), data["assignments"].tolist()
+    rebuilt = {s: {} for s in students}
+    for i, j, mark in zip(data["student_idx"], data["assignment_idx"], data["marks"]):
+        rebuilt[students[i]][assignments[j]] = float(mark)
+    assert rebuilt == process_multiple_students_marks(MARKS)
+    expected = _expected_summaries()
+    assert data["summary_assignments"].tolist() == list(expected)
+    assert data["summary_average"].tolist() == [s["average_mark"] for s in expected.values()]
+    assert data["summary_valid"].tolist() == [s["valid_count"] for s in expected.values()]
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        export_marks(MARKS, str(tmp_path / "marks.xlsx"))
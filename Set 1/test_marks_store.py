@@ -0,0 +1,101 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import marks_store
+from mark_accessing_sys import process_multiple_students_marks, summarize_marks
+from marks_store import MarksStore
+
+MARKS = {
+    "Jueqing": "A1: 99, A2: 200, A3: -100",
+    "Trang": "A1: 33.3, A2: 100, A3: 66.7",
+    "Sam": "A1: 0.1, A3: 12.5",
+}
+
+
+def _store(tmp_path, n_slots=16) -> MarksStore:
+    store = MarksStore(str(tmp_path / "store"), n_slots=n_slots)
+    store.add_mark_strings(MARKS)
+    return store
+
+
+def test_records_and_summaries_match_the_dict_functions(tmp_path):
+    store = _store(tmp_path)
+    expected = process_multiple_students_marks(MARKS)
+    assert dict(store.records()) == expected
+    assert store.record("Trang") == {"A1": 33.3, "A2": 100, "A3": 66.7}
+    for split in ("A1", "A2", "A3", "A9"):
+        assert store.summarize(split) == summarize_marks(expected, split)
+
+
+def test_replacing_grows_and_compact_keeps_current_records(tmp_path):
+    store = _store(tmp_path, n_slots=2)
+    store.put("Trang", {"A1": 80, "A4": 45.5})
+    store.put("Ana", {"A2": 70})
+    assert store.n_rows == 5 and store.n_slots >= 4
+    expected = dict(store.records())
+    store.compact()
+    assert store.n_rows == 4 and dict(store.records()) == expected
+    reopened = MarksStore(str(tmp_path / "store"))
+    assert dict(reopened.records()) == expected and list(reopened.students) == ["Jueqing", "Trang", "Sam", "Ana"]
+
+
+def _crash_compact(monkeypatch, store, failing):
+    """Run compact() with os.replace failing on the pending file named failing."""
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if src.endswith(failing):
+            raise OSError("simulated crash")
+        real_replace(src, dst)
+    monkeypatch.setattr(marks_store.os, "replace", replace)
+    with pytest.raises(OSError):
+        store.compact()
+    monkeypatch.setattr(marks_store.os, "replace", real_replace)
+
+
+@pytest.mark.parametrize("failing", ["marks.npy.compact", "students.json.compact"])
+def test_store_reopened_after_a_crash_during_compact_is_compacted(tmp_path, monkeypatch, failing):
+    store = _store(tmp_path)
+    store.put("Trang", {"A1": 80})
+    expected = dict(store.records())
+    _crash_compact(monkeypatch, store, failing)
+    reopened = MarksStore(str(tmp_path / "store"))
+    assert dict(reopened.records()) == expected and reopened.n_rows == 3
+    assert sorted(os.listdir(tmp_path / "store")) == ["assignments.json", "marks.npy", "students.json"]
+
+
+def test_store_reopened_after_a_crash_before_the_index_is_unchanged(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    store.put("Trang", {"A1": 80})
+    expected = dict(store.records())
+    real_write_json = marks_store._write_json
+
+    def write_json(path, data):
+        if path.endswith(".compact"):
+            raise OSError("simulated crash")
+        real_write_json(path, data)
+    monkeypatch.setattr(marks_store, "_write_json", write_json)
+    with pytest.raises(OSError):
+        store.compact()
+    monkeypatch.undo()
+    reopened = MarksStore(str(tmp_path / "store"))
+    assert dict(reopened.records()) == expected and reopened.n_rows == 4
+    assert not os.path.exists(reopened.marks_path + ".compact")
+
+
+def test_float32_store_is_widened_to_the_marks_it_was_written_with(tmp_path):
+    store_dir = tmp_path / "legacy"
+    store_dir.mkdir()
+    header = "{'descr': '<f4', 'fortran_order': False, 'shape': (2, 2), }"
+    header = header.ljust(marks_store._HEADER_SIZE - len(marks_store._MAGIC) - 3) + "\n"
+    with open(store_dir / "marks.npy", "wb") as f:
+        f.write(marks_store._MAGIC + len(header).to_bytes(2, "little") + header.encode("latin1"))
+        f.write(np.array([[33.3, np.nan], [-np.inf, 0.1]], dtype=np.float32).tobytes())
+    (store_dir / "students.json").write_text(json.dumps({"Trang": 0, "Sam": 1}), encoding="utf-8")
+    (store_dir / "assignments.json").write_text(json.dumps(["A1", "A2"]), encoding="utf-8")
+    store = MarksStore(str(store_dir))
+    assert store.marks.dtype == np.float64
+    assert dict(store.records()) == {"Trang": {"A1": 33.3}, "Sam": {"A1": float('-inf'), "A2": 0.1}}
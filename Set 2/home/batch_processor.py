@@ -1,5 +1,11 @@
-from typing import Tuple, List, Optional
+from typing import Dict, Tuple, List, Optional
 import os
+import sys
+
+# Modules shared by every set live in the repository's shared directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, "shared"))
+from fast_tokenizer import count_file_alnum, is_text_file, open_input
+from vocab_pruning import BoundedCounter, prune_counts
 
 
 def get_stopwords(stopwords_file: str) -> List[str]:
@@ -10,7 +16,7 @@ def get_stopwords(stopwords_file: str) -> List[str]:
         List[str]: A list of stop words.
     """
     words = []
-    with open(stopwords_file, 'r', encoding='utf-8') as f:
+    with open_input(stopwords_file, 'rt') as f:
         for line in f:
             w = line.strip().lower() 
             if w:
@@ -20,15 +26,16 @@ def get_stopwords(stopwords_file: str) -> List[str]:
 
 
 
-def get_vocabs(text: str, stopwords: List) -> Tuple[Tuple[str], Tuple[int]] | Tuple[()]:
-    """ Abstract words from the given text, filter them based on the criteria, return them as a sorted tuple along with their frequencies.
+TOKENIZER_PROFILE = "task4-alnum-v1"  # identifies get_vocabs' rules in the token-count cache
+
+
+def count_vocabs(text: str, stopwords: List) -> Dict[str, int]:
+    """ Count the words of the given text that pass the filtering criteria.
     Args:
         text (str): The input text to process.
         stopwords (List): A list of stop words to filter out.
     Returns:
-        Tuple[Tuple[str], Tuple[int]] | Tuple[()]: A tuple containing :
-             - A tuple of sorted words and a tuple of their corresponding frequencies.
-             - Or an empty tuple if no valid words are"""
+        Dict[str, int]: A dictionary mapping each valid word to its frequency."""
     tokens = []
     current = ""
     # Tokenisation: split by non-alphanumeric characters
@@ -44,8 +51,8 @@ def get_vocabs(text: str, stopwords: List) -> Tuple[Tuple[str], Tuple[int]] | Tu
         
     # Convert stopwords to a set for faster lookup (remove duplicates too if exists)
     sw = set(stopwords)
-    filtered = []
-    # Filtering tokens with the given criteria
+    counts = {}
+    # Filtering tokens with the given criteria and counting the survivors
     for t in tokens:
         if not t.isalpha():
             continue
@@ -53,16 +60,24 @@ def get_vocabs(text: str, stopwords: List) -> Tuple[Tuple[str], Tuple[int]] | Tu
             continue
         if t in sw:
             continue
-        filtered.append(t)
+        counts[t] = counts.get(t, 0) + 1
+    return counts
+
+
+def get_vocabs(text: str, stopwords: List) -> Tuple[Tuple[str], Tuple[int]] | Tuple[()]:
+    """ Abstract words from the given text, filter them based on the criteria, return them as a sorted tuple along with their frequencies.
+    Args:
+        text (str): The input text to process.
+        stopwords (List): A list of stop words to filter out.
+    Returns:
+        Tuple[Tuple[str], Tuple[int]] | Tuple[()]: A tuple containing :
+             - A tuple of sorted words and a tuple of their corresponding frequencies.
+             - Or an empty tuple if no valid words are"""
+    counts = count_vocabs(text, stopwords)
 
     # If no valid words remain after filtering, return an empty tuple    
-    if not filtered:
+    if not counts:
         return tuple()
- 
-    counts = {}
-    # Count frequencies of each word
-    for w in filtered: 
-        counts[w] = counts.get(w, 0) + 1
     
     vocab_sorted = tuple(sorted(counts.keys()))
     freqs = tuple(counts[w] for w in vocab_sorted)
@@ -70,23 +85,49 @@ def get_vocabs(text: str, stopwords: List) -> Tuple[Tuple[str], Tuple[int]] | Tu
     return vocab_sorted, freqs
 
 
+def count_file_vocabs(fpath: str, stopwords: List, cache=None) -> Dict[str, int]:
+    """ Count the words of one file, consulting a token-count cache when one is given.
+    Args:
+        fpath (str): Path of the text file.
+        stopwords (List): A list of stop words to filter out.
+        cache (TokenCountCache, optional): Cache of per-file counts. Defaults to None (always tokenize).
+    Returns:
+        Dict[str, int]: A dictionary mapping each valid word to its frequency."""
+    # memory-map the file and tokenize its bytes; counts equal count_vocabs(f.read())
+    if cache is not None:
+        return cache.get_counts(fpath, TOKENIZER_PROFILE, stopwords,
+                                lambda path: count_file_alnum(path, stopwords))
+    return count_file_alnum(fpath, stopwords)
+
+
 def process_mini_dataset(
         stop_words: List[str],
         data_path: str = 'data',
         category: Optional[str] = None,
+        cache=None,
+        min_count: int = 1,
+        max_vocab_size: Optional[int] = None,
+        max_tracked: Optional[int] = None,
     ):
     """Process a mini dataset to extract vocabulary and their frequencies, and write them to 'word_freq.txt'.
     Args:
         stop_words (List[str]): A list of stop words to filter out.
         data_path (str, optional): Path to the dataset directory. Defaults to 'data'.
         category (Optional[str], optional): Specific category subdirectory to process. Defaults to None.
+        cache (TokenCountCache, optional): Cache of per-file token counts; unchanged files are not re-tokenized. Defaults to None.
+        min_count (int, optional): Drop words seen fewer times. Defaults to 1 (keep all).
+        max_vocab_size (Optional[int], optional): Keep only this many of the most frequent words. Defaults to None.
+        max_tracked (Optional[int], optional): Bound the words held while counting by evicting the least frequent
+            ones (counts become approximate for evicted words). Defaults to None (exact counting).
     Returns:
         Tuple[Tuple[str], Tuple[int]] | Tuple[()]: A tuple containing:
             - A tuple of sorted words and a tuple of their corresponding frequencies.
             - Or an empty tuple if no valid words are found or if the directory doesn't exist.
     """
-    
-    texts = []
+    if max_tracked is not None and max_vocab_size is not None and max_tracked < 2 * max_vocab_size:
+        raise ValueError("max_tracked must be at least twice max_vocab_size")
+    counter = BoundedCounter(max_tracked)
+    found = False
     if category: # process a specific category
         root_path = os.path.join(data_path, category)
         if not os.path.exists(root_path): # directory doesn't exist return empty tuple
@@ -100,20 +141,25 @@ def process_mini_dataset(
     for folder in search_dirs: # iterate through each directory
         for fname in os.listdir(folder): 
             fpath = os.path.join(folder, fname) 
-            if os.path.isfile(fpath) and fname.endswith('.txt'): 
-                with open(fpath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    texts.append(content)
-    if not texts:
+            if os.path.isfile(fpath) and is_text_file(fname): 
+                found = True
+                # count each file on its own so unchanged files can come from the cache
+                counter.update(count_file_vocabs(fpath, stop_words, cache))
+    if not found:
         return tuple()
 
-    all_text = '\n'.join(texts)
-    result = get_vocabs(all_text, stop_words)
+    # prune the long tail before anything is sorted or written
+    counts, pruned = prune_counts(counter.counts, min_count, max_vocab_size)
+    pruned += counter.evicted
+    if min_count > 1 or max_vocab_size is not None or max_tracked is not None:
+        print(f"Pruned {pruned} tokens (min_count={min_count}, max_vocab_size={max_vocab_size})")
+
     # If no vocabulary was found, return empty and do not write a file
-    if not result:
+    if not counts:
         return tuple()
 
-    vocab_sorted, freqs = result
+    vocab_sorted = tuple(sorted(counts.keys()))
+    freqs = tuple(counts[w] for w in vocab_sorted)
     # Pair and sort by frequency descending
     pairs = sorted(zip(vocab_sorted, freqs), key=lambda x: x[1], reverse=True)
 
@@ -1,17 +1,97 @@
-from task7 import TextProcessor
+import os
+import sys
+
+# Modules shared by every set live in the repository's shared directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from role_based_vocab_manager import TextProcessor
+from fast_tokenizer import count_file_keep_stopwords
+from collections import OrderedDict
+import hashlib
 import math
+import threading
+
+# Identifies the _clean_keep_stopwords rules in the token-count cache
+TOKENIZER_PROFILE = "essay-keep-stopwords-v1"
+
+class _LRUCache:
+    """A thread-safe, size-limited mapping that evicts the least recently used entry."""
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value stored for key (marking it recently used), or None on a miss."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "max_size": self.max_size}
+
+
+def _sha1(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
 
 class EssayScorer:
-    def __init__(self, text_processor):
+    def __init__(self, text_processor, cache=None, prompt_cache_size: int = 128, result_cache_size: int = 4096):
         """Initialize the EssayScorer with a TextProcessor instance.
 
         Args:
             text_processor (TextProcessor): An instance of the TextProcessor class.
+            cache (TokenCountCache, optional): Cache of per-file token counts, so unchanged
+                essays are not re-tokenized. Defaults to None.
+            prompt_cache_size (int, optional): Number of analysed prompts kept in memory. Defaults to 128.
+            result_cache_size (int, optional): Number of score dicts kept in memory, keyed by
+                (essay content hash, prompt hash, vocabulary version). Defaults to 4096.
             self: The instance of the EssayScorer class.
         Returns:
             None
         """
         self.tp = text_processor
+        self.cache = cache
+        self._stopset = frozenset(self.tp.stopwords)
+        self._prompts = _LRUCache(prompt_cache_size)
+        self._results = _LRUCache(result_cache_size)
+
+    def cache_stats(self) -> dict:
+        """Return the hit/miss counters and sizes of the prompt and result caches."""
+        return {"prompt": self._prompts.stats(), "result": self._results.stats()}
+
+    def _analyse_prompt(self, prob_statement: str) -> tuple:
+        """Return the topic words of a prompt and their multiplicities, computed once per prompt text.
+        Args:
+            prob_statement (str): The problem statement or essay prompt.
+        Returns:
+            tuple: (number of topic words, mapping of topic word to how often it occurs in the prompt).
+        """
+        analysis = self._prompts.get(prob_statement)
+        if analysis is None:
+            topics = self._topic_words(prob_statement)
+            multiplicity = {}
+            for t in topics:
+                multiplicity[t] = multiplicity.get(t, 0) + 1
+            analysis = (len(topics), multiplicity)
+            self._prompts.put(prob_statement, analysis)
+        return analysis
 
     def _clean_keep_stopwords(self, text: str) -> list:
         """Clean the input text while retaining stopwords.
@@ -88,16 +168,32 @@ class EssayScorer:
             capped_sum += min(3, freq.get(tw, 0))
         return 40.0 * capped_sum / denom 
     
-    def _rarity_points(self, word: str) -> int:
+    def _cached_relevance_score(self, n_topics: int, multiplicity: dict, counts: dict) -> float:
+        """_relevance_score computed from a prompt analysis and the essay's token counts.
+
+        Args:
+            n_topics (int): The number of topic words (with repeats).
+            multiplicity (dict): Mapping of topic word to its number of occurrences in the prompt.
+            counts (dict): Mapping of essay token to count.
+        Returns:
+            float: The relevance score of the essay.
+        """
+        if n_topics == 0:
+            return 0.0
+        capped_sum = sum(m * min(3, counts.get(tw, 0)) for tw, m in multiplicity.items())
+        return 40.0 * capped_sum / (3 * n_topics)
+
+    def _rarity_points(self, word: str, snapshot=None) -> int:
         """"Assign rarity points to a word based on its frequency in the corpus.
         Args:
             word (str): The word for which to assign rarity points.
+            snapshot (VocabSnapshot, optional): The vocabulary version to read. Defaults to None (the latest).
             Returns:
             int: The rarity points assigned to the word.
         Returns: -1 if the word is not found in the corpus.
         5 points for frequency 1
         """
-        f = self.tp.word_freq.get(word, 0)
+        f = (snapshot or self.tp.snapshot()).frequency(word)
         if f == 0:
             return -1
         if 1 <= f <= 3:
@@ -110,11 +206,12 @@ class EssayScorer:
             return 2
         return 1
 
-    def _rarity_score(self, essay_tokens_no_stop: list[str]) -> float:
+    def _rarity_score(self, essay_tokens_no_stop: list[str], snapshot=None) -> float:
         """Calculate the rarity score of the essay based on unique words.
 
         Args:
             essay_tokens_no_stop (list[str]): A list of tokens from the essay without stopwords.
+            snapshot (VocabSnapshot, optional): The vocabulary version to read. Defaults to None (the latest).
 
         Returns:
             float: The rarity score of the essay.
@@ -126,7 +223,8 @@ class EssayScorer:
         U = len(uniq)
         if U == 0:
             return 0.0
-        total_pts = sum(self._rarity_points(w) for w in uniq)
+        snap = snapshot or self.tp.snapshot()
+        total_pts = sum(self._rarity_points(w, snap) for w in uniq)
         score = 30.0 * total_pts / (3.0 * U)
         return min(30.0, max(0.0, score))
 
@@ -154,10 +252,23 @@ class EssayScorer:
         """
         if not essay_tokens:
             return 0.0
-        stop = set(self.tp.stopwords)
+        stop = self._stopset
         stops = sum(1 for t in essay_tokens if t in stop)
         return -10.0 if stops / len(essay_tokens) >= 0.5 else 0
 
+    def essay_counts(self, file_path: str) -> dict:
+        """Tokenize an essay file with the _clean_keep_stopwords rules.
+        Args:
+            file_path (str): The path to the essay text file.
+        Returns:
+            dict: Mapping of token to count.
+        """
+        # Tokenize the memory-mapped essay bytes (same counts as _clean_keep_stopwords);
+        # with a cache, unchanged files reuse their stored counts
+        if self.cache is not None:
+            return self.cache.get_counts(file_path, TOKENIZER_PROFILE, (), count_file_keep_stopwords)
+        return count_file_keep_stopwords(file_path)
+
     def score_essay(self, prob_statement, file_path):
         """
         Score the essay based on the given problem statement and essay file path.
@@ -167,22 +278,44 @@ class EssayScorer:
         Returns:
             dict: A dictionary containing individual scores and the total score.    
         """
-        # Read and process the essay
-        with open(file_path, "r", encoding="utf-8") as f:
-            essay_raw = f.read()
-        essay_tokens = self._clean_keep_stopwords(essay_raw)
+        # Identical essay bytes under the same prompt and vocabulary always get the same scores;
+        # the whole essay is scored against the one snapshot its cache key names
+        snap = self.tp.snapshot()
+        h = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        key = (h.hexdigest(), _sha1(prob_statement.encode('utf-8')), snap.version)
+        result = self._results.get(key)
+        if result is None:
+            result = self.score_counts(prob_statement, self.essay_counts(file_path), snap)
+            self._results.put(key, result)
+        return dict(result)
+
+    def score_counts(self, prob_statement: str, counts: dict, snapshot=None) -> dict:
+        """
+        Score an essay given as token counts (from essay_counts).
+        Args:
+            prob_statement (str): The problem statement or essay prompt.
+            counts (dict): Mapping of essay token to count.
+            snapshot (VocabSnapshot, optional): The vocabulary version to score against. Defaults to None (the latest).
+        Returns:
+            dict: A dictionary containing individual scores and the total score.
+        """
+        # Every score only depends on token counts, so token order does not matter
+        essay_tokens = [t for t, c in counts.items() for _ in range(c)]
 
         # Remove stopwords for certain calculations
-        stop = set(self.tp.stopwords)
+        stop = self._stopset
         essay_no_stop = [t for t in essay_tokens if t not in stop]
 
-        # The topic words from the problem statement
-        topics = self._topic_words(prob_statement)
+        # The topic words from the problem statement, analysed once per prompt
+        n_topics, multiplicity = self._analyse_prompt(prob_statement)
 
         # Four scoring components and one penalty
         length_mark = self._length_score(len(essay_tokens))
-        relevance   = self._relevance_score(topics, essay_tokens)
-        rarity      = self._rarity_score(essay_no_stop)
+        relevance   = self._cached_relevance_score(n_topics, multiplicity, counts)
+        rarity      = self._rarity_score(essay_no_stop, snapshot)
         variety     = self._variety_score(essay_no_stop)
         penalty     = self._filler_penalty(essay_tokens)
 
@@ -207,5 +340,5 @@ if __name__ == "__main__":
     )
     scorer = EssayScorer(tp)
     prob_statement = "The impact of technology on education."
-    score = scorer.score_essay(prob_statement, "/home/sample_essay.txt")
+    score = scorer.score_essay(prob_statement, "sample_essay.txt")
     print(score)
@@ -0,0 +1,201 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# Modules shared by every set live in the repository's shared directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from fast_tokenizer import is_text_file
+
+
+def iter_submissions(source: str, prompt: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+    """Yield the essays to grade, one at a time.
+
+    Args:
+        source (str): A directory, searched recursively for .txt files (plain or compressed) in
+            sorted order, or a .jsonl manifest with one {"path": ..., "prompt": ...} object per line.
+            Relative manifest paths are resolved against the manifest's directory.
+        prompt (Optional[str], optional): The prompt for essays without their own. Defaults to None.
+    Returns:
+        Iterator[Tuple[str, str]]: (absolute essay path, prompt) pairs.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if is_text_file(name):
+                    yield os.path.abspath(os.path.join(root, name)), prompt
+        return
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            path = os.path.join(base, entry["path"])
+            yield os.path.abspath(path), entry.get("prompt", prompt)
+
+
+def prompt_hash(prompt: Optional[str]) -> str:
+    """Return a short stable hash of a prompt, stored in every result to tell prompts apart."""
+    return hashlib.sha1((prompt or "").encode("utf-8")).hexdigest()[:16]
+
+
+def load_done(results_path: str) -> Set[Tuple[str, str]]:
+    """Return the (essay path, prompt hash) pairs already graded successfully in a results file.
+
+    The same essay graded against another prompt is a different result, so it is not done.
+    Lines that do not parse (e.g. half-written when a run crashed), failed essays and records
+    without a prompt hash are ignored, so those essays are graded again.
+
+    Args:
+        results_path (str): The JSONL results file.
+    Returns:
+        Set[Tuple[str, str]]: The recorded (path, prompt_hash(prompt)) pairs.
+    """
+    done = set()
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "score" in record and "prompt_hash" in record:
+                done.add((record["path"], record["prompt_hash"]))
+    return done
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Return the q-th percentile (0-100) of sorted values by the nearest-rank method."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(q / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class GradingPipeline:
+    """
+    Grade a stream of essays with bounded concurrency, recording each result as it finishes.
+
+    Essays are pulled from iter_submissions lazily and at most max_pending are in flight, so the
+    submission list is never held in memory. Every result is appended to a JSONL file and flushed
+    immediately; a rerun after a crash skips the essays already graded in that file for the same prompt.
+    """
+    def __init__(
+            self,
+            scorer,
+            results_path: str = "grades.jsonl",
+            workers: int = 4,
+            max_pending: Optional[int] = None
+        ) -> None:
+        """Initialize the pipeline.
+
+        Args:
+            scorer (EssayScorer): The scorer used for every essay.
+            results_path (str, optional): The JSONL file results are appended to. Defaults to "grades.jsonl".
+            workers (int, optional): Number of worker threads. Defaults to 4.
+            max_pending (Optional[int], optional): Maximum essays in flight. Defaults to 2 * workers.
+        Returns:
+            None
+        """
+        self.scorer = scorer
+        self.results_path = results_path
+        self.workers = workers
+        self.max_pending = max_pending if max_pending is not None else 2 * workers
+
+    def _grade(self, path: str, prompt: str) -> dict:
+        """Tokenize and score one essay in a worker thread and time it."""
+        start = time.perf_counter()
+        record = {"path": path, "prompt_hash": prompt_hash(prompt)}
+        try:
+            record["score"] = self.scorer.score_essay(prompt or "", path)
+        except Exception as e:  # a bad essay is recorded as failed instead of ending the run
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["seconds"] = round(time.perf_counter() - start, 6)
+        return record
+
+    def run(self, source: str, prompt: Optional[str] = None) -> Dict[str, float]:
+        """Grade every essay of a directory or manifest that is not yet in the results file.
+
+        Args:
+            source (str): A submission directory or a .jsonl manifest (see iter_submissions).
+            prompt (Optional[str], optional): The prompt for essays without their own. Defaults to None.
+        Returns:
+            Dict[str, float]: The run summary (also printed): graded, failed and skipped counts, wall time,
+            essays per second and latency percentiles in milliseconds.
+        """
+        done = load_done(self.results_path)
+        latencies: List[float] = []
+        graded = failed = skipped = 0
+        start = time.perf_counter()
+
+        # A crash can leave a half-written last line; start the next record on a fresh line
+        torn = False
+        if os.path.exists(self.results_path) and os.path.getsize(self.results_path) > 0:
+            with open(self.results_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+
+        with open(self.results_path, 'a', encoding='utf-8') as out:
+            if torn:
+                out.write("\n")
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                pending = set()
+                for path, essay_prompt in iter_submissions(source, prompt):
+                    key = (path, prompt_hash(essay_prompt))
+                    if key in done:
+                        skipped += 1
+                        continue
+                    if len(pending) >= self.max_pending:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            graded, failed = self._record(future.result(), out, latencies, graded, failed)
+                    pending.add(pool.submit(self._grade, path, essay_prompt))
+                    done.add(key)  # a manifest listing an essay twice with one prompt grades it once
+                for future in as_completed(pending):
+                    graded, failed = self._record(future.result(), out, latencies, graded, failed)
+
+        wall = time.perf_counter() - start
+        latencies.sort()
+        summary = {
+            "graded": graded,
+            "failed": failed,
+            "skipped": skipped,
+            "seconds": round(wall, 3),
+            "essays_per_second": round(graded / wall, 2) if wall > 0 else 0.0,
+            "latency_p50_ms": round(1000 * _percentile(latencies, 50), 2),
+            "latency_p95_ms": round(1000 * _percentile(latencies, 95), 2),
+            "latency_max_ms": round(1000 * latencies[-1], 2) if latencies else 0.0,
+        }
+        print(f"Graded {graded} essays ({failed} failed, {skipped} already done) in {summary['seconds']}s: "
+              f"{summary['essays_per_second']} essays/s, latency p50 {summary['latency_p50_ms']} ms, "
+              f"p95 {summary['latency_p95_ms']} ms, max {summary['latency_max_ms']} ms")
+        return summary
+
+    def _record(self, record: dict, out, latencies: List[float], graded: int, failed: int) -> Tuple[int, int]:
+        """Append one result to the results file and update the counters."""
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+        latencies.append(record["seconds"])
+        if "score" in record:
+            return graded + 1, failed
+        return graded, failed + 1
+
+
+if __name__ == "__main__":
+    from essay_scorer import EssayScorer
+    from role_based_vocab_manager import TextProcessor
+
+    tp = TextProcessor(
+        stopwords_filepath="data/stop_words_english.txt",
+        corpus_filepath="data/ag_news_test.csv",
+        idx2label_filepath="data/idx2label.json",
+    )
+    pipeline = GradingPipeline(EssayScorer(tp), "grades.jsonl")
+    pipeline.run("essays", prompt="The impact of technology on education.")
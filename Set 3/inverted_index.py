@@ -0,0 +1,337 @@
+import heapq
+import math
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+
+def _encode_varint(value: int, buf: bytearray) -> None:
+    """Append a non-negative integer to a buffer as a little-endian base-128 varint.
+
+    Args:
+        value (int): The non-negative integer to encode.
+        buf (bytearray): The buffer the encoded bytes are appended to.
+    Returns:
+        None
+    """
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _decode_pairs(buf: bytes) -> Iterator[Tuple[int, int]]:
+    """Decode a buffer of (delta, value) varint pairs back into (running total, value) pairs.
+
+    Args:
+        buf (bytes): The encoded buffer.
+    Returns:
+        Iterator[Tuple[int, int]]: The decoded (id, value) pairs in ascending id order.
+    """
+    current = 0
+    pos = 0
+    n = len(buf)
+    while pos < n:
+        # First varint: gap to the previous id
+        shift = 0
+        delta = 0
+        while True:
+            byte = buf[pos]
+            pos += 1
+            delta |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        # Second varint: the value stored with this id
+        shift = 0
+        value = 0
+        while True:
+            byte = buf[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        current += delta
+        yield current, value
+
+
+def _encode_pairs(pairs: List[Tuple[int, int]]) -> bytearray:
+    """Encode (id, value) pairs sorted by id as delta-encoded varint pairs.
+
+    Args:
+        pairs (List[Tuple[int, int]]): The pairs to encode, sorted by id.
+    Returns:
+        bytearray: The encoded buffer.
+    """
+    buf = bytearray()
+    prev = 0
+    for ident, value in pairs:
+        _encode_varint(ident - prev, buf)
+        _encode_varint(value, buf)
+        prev = ident
+    return buf
+
+
+class InvertedIndex:
+    """
+    An inverted index from term ids to compressed posting lists of document ids.
+
+    Every posting list is a bytearray of varint pairs (gap to previous doc id, term frequency),
+    so appending a document with a larger id than any seen before is a constant-time append.
+    A forward map (doc id -> encoded term frequencies) is kept alongside so a document can
+    be removed by touching only the posting lists of the terms it contains.
+
+    freeze() returns a read-only copy for readers; the two share their posting lists until this
+    index next changes one, which it then copies first.
+    """
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        """Initialize an empty index.
+
+        Args:
+            k1 (float, optional): BM25 term-frequency saturation parameter. Defaults to 1.5.
+            b (float, optional): BM25 length-normalisation parameter. Defaults to 0.75.
+        Returns:
+            None
+        """
+        self.k1 = k1
+        self.b = b
+        # term id -> encoded postings, last doc id in the list, document frequency
+        self._postings: Dict[int, bytearray] = {}
+        self._last_doc: Dict[int, int] = {}
+        self._doc_freq: Dict[int, int] = {}
+        # doc id -> encoded (term id, tf) pairs, document length and label
+        self._forward: Dict[int, bytearray] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._doc_label: Dict[int, object] = {}
+        self._total_len = 0
+        # Posting lists this index may append to in place (None = all of them, nothing was frozen),
+        # and the frozen copy of the current state, if one was taken
+        self._owned: Optional[Set[int]] = None
+        self._frozen: Optional["InvertedIndex"] = None
+
+    def __len__(self) -> int:
+        return len(self._forward)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._forward
+
+    def add_document(self, doc_id: int, term_counts: Dict[int, int], label=None) -> None:
+        """Add a document to the index.
+
+        Args:
+            doc_id (int): The document id; must not already be indexed.
+            term_counts (Dict[int, int]): Mapping of term id to its frequency in the document.
+            label (optional): The label of the document, used for filtered queries.
+        Returns:
+            None
+        """
+        if doc_id in self._forward:
+            raise ValueError(f"Document {doc_id} is already indexed")
+        self._frozen = None
+        items = sorted(term_counts.items())
+        self._forward[doc_id] = _encode_pairs(items)
+        length = sum(tf for _, tf in items)
+        self._doc_len[doc_id] = length
+        self._doc_label[doc_id] = label
+        self._total_len += length
+
+        for term_id, tf in items:
+            postings = self._postings.get(term_id)
+            last = self._last_doc.get(term_id)
+            if postings is None:
+                postings = bytearray()
+                self._postings[term_id] = postings
+                self._own(term_id)
+                _encode_varint(doc_id, postings)
+                _encode_varint(tf, postings)
+            elif doc_id > last:
+                # Fast path: ids only grow, so the gap is positive
+                if self._owned is not None and term_id not in self._owned:
+                    # Shared with a frozen copy: append to a private copy instead
+                    postings = bytearray(postings)
+                    self._postings[term_id] = postings
+                    self._own(term_id)
+                _encode_varint(doc_id - last, postings)
+                _encode_varint(tf, postings)
+            else:
+                # Out-of-order insert: re-encode this posting list only
+                pairs = list(_decode_pairs(postings))
+                pairs.append((doc_id, tf))
+                pairs.sort()
+                self._postings[term_id] = _encode_pairs(pairs)
+                self._own(term_id)
+            self._last_doc[term_id] = max(doc_id, last if last is not None else doc_id)
+            self._doc_freq[term_id] = self._doc_freq.get(term_id, 0) + 1
+
+    def remove_document(self, doc_id: int) -> Dict[int, int]:
+        """Remove a document from the index.
+
+        Args:
+            doc_id (int): The id of the document to remove.
+        Returns:
+            Dict[int, int]: The term frequencies the document contributed, or an empty dict if
+            the document was not indexed.
+        """
+        return self.remove_documents([doc_id])
+
+    def remove_documents(self, doc_ids) -> Dict[int, int]:
+        """Remove many documents, re-encoding each affected posting list once.
+
+        Args:
+            doc_ids (Iterable[int]): The ids of the documents to remove; unknown ids are ignored.
+        Returns:
+            Dict[int, int]: The summed term frequencies the removed documents contributed.
+        """
+        removed: Dict[int, int] = {}
+        self._frozen = None
+        # term id -> doc ids to drop from its posting list
+        by_term: Dict[int, set] = {}
+        for doc_id in doc_ids:
+            forward = self._forward.pop(doc_id, None)
+            if forward is None:
+                continue
+            self._total_len -= self._doc_len.pop(doc_id)
+            self._doc_label.pop(doc_id, None)
+            for term_id, tf in _decode_pairs(forward):
+                removed[term_id] = removed.get(term_id, 0) + tf
+                by_term.setdefault(term_id, set()).add(doc_id)
+
+        for term_id, dropped in by_term.items():
+            pairs = [(d, tf) for d, tf in _decode_pairs(self._postings[term_id]) if d not in dropped]
+            if pairs:
+                self._postings[term_id] = _encode_pairs(pairs)
+                self._own(term_id)
+                self._last_doc[term_id] = pairs[-1][0]
+                self._doc_freq[term_id] -= len(dropped)
+            else:
+                del self._postings[term_id]
+                del self._last_doc[term_id]
+                del self._doc_freq[term_id]
+        return removed
+
+    def _own(self, term_id: int) -> None:
+        """Note that a posting list is private to this index (new since the last freeze)."""
+        if self._owned is not None:
+            self._owned.add(term_id)
+
+    def freeze(self) -> "InvertedIndex":
+        """Return a copy of the index that later updates to this one never change.
+
+        Only the maps are copied (O(terms + documents)); posting lists are shared until this index
+        changes them. Until the next update the same copy is returned again. The copy is meant
+        for queries only and must not be updated.
+        Returns:
+            InvertedIndex: The frozen copy.
+        """
+        if self._frozen is None:
+            frozen = InvertedIndex(self.k1, self.b)
+            frozen._postings = dict(self._postings)
+            frozen._last_doc = dict(self._last_doc)
+            frozen._doc_freq = dict(self._doc_freq)
+            frozen._forward = dict(self._forward)
+            frozen._doc_len = dict(self._doc_len)
+            frozen._doc_label = dict(self._doc_label)
+            frozen._total_len = self._total_len
+            frozen._owned = set()
+            self._owned = set()
+            self._frozen = frozen
+        return self._frozen
+
+    def document_terms(self, doc_id: int) -> Dict[int, int]:
+        """Return the term frequencies of an indexed document.
+
+        Args:
+            doc_id (int): The document id.
+        Returns:
+            Dict[int, int]: Mapping of term id to frequency (empty if the document is unknown).
+        """
+        forward = self._forward.get(doc_id)
+        return dict(_decode_pairs(forward)) if forward is not None else {}
+
+    def postings(self, term_id: int) -> Iterator[Tuple[int, int]]:
+        """Iterate over the (doc id, term frequency) postings of a term.
+
+        Args:
+            term_id (int): The term id.
+        Returns:
+            Iterator[Tuple[int, int]]: Postings in ascending doc id order.
+        """
+        buf = self._postings.get(term_id)
+        if buf is None:
+            return iter(())
+        return _decode_pairs(bytes(buf))
+
+    def doc_freq(self, term_id: int) -> int:
+        """Return the number of documents containing a term."""
+        return self._doc_freq.get(term_id, 0)
+
+    def _label_ok(self, doc_id: int, label) -> bool:
+        return label is None or self._doc_label.get(doc_id) == label
+
+    def search_and(self, term_ids: List[int], label=None) -> List[int]:
+        """Return the ids of documents containing every given term.
+
+        Args:
+            term_ids (List[int]): The query term ids.
+            label (optional): Only return documents with this label. Defaults to None (any label).
+        Returns:
+            List[int]: Matching doc ids in ascending order.
+        """
+        if not term_ids or any(t not in self._postings for t in term_ids):
+            return []
+        # Start from the rarest term so the candidate set is as small as possible
+        ordered = sorted(set(term_ids), key=self.doc_freq)
+        result = {d for d, _ in self.postings(ordered[0]) if self._label_ok(d, label)}
+        for term_id in ordered[1:]:
+            if not result:
+                break
+            result &= {d for d, _ in self.postings(term_id)}
+        return sorted(result)
+
+    def search_or(self, term_ids: List[int], label=None) -> List[int]:
+        """Return the ids of documents containing at least one of the given terms.
+
+        Args:
+            term_ids (List[int]): The query term ids.
+            label (optional): Only return documents with this label. Defaults to None (any label).
+        Returns:
+            List[int]: Matching doc ids in ascending order.
+        """
+        result = set()
+        for term_id in set(term_ids):
+            result.update(d for d, _ in self.postings(term_id) if self._label_ok(d, label))
+        return sorted(result)
+
+    def bm25(self, term_ids: List[int], k: int = 10, label=None) -> List[Tuple[int, float]]:
+        """Rank documents against a query with Okapi BM25 and return the top k.
+
+        Args:
+            term_ids (List[int]): The query term ids (repeated ids count once per occurrence).
+            k (int, optional): The number of results to return. Defaults to 10.
+            label (optional): Only rank documents with this label. Defaults to None (any label).
+        Returns:
+            List[Tuple[int, float]]: (doc id, score) pairs, best first.
+        """
+        n_docs = len(self._forward)
+        if n_docs == 0 or k <= 0:
+            return []
+        avg_len = self._total_len / n_docs if self._total_len else 1.0
+        query_tf: Dict[int, int] = {}
+        for term_id in term_ids:
+            query_tf[term_id] = query_tf.get(term_id, 0) + 1
+
+        scores: Dict[int, float] = {}
+        for term_id, qtf in query_tf.items():
+            df = self._doc_freq.get(term_id, 0)
+            if df == 0:
+                continue
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in self.postings(term_id):
+                if not self._label_ok(doc_id, label):
+                    continue
+                norm = self.k1 * (1.0 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + qtf * idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def size_in_bytes(self) -> int:
+        """Return the total size of the encoded posting lists and forward map."""
+        return sum(len(b) for b in self._postings.values()) + sum(len(b) for b in self._forward.values())
@@ -0,0 +1,124 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def shingles(tokens: Sequence[str], k: int = 3) -> set:
+    """Return the set of word k-shingles of a token list (the whole list if it is shorter than k)."""
+    if len(tokens) < k:
+        return {tuple(tokens)} if tokens else set()
+    return {tuple(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+class MinHashLSH:
+    """
+    Near-duplicate lookup with MinHash signatures and banded locality-sensitive hashing.
+
+    A document's signature holds, for each of num_perm hash functions, the minimum hash over its
+    word shingles; the fraction of equal positions in two signatures estimates the Jaccard similarity
+    of their shingle sets. Signatures are cut into bands of rows = num_perm / bands values and each
+    band is hashed into its own bucket table, so a query only compares against documents sharing a
+    bucket in some band instead of against every document. With the defaults (64 permutations,
+    16 bands of 4) pairs at similarity 0.8 become candidates with probability above 0.999, pairs at
+    0.3 with probability about 0.12; candidates are then checked against the threshold.
+
+    Shingles are hashed with Python's hash(), so signatures are only comparable within one process.
+    """
+    def __init__(
+            self,
+            threshold: float = 0.8,
+            num_perm: int = 64,
+            bands: int = 16,
+            shingle_size: int = 3,
+            seed: int = 1
+        ) -> None:
+        """Create an empty index.
+
+        Args:
+            threshold (float, optional): Estimated Jaccard similarity at which two documents are
+                near-duplicates. Defaults to 0.8.
+            num_perm (int, optional): Number of hash functions per signature. Defaults to 64.
+            bands (int, optional): Number of LSH bands; must divide num_perm. Defaults to 16.
+            shingle_size (int, optional): Words per shingle. Defaults to 3.
+            seed (int, optional): Seed of the hash function parameters. Defaults to 1.
+        Returns:
+            None
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # h_i(x) = ((x ^ salt_i) * mult_i) >> 32 with odd multipliers: a multiply-shift family
+        self._salts = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64) << np.uint64(1)
+        self._mults = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._signatures
+
+    def signature(self, tokens: Sequence[str]) -> Optional[np.ndarray]:
+        """Return the MinHash signature of a token list, or None if it has no tokens.
+
+        Args:
+            tokens (Sequence[str]): Cleaned tokens in text order.
+        Returns:
+            Optional[np.ndarray]: A uint32 array of num_perm minimum hashes.
+        """
+        shingle_set = shingles(tokens, self.shingle_size)
+        if not shingle_set:
+            return None
+        hashes = np.fromiter((hash(s) for s in shingle_set), dtype=np.int64, count=len(shingle_set))
+        hashes = hashes.view(np.uint64)
+        mixed = (hashes[None, :] ^ self._salts[:, None]) * self._mults[:, None]
+        return (mixed >> np.uint64(32)).astype(np.uint32).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        return [hash(signature[b * self.rows:(b + 1) * self.rows].tobytes()) for b in range(self.bands)]
+
+    def query(self, signature: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+        """Return the indexed documents whose estimated similarity to a signature reaches the threshold.
+
+        Args:
+            signature (Optional[np.ndarray]): A signature from signature().
+        Returns:
+            List[Tuple[int, float]]: (doc id, estimated Jaccard similarity) pairs, most similar first.
+        """
+        if signature is None:
+            return []
+        candidates = set()
+        for table, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(table.get(key, ()))
+        matches = []
+        for doc_id in candidates:
+            similarity = float(np.count_nonzero(self._signatures[doc_id] == signature)) / self.num_perm
+            if similarity >= self.threshold:
+                matches.append((doc_id, similarity))
+        matches.sort(key=lambda item: (-item[1], item[0]))
+        return matches
+
+    def add(self, doc_id: int, signature: Optional[np.ndarray]) -> None:
+        """Index a document's signature (documents without tokens are not indexed)."""
+        if signature is None or doc_id in self._signatures:
+            return
+        self._signatures[doc_id] = signature
+        for table, key in zip(self._buckets, self._band_keys(signature)):
+            table.setdefault(key, []).append(doc_id)
+
+    def remove(self, doc_id: int) -> None:
+        """Remove a document from the index (no-op for unknown ids)."""
+        signature = self._signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        for table, key in zip(self._buckets, self._band_keys(signature)):
+            bucket = table[key]
+            bucket.remove(doc_id)
+            if not bucket:
+                del table[key]
@@ -0,0 +1,169 @@
+import bisect
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class RankIndex:
+    """
+    Frequency ranks and percentiles of vocabulary words.
+
+    Words are grouped into buckets by frequency. The distinct frequencies are kept as a sorted
+    array together with the cumulative number of words up to each one, so "how many words have
+    frequency >= f", a word's rank and its percentile take one binary search (O(log V)), and
+    batches of words are answered with a single vectorized searchsorted. Each bucket keeps its
+    words sorted, which gives the (-frequency, word) order used by the top-10 listing.
+
+    Ranks are 1-based. Tied words share a rank: a word's rank is 1 plus the number of words
+    with a strictly higher frequency.
+    """
+    def __init__(self, word_freq: Optional[Dict[str, int]] = None) -> None:
+        """Build the index.
+
+        Args:
+            word_freq (Optional[Dict[str, int]], optional): Mapping of word to frequency. The dict is
+                referenced, not copied, and is used to look up the frequency of queried words.
+        Returns:
+            None
+        """
+        self.rebuild(word_freq if word_freq is not None else {})
+
+    def rebuild(self, word_freq: Dict[str, int]) -> None:
+        """Rebuild the index from scratch.
+
+        Args:
+            word_freq (Dict[str, int]): Mapping of word to frequency.
+        Returns:
+            None
+        """
+        self._freq = word_freq
+        self._buckets: Dict[int, List[str]] = {}
+        for word, freq in word_freq.items():
+            self._buckets.setdefault(freq, []).append(word)
+        for words in self._buckets.values():
+            words.sort()
+        self._refresh_arrays()
+
+    def update(self, word_freq: Dict[str, int], changes: Dict[str, int]) -> None:
+        """Move only the words whose frequency changed.
+
+        Args:
+            word_freq (Dict[str, int]): The updated mapping of word to frequency.
+            changes (Dict[str, int]): Mapping of every changed word to its previous frequency
+                (0 for words that were not in the vocabulary).
+        Returns:
+            None
+        """
+        self._freq = word_freq
+        for word, old in changes.items():
+            new = word_freq.get(word, 0)
+            if old == new:
+                continue
+            if old:
+                bucket = self._buckets[old]
+                del bucket[bisect.bisect_left(bucket, word)]
+                if not bucket:
+                    del self._buckets[old]
+            if new:
+                bisect.insort(self._buckets.setdefault(new, []), word)
+        self._refresh_arrays()
+
+    def _refresh_arrays(self) -> None:
+        """Recompute the sorted frequency array and cumulative counts (O(U log U), U distinct frequencies)."""
+        self.values = np.array(sorted(self._buckets), dtype=np.int64)
+        sizes = np.array([len(self._buckets[v]) for v in self.values.tolist()], dtype=np.int64)
+        # _at_most[i] = number of words with frequency <= values[i - 1] (0 for i = 0)
+        self._at_most = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        self.size = int(self._at_most[-1])
+
+    def __len__(self) -> int:
+        return self.size
+
+    def count_at_least(self, freq: int) -> int:
+        """Return the number of words with frequency >= freq."""
+        return self.size - int(self._at_most[np.searchsorted(self.values, freq, side='left')])
+
+    def rank_of_frequency(self, freq: int) -> int:
+        """Return the rank a word with this frequency has."""
+        return 1 + self.count_at_least(freq + 1)
+
+    def rank(self, word: str) -> Optional[int]:
+        """Return the rank of a word, or None if it is not in the vocabulary."""
+        freq = self._freq.get(word, 0)
+        return self.rank_of_frequency(freq) if freq > 0 else None
+
+    def percentile(self, word: str) -> Optional[float]:
+        """Return the percentage of words whose frequency is at most this word's, or None if unknown."""
+        freq = self._freq.get(word, 0)
+        if freq <= 0:
+            return None
+        return 100.0 * int(self._at_most[np.searchsorted(self.values, freq, side='right')]) / self.size
+
+    def ranks(self, words: Iterable[str]) -> np.ndarray:
+        """Return the ranks of many words at once (0 for words not in the vocabulary).
+
+        Args:
+            words (Iterable[str]): The words to look up.
+        Returns:
+            np.ndarray: An int64 array of ranks, in the order of the words.
+        """
+        freqs = np.fromiter((self._freq.get(w, 0) for w in words), dtype=np.int64)
+        above = self.size - self._at_most[np.searchsorted(self.values, freqs, side='right')]
+        return np.where(freqs > 0, above + 1, 0)
+
+    def percentiles(self, words: Iterable[str]) -> np.ndarray:
+        """Return the percentiles of many words at once (NaN for words not in the vocabulary).
+
+        Args:
+            words (Iterable[str]): The words to look up.
+        Returns:
+            np.ndarray: A float64 array of percentiles, in the order of the words.
+        """
+        freqs = np.fromiter((self._freq.get(w, 0) for w in words), dtype=np.int64)
+        if self.size == 0:
+            return np.full(len(freqs), np.nan)
+        pct = 100.0 * self._at_most[np.searchsorted(self.values, freqs, side='right')] / self.size
+        return np.where(freqs > 0, pct, np.nan)
+
+    def words_in_ranks(self, first: int, last: int) -> List[Tuple[str, int]]:
+        """Return the words at positions first..last (1-based, inclusive) of the (-frequency, word) order.
+
+        Args:
+            first (int): The first position.
+            last (int): The last position.
+        Returns:
+            List[Tuple[str, int]]: (word, frequency) pairs.
+        """
+        first = max(first, 1)
+        last = min(last, self.size)
+        if first > last:
+            return []
+        # Walking from the highest frequency down, bucket i starts at position size - _at_most[i + 1]
+        starts = self.size - self._at_most[1:]
+        i = int(np.searchsorted(-starts, -(first - 1), side='left'))
+        result = []
+        pos = int(starts[i])
+        while len(result) < last - first + 1:
+            freq = int(self.values[i])
+            bucket = self._buckets[freq]
+            lo = max(first - 1 - pos, 0)
+            hi = min(last - pos, len(bucket))
+            result.extend((w, freq) for w in bucket[lo:hi])
+            pos += len(bucket)
+            i -= 1
+        return result
+
+    def lowest(self, k: int) -> List[Tuple[str, int]]:
+        """Return the k least frequent words in (frequency, word) order.
+
+        Args:
+            k (int): The number of words to return.
+        Returns:
+            List[Tuple[str, int]]: (word, frequency) pairs.
+        """
+        result = []
+        for freq in self.values.tolist():
+            if len(result) >= k:
+                break
+            result.extend((w, freq) for w in self._buckets[freq][:k - len(result)])
+        return result
@@ -1,6 +1,55 @@
+import numpy as np
 import pandas as pd
+import heapq
 import json
-from typing import Dict
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Modules shared by every set live in the repository's shared directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from fast_tokenizer import open_input
+from inverted_index import InvertedIndex
+from minhash_lsh import MinHashLSH
+from rank_index import RankIndex
+from vocab_snapshot import VocabSnapshot
+from sketches import CountMinSketch, SpaceSaving, load_sketches, save_sketches
+from vocab_pruning import BoundedCounter, prune_counts
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+PUNCTUATION = ".,!?';:\"()[]{}#%&*/\\-=_+<>$"
+# One regex pass replaces every punctuation mark clean_text replaces one by one
+_PUNCT_RE = "[" + re.escape(PUNCTUATION) + "]"
+# Rows tokenized per vectorized batch, bounding the size of the exploded token Series
+_ROW_BATCH = 100000
+
+
+def _mix64(x: int) -> int:
+    """The splitmix64 finalizer: a bijective 64-bit mix in which every input bit affects every output bit."""
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def ngram_hash(term_ids: Sequence[int]) -> int:
+    """Return the 64-bit key of an n-gram from the stable term ids of its words.
+
+    The key depends on the order of the words and on n, so ("new", "york") and ("york", "new")
+    get different keys.
+    Args:
+        term_ids (Sequence[int]): The term ids of the n-gram's words, in order.
+    Returns:
+        int: An unsigned 64-bit key.
+    """
+    h = len(term_ids)
+    for t in term_ids:
+        h = _mix64(((h ^ t) + 0x9E3779B97F4A7C15) & _MASK64)
+    return h
 
 
 class TextProcessor:
@@ -11,40 +60,143 @@ class TextProcessor:
         self,
         stopwords_filepath: str,
         corpus_filepath: str,
-        idx2label_filepath: str
+        idx2label_filepath: str,
+        approximate: bool = False,
+        sketch_epsilon: float = 1e-4,
+        sketch_delta: float = 1e-3,
+        top_k: int = 1000,
+        min_count: int = 1,
+        max_vocab_size: Optional[int] = None,
+        max_tracked: Optional[int] = None,
+        ngrams: int = 1,
+        ngram_resolver: bool = False,
+        output_dir: str = ".",
+        write_behind: bool = False,
+        save_delay: float = 0.5,
+        dedup: Optional[str] = None,
+        dedup_threshold: float = 0.8
         ) -> None:
         """Initialize the TextProcessor with file paths for stopwords, corpus, and label mapping.
 
         Args:
             stopwords_filepath (str): Path to the stopwords file.
-            corpus_filepath (str): Path to the corpus file.
+            corpus_filepath (str): Path to the corpus file (CSV, optionally .gz/.bz2/.xz compressed).
             idx2label_filepath (str): Path to the index-to-label mapping file.
+            approximate (bool, optional): Count with bounded memory instead of an exact word_freq:
+                a Count-Min Sketch answers frequency() and a Space-Saving summary answers most_common().
+                word_freq, the mappings and the inverted index stay empty in this mode. Defaults to False.
+            sketch_epsilon (float, optional): Count-Min error as a fraction of the total word count. Defaults to 1e-4.
+            sketch_delta (float, optional): Probability that an estimate exceeds that error. Defaults to 1e-3.
+            top_k (int, optional): Number of heavy-hitter counters kept in approximate mode. Defaults to 1000.
+            min_count (int, optional): Words seen fewer times are left out of word_freq, the mappings
+                and the saved files. Defaults to 1 (keep all).
+            max_vocab_size (Optional[int], optional): Keep only this many of the most frequent words. Defaults to None.
+            max_tracked (Optional[int], optional): Bound the words held while counting (build_vocab, the
+                corpus load and add_file) by evicting the least frequent half once it is exceeded; also
+                bounds the n-grams held per order. Defaults to None (exact counting).
+            ngrams (int, optional): Also count all n-grams up to this order (2 for bigrams, 3 for trigrams too)
+                from the same cleaned tokens of each row. They are keyed by ngram_hash() of their term ids
+                and pruned with min_count and max_vocab_size like words. Defaults to 1 (words only).
+            ngram_resolver (bool, optional): Remember the term ids behind every n-gram key so
+                resolve_ngram() can turn a key back into text. Defaults to False.
+            output_dir (str, optional): Directory the vocabulary files are saved to and loaded from. Defaults to ".".
+            write_behind (bool, optional): Save in a background thread: updates only mark the vocabulary dirty
+                and a burst of them is written once. Call flush() or close() for durability. Defaults to False.
+            save_delay (float, optional): Seconds the background writer waits for more updates before
+                saving. Defaults to 0.5.
+            dedup (Optional[str], optional): Check every row add_file brings in against the corpus (and the
+                earlier rows of the same file) with a MinHash LSH index: "skip" leaves near-duplicates out,
+                "report" keeps them. Either way they are listed in self.duplicates. Defaults to None (off).
+            dedup_threshold (float, optional): Estimated Jaccard similarity of the rows' word 3-shingles
+                from which a row counts as a near-duplicate. Defaults to 0.8.
         Returns:
             None
         """
         # Initialize attributes
+        self.min_count = min_count
+        self.max_vocab_size = max_vocab_size
+        self.max_tracked = max_tracked
+        self.pruned_count = 0
+        # Exact counts of every word; word_freq is the pruned view of it (the same dict when nothing is pruned)
+        self._counts: Dict[str, int] = {}
+        # Words evicted from _counts by max_tracked since the vocabulary was last built or loaded
+        self._evicted = 0
         self.word_freq: Dict[str, int] = {}
         self.word2idx: Dict[str, int] = {}
         self.idx2word: Dict[int, str] = {}
+        # Stable term ids for the inverted index (word2idx ids are re-sorted after every update)
+        self.term2id: Dict[str, int] = {}
+        self.id2term: List[str] = []
+        self.index = InvertedIndex()
+        self._next_doc_id = 0
+        # Frequency ranks of word_freq; _rank_changes maps words touched since the last refresh to their
+        # previous count (None forces a full rebuild)
+        self.ranks = RankIndex()
+        self._rank_changes: Optional[Dict[str, int]] = None
+        # Bumped on every vocabulary change, so results computed from an older vocabulary can be told apart
+        self.version = 0
+        # Updates are serialised by the write lock; readers use snapshot() and never wait for it
+        self._write_lock = threading.RLock()
+        self._snapshot: Optional[VocabSnapshot] = None
+        self._live_snapshots = weakref.WeakValueDictionary()
+        # Persistence: files go to output_dir, optionally written behind by a background thread
+        self.output_dir = output_dir
+        self.write_behind = write_behind
+        self.save_delay = save_delay
+        self._save_cond = threading.Condition()
+        self._dirty = False
+        self._writing = False
+        self._urgent = False
+        self._closing = False
+        self._save_error: Optional[BaseException] = None
+        self._writer: Optional[threading.Thread] = None
+        if write_behind:
+            self._writer = threading.Thread(target=self._writer_loop, name="vocab-writer", daemon=True)
+            self._writer.start()
+        # n -> n-gram counts keyed by ngram_hash, and their pruned views
+        if approximate and ngrams > 1:
+            raise ValueError("n-gram counting is not available in approximate mode")
+        self.ngrams = ngrams
+        self._ngram_counters: Dict[int, BoundedCounter] = {n: BoundedCounter(max_tracked) for n in range(2, ngrams + 1)}
+        self.ngram_freq: Dict[int, Dict[int, int]] = {n: {} for n in range(2, ngrams + 1)}
+        self.pruned_ngram_count = 0
+        # n-gram key -> term ids, only kept when a resolver is requested
+        self._ngram_terms: Optional[Dict[int, Tuple[int, ...]]] = {} if ngram_resolver else None
+        # Approximate-mode sketches (None in exact mode)
+        self.approximate = approximate
+        self.sketch = CountMinSketch(sketch_epsilon, sketch_delta) if approximate else None
+        self.heavy_hitters = SpaceSaving(top_k) if approximate else None
+        # Near-duplicate filter for add_file; duplicates lists (row of the file, matched doc_id, similarity)
+        # for the last file added
+        if dedup not in (None, "skip", "report"):
+            raise ValueError(f"Unknown dedup mode {dedup!r}, expected 'skip' or 'report'")
+        self.dedup = dedup
+        self.lsh = MinHashLSH(dedup_threshold) if dedup else None
+        self.duplicates: List[Tuple[int, int, float]] = []
         
         # Load stopwords
         self.stopwords = []
-        with open(stopwords_filepath, 'r') as f:
+        with open_input(stopwords_filepath, 'rt') as f:
             for line in f.readlines():
                 w = line.strip().lower()
                 if w:
                     self.stopwords.append(w)
+        self._stopset = frozenset(self.stopwords)
         # Load idx2label mapping
-        with open(idx2label_filepath, 'r') as f:
+        with open_input(idx2label_filepath, 'rt') as f:
             self.idx2label = json.load(f)
-        # Load corpus and add label names using idx2label
-        df = pd.read_csv(corpus_filepath)
+        # Load corpus and add label names using idx2label;
+        # .gz/.bz2/.xz corpora are decompressed by pandas as it parses
+        df = pd.read_csv(corpus_filepath, compression="infer")
         df["label_name"] = df["label"].map(self.idx2label)
-        self.corpus = df
+        self.corpus = self._assign_doc_ids(df)
 
-        # Build vocabulary from the corpus
-        all_text = " ".join(self.corpus["text"].astype(str))
-        self.build_vocab(all_text)
+        # Build vocabulary and inverted index from the corpus rows
+        self._index_rows(self.corpus)
+        if self.lsh is not None:
+            for doc_id, signature in zip(self.corpus["doc_id"], self._row_signatures(self.corpus)):
+                self.lsh.add(int(doc_id), signature)
+        self._rebuild_mappings()
 
     def clean_text(self, text: str) -> list[str]:
         """" 
@@ -61,17 +213,15 @@ class TextProcessor:
         Returns:
             list[str]: A list of cleaned words."""
         text = text.lower()
-        #define common punctuation marks
-        punctuation = ".,!?';:\"()[]{}#%&*/\\-=_+<>$"
         #replace punctuation marks with spaces
-        for p in punctuation:
+        for p in PUNCTUATION:
             text = text.replace(p, ' ')
         #obtain the list by splitting the text by spaces
         words = text.split()
         cleaned_words = []
         for word in words:
             #remove stopwords from the list
-            if word in self.stopwords:
+            if word in self._stopset:
                 continue
             #discard words with length less than 2
             if len(word) < 2:
@@ -90,105 +240,718 @@ class TextProcessor:
         Returns:
             None
         """
+        with self._write_lock:
+            self._build_vocab(text)
+
+    def _build_vocab(self, text: str) -> None:
         # Initialize word frequency dictionary avoid counting from previous data(add_file)
-        self.word_freq = {}
-        words = self.clean_text(text)
-        # Count word frequencies
-        for word in words:
-            if word in self.word_freq:
-                self.word_freq[word] += 1
-            else:
-                self.word_freq[word] = 1
-        # Create word2idx and idx2word mappings
+        self._counts = {}
+        self._evicted = 0
+        self._rank_changes = None
+        # Tokenize line by line with the vectorized path; the token stream equals clean_text(text)
+        tokens = self._tokenize_column(pd.Series(text.splitlines(), dtype=object))
+        words = tokens.tolist()
+        if self.approximate:
+            # Start fresh sketches with the same size and feed them instead of word_freq
+            self.sketch = CountMinSketch(self.sketch.epsilon, self.sketch.delta)
+            self.heavy_hitters = SpaceSaving(self.heavy_hitters.capacity)
+            self._update_sketches(tokens.value_counts().to_dict())
+            self._rebuild_mappings()
+            return
+        # Count word frequencies, evicting the rarest words if max_tracked is exceeded
+        counter = BoundedCounter(self.max_tracked)
+        if self.max_tracked is None:
+            counter.update(tokens.value_counts().to_dict())
+        else:
+            for word in words:
+                counter.add(word)
+        self._counts = counter.counts
+        self._evicted = counter.evicted
+        # n-grams are counted from the same tokens, line by line, so none spans two lines
+        self._ngram_counters = {n: BoundedCounter(self.max_tracked) for n in self._ngram_counters}
+        if self._ngram_counters:
+            for line_words in tokens.groupby(level=0, sort=True).agg(list):
+                self._add_ngrams(line_words)
+        # Create word2idx and idx2word mappings from the pruned vocabulary
+        self._rebuild_mappings()
+
+
+
+    def _assign_doc_ids(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Give every row of a DataFrame a stable document id that survives concat and merge.
+        Args:
+            df (pd.DataFrame): The rows to number.
+        Returns:
+            pd.DataFrame: The same rows with a "doc_id" column.
+        """
+        df["doc_id"] = range(self._next_doc_id, self._next_doc_id + len(df))
+        self._next_doc_id += len(df)
+        return df
+
+    def _term_id(self, word: str) -> int:
+        """Return the stable term id of a word, assigning a new one on first sight."""
+        term_id = self.term2id.get(word)
+        if term_id is None:
+            term_id = len(self.id2term)
+            self.term2id[word] = term_id
+            self.id2term.append(word)
+        return term_id
+
+    def _words_ngrams(self, words: List[str]) -> Dict[int, Dict[int, int]]:
+        """Count the n-grams of one token stream.
+        Args:
+            words (List[str]): Cleaned tokens in text order.
+        Returns:
+            Dict[int, Dict[int, int]]: Mapping of n to the counts of its n-gram keys.
+        """
+        ids = [self._term_id(w) for w in words]
+        grams: Dict[int, Dict[int, int]] = {}
+        for n in self._ngram_counters:
+            counts = grams.setdefault(n, {})
+            for i in range(len(ids) - n + 1):
+                gram = tuple(ids[i:i + n])
+                key = ngram_hash(gram)
+                counts[key] = counts.get(key, 0) + 1
+                if self._ngram_terms is not None:
+                    self._ngram_terms.setdefault(key, gram)
+        return grams
+
+    def _add_ngrams(self, words: List[str]) -> None:
+        """Add the n-grams of one token stream to the n-gram counts."""
+        for n, counts in self._words_ngrams(words).items():
+            self._ngram_counters[n].update(counts)
+
+    def _remove_ngrams(self, words: List[str]) -> None:
+        """Subtract the n-grams of one token stream from the n-gram counts."""
+        for n, counts in self._words_ngrams(words).items():
+            self._ngram_counters[n].subtract(counts)
+
+    def _update_sketches(self, counts: Dict[str, int]) -> None:
+        """Add a batch of word counts (negative to remove) to the approximate-mode sketches."""
+        self.sketch.update(counts)
+        self.heavy_hitters.update(counts)
+
+    def _sketch_rows(self, df: pd.DataFrame, sign: int = 1) -> None:
+        """Add (sign=1) or remove (sign=-1) the word counts of corpus rows in approximate mode.
+        Counts are aggregated in batches of at most 100000 distinct words before each sketch update.
+        Args:
+            df (pd.DataFrame): Rows with a "text" column.
+            sign (int, optional): 1 to add the rows, -1 to remove them. Defaults to 1.
+        Returns:
+            None
+        """
+        for start in range(0, len(df), _ROW_BATCH):
+            tokens = self._tokenize_column(df["text"].iloc[start:start + _ROW_BATCH])
+            counts = tokens.value_counts()
+            self._update_sketches((counts * sign).to_dict())
+
+    def _tokenize_column(self, texts: pd.Series) -> pd.Series:
+        """Apply clean_text to a whole column with pandas string methods.
+
+        The column is converted to object dtype first: on the default string dtype, pandas can run
+        lower() and isalpha() as Arrow kernels, whose Unicode rules differ from Python's str methods
+        (e.g. for "İ" or final sigma), and the tokens would no longer match clean_text.
+        Args:
+            texts (pd.Series): The texts to tokenize.
+        Returns:
+            pd.Series: One token per entry in text order, indexed by the position of its row in texts.
+        """
+        texts = texts.reset_index(drop=True).map(str).astype(object)
+        cleaned = texts.str.lower().str.replace(_PUNCT_RE, " ", regex=True)
+        # explode() infers the default string dtype again, so the tokens are converted back
+        tokens = cleaned.str.split().explode().dropna().astype(object)
+        if tokens.empty:
+            return tokens
+        # Vectorized masks for the stopword, length and alphabetic rules
+        keep = ~tokens.isin(self._stopset) & (tokens.str.len() >= 2) & tokens.str.isalpha()
+        return tokens[keep.astype(bool)]
+
+    def _row_signatures(self, df: pd.DataFrame) -> List[Optional[np.ndarray]]:
+        """Return the MinHash signature of the cleaned tokens of every row (None for rows without tokens)."""
+        signatures = []
+        for start in range(0, len(df), _ROW_BATCH):
+            texts = df["text"].iloc[start:start + _ROW_BATCH]
+            rows = self._tokenize_column(texts).groupby(level=0).agg(list)
+            signatures.extend(self.lsh.signature(rows.get(i, [])) for i in range(len(texts)))
+        return signatures
+
+    def _filter_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Look every new row up in the LSH index, record the near-duplicates and index the rows kept.
+        Each lookup only compares against rows sharing an LSH bucket, so it does not grow with the corpus.
+        Args:
+            df (pd.DataFrame): New rows with "doc_id" and "text" columns.
+        Returns:
+            pd.DataFrame: The rows to add: all of them in "report" mode, the non-duplicates in "skip" mode.
+        """
+        self.duplicates = []
+        keep = np.ones(len(df), dtype=bool)
+        for i, (doc_id, signature) in enumerate(zip(df["doc_id"], self._row_signatures(df))):
+            matches = self.lsh.query(signature)
+            if matches:
+                self.duplicates.append((i, int(matches[0][0]), matches[0][1]))
+                if self.dedup == "skip":
+                    keep[i] = False
+                    continue
+            self.lsh.add(int(doc_id), signature)
+        return df[keep]
+
+    def _index_rows(self, df: pd.DataFrame) -> None:
+        """Add corpus rows to the inverted index and their word counts to the vocabulary.
+        In approximate mode the counts go to the sketches instead.
+        Args:
+            df (pd.DataFrame): Rows with "doc_id", "label" and "text" columns.
+        Returns:
+            None
+        """
+        if self.approximate:
+            self._sketch_rows(df)
+            return
+        for start in range(0, len(df), _ROW_BATCH):
+            self._index_batch(df.iloc[start:start + _ROW_BATCH])
+
+    def _index_batch(self, df: pd.DataFrame) -> None:
+        """Index one batch of rows: tokenize the text column once, then count per row with groupby."""
+        tokens = self._tokenize_column(df["text"])
+        # New words get term ids in order of first appearance, as with row-by-row indexing
+        for word in pd.unique(tokens.to_numpy()):
+            self._term_id(word)
+        rows = tokens.index.to_numpy()
+        term_ids = tokens.map(self.term2id).to_numpy(dtype=np.int64)
+        # Per-row term counts, sorted by row, become the index's forward entries (reused by deletes)
+        per_row = pd.DataFrame({"row": rows, "term": term_ids}).groupby(["row", "term"]).size()
+        row_of = per_row.index.get_level_values(0).to_numpy()
+        terms = per_row.index.get_level_values(1).tolist()
+        tfs = per_row.tolist()
+        bounds = np.searchsorted(row_of, np.arange(len(df) + 1))
+        for i, (doc_id, label) in enumerate(zip(df["doc_id"], df["label"])):
+            lo, hi = bounds[i], bounds[i + 1]
+            self.index.add_document(doc_id, dict(zip(terms[lo:hi], tfs[lo:hi])), label)
+        for word, count in tokens.value_counts().items():
+            self._add_count(word, int(count))
+        if self._ngram_counters:
+            # n-grams need each row's tokens in order
+            for words in tokens.groupby(level=0, sort=True).agg(list):
+                self._add_ngrams(words)
+
+    def _unindex_rows(self, doc_ids) -> None:
+        """Remove documents from the inverted index and subtract their word counts from the vocabulary.
+        Args:
+            doc_ids: The ids of the documents to remove.
+        Returns:
+            None
+        """
+        # One batch removal re-encodes every affected posting list once
+        for term_id, tf in self.index.remove_documents(int(d) for d in doc_ids).items():
+            self._add_count(self.id2term[term_id], -tf)
+
+    def _add_count(self, word: str, delta: int) -> None:
+        """Change the count of a word, dropping it at zero and noting the change for the rank index.
+
+        With max_tracked set, a new word that takes the vocabulary over the bound triggers an eviction.
+        """
+        old = self._counts.get(word, 0)
+        if self._rank_changes is not None:
+            self._rank_changes.setdefault(word, old)
+        if old + delta > 0:
+            self._counts[word] = old + delta
+            if not old:
+                self._bound_counts()
+        else:
+            self._counts.pop(word, None)
+
+    def _bound_counts(self) -> None:
+        """Evict the least frequent half of the counted words once there are more than max_tracked,
+        as BoundedCounter does while build_vocab counts."""
+        if self.max_tracked is None or len(self._counts) <= self.max_tracked:
+            return
+        self._counts, evicted = prune_counts(self._counts, max_vocab_size=self.max_tracked // 2)
+        self._evicted += evicted
+        # Evicted words change rank too, so the rank index is rebuilt
+        self._rank_changes = None
+
+    def _rebuild_mappings(self) -> None:
+        """Prune the exact counts into self.word_freq and rebuild word2idx and idx2word from its keys.
+
+        Pruned words keep their exact counts, so a word that becomes frequent enough later comes back.
+        Words evicted by max_tracked while counting are added to the pruned total. The totals are left
+        in self.pruned_count and self.pruned_ngram_count for the caller to report.
+        Returns:
+            None
+        """
+        self.word_freq, pruned = prune_counts(self._counts, self.min_count, self.max_vocab_size)
+        self.pruned_count = pruned + self._evicted
+        self.pruned_ngram_count = 0
+        for n, counter in self._ngram_counters.items():
+            self.ngram_freq[n], pruned = prune_counts(counter.counts, self.min_count, self.max_vocab_size)
+            self.pruned_ngram_count += pruned + counter.evicted
+        if self._ngram_terms is not None:
+            # Forget the text of n-grams that are no longer counted at all
+            live = [counter.counts for counter in self._ngram_counters.values()]
+            self._ngram_terms = {k: g for k, g in self._ngram_terms.items() if any(k in c for c in live)}
+        # Words move between rank buckets only if their count changed; pruning can change the whole view
+        if self._rank_changes is not None and self.word_freq is self._counts:
+            self.ranks.update(self.word_freq, self._rank_changes)
+        else:
+            self.ranks.rebuild(self.word_freq)
+        self._rank_changes = {}
         sorted_words = sorted(self.word_freq.keys())
         self.word2idx = {word: idx for idx, word in enumerate(sorted_words)}
         self.idx2word = {idx: word for word, idx in self.word2idx.items()}
+        self._publish_snapshot()
+
+    def _publish_snapshot(self) -> None:
+        """Bump the version and publish an immutable snapshot of the current vocabulary.
+
+        The new snapshot replaces the old one with a single reference assignment, so a reader sees
+        either the old or the new version, never a mix; the old one is freed with its last reader.
+        """
+        self.version += 1
+        if self.approximate:
+            # The snapshot answers from a copy of the sketch and the refined heavy hitters
+            candidates = self.heavy_hitters.top(self.heavy_hitters.capacity)
+            estimates = self.sketch.estimate_many([w for w, _ in candidates])
+            top_words = sorted(((w, min(c, int(e))) for (w, c), e in zip(candidates, estimates)),
+                               key=lambda item: (-item[1], item[0]))
+            sketch, top_10, last_10 = self.sketch.copy(), top_words[:10], None
+        else:
+            top_words, sketch = None, None
+            top_10, last_10 = self.ranks.words_in_ranks(1, 10), self.ranks.lowest(10)
+        snapshot = VocabSnapshot(self.version, self.word_freq, self.word2idx, self.idx2word, top_10, last_10,
+                                 sketch=sketch, top_words=top_words, index=self.index.freeze(),
+                                 corpus=self.corpus, term2id=self.term2id, ngram_freq=self.ngram_freq)
+        self._live_snapshots[snapshot.version] = snapshot
+        self._snapshot = snapshot
 
+    def snapshot(self) -> VocabSnapshot:
+        """
+        Return the latest published vocabulary snapshot.
+        It never changes, so readers in other threads can query it while an update is running.
+        Returns:
+            VocabSnapshot: The current snapshot.
+        """
+        return self._snapshot
 
+    def live_versions(self) -> list[int]:
+        """
+        Return the versions whose snapshots are still referenced by a reader (or are current).
+        Returns:
+            list[int]: The live versions in ascending order.
+        """
+        return sorted(self._live_snapshots.keys())
 
     def add_file(self, add_file_path: str) -> None:
         """ Add a new text file to the corpus, update the vocabulary and mappings accordingly.
         Args:
-            add_file_path (str): The path to the text file to be added.
+            add_file_path (str): The path to the text file to be added (optionally .gz/.bz2/.xz compressed).
         Returns:
             None
         """
-        df = pd.read_csv(add_file_path)
-        df["label_name"] = df["label"].map(self.idx2label)
-        # Concat the new data to the existing corpus
-        self.corpus = pd.concat([self.corpus, df], ignore_index=True)
-        # Rebuild vocabulary with the updated corpus
-        all_text = " ".join(self.corpus["text"].astype(str))
-        self.build_vocab(all_text)
-        self.save()
+        with self._write_lock:
+            df = pd.read_csv(add_file_path, compression="infer")
+            df["label_name"] = df["label"].map(self.idx2label)
+            df = self._assign_doc_ids(df)
+            if self.lsh is not None:
+                df = self._filter_duplicates(df)
+            # Concat the new data to the existing corpus
+            self.corpus = pd.concat([self.corpus, df], ignore_index=True)
+            # Only the new rows are tokenized; their counts are added to the existing vocabulary
+            self._index_rows(df)
+            self._rebuild_mappings()
+            self.save()
 
     def delete_file(self, delete_file_path) -> None:
         """
         Delete a file to the corpus, update the vocabulary and mappings accordingly.
         Args:
-            delete_file_path (str): The path to the text file to be deleted.
+            delete_file_path (str): The path to the text file to be deleted (optionally .gz/.bz2/.xz compressed).
         Returns:
             None
         """
-        df_to_delete = pd.read_csv(delete_file_path)
-        df_to_delete["label_name"] = df_to_delete["label"].map(self.idx2label)
-
-        # Left join corpus with df_to_delete to find rows to remove;
-        # indicator=True adds a special column "_merge" to show the source of each row
-        merged = self.corpus.merge(
-            df_to_delete[['label', 'text']],
-            on=['label', 'text'],
-            how='left',
-            indicator=True)
-        # Keep only rows that are in corpus but not in df_to_delete
-        self.corpus = merged[merged['_merge'] == 'left_only'].drop(columns=['_merge'])
-        # Rebuild vocabulary with the updated corpus
-        all_text = " ".join(self.corpus["text"].astype(str))
-        self.build_vocab(all_text)
-        self.save()
+        with self._write_lock:
+            df_to_delete = pd.read_csv(delete_file_path, compression="infer")
+            df_to_delete["label_name"] = df_to_delete["label"].map(self.idx2label)
+
+            # Left join corpus with df_to_delete to find rows to remove;
+            # indicator=True adds a special column "_merge" to show the source of each row
+            merged = self.corpus.merge(
+                df_to_delete[['label', 'text']],
+                on=['label', 'text'],
+                how='left',
+                indicator=True)
+            removed = merged[merged['_merge'] == 'both'].drop_duplicates('doc_id')
+            if self.lsh is not None:
+                for doc_id in removed['doc_id']:
+                    self.lsh.remove(int(doc_id))
+            if self.approximate:
+                self._sketch_rows(removed, sign=-1)
+            else:
+                # Subtract the counts of the matched rows using the index's per-document term counts
+                self._unindex_rows(removed['doc_id'])
+                # Word order is not kept in the index, so n-grams come from re-tokenizing the removed rows
+                if self._ngram_counters:
+                    for text in removed["text"].astype(str):
+                        self._remove_ngrams(self.clean_text(text))
+            # Keep only rows that are in corpus but not in df_to_delete
+            self.corpus = merged[merged['_merge'] == 'left_only'].drop(columns=['_merge'])
+            self._rebuild_mappings()
+            self.save()
+
+    def _resolve_label(self, label):
+        """Translate a label name (e.g. "Sports") to its label index; other values pass through."""
+        if isinstance(label, str):
+            for idx, name in self.idx2label.items():
+                if name == label:
+                    return int(idx)
+        return label
+
+    def _query_terms(self, query: str, snap: VocabSnapshot) -> List[Optional[int]]:
+        """Clean a query string and map its words to term ids (None for unseen words)."""
+        return [snap.term2id.get(word) for word in self.clean_text(query)]
+
+    def search(self, query: str, mode: str = "and", label=None, snapshot: Optional[VocabSnapshot] = None) -> pd.DataFrame:
+        """
+        Find the corpus rows matching a boolean query using the inverted index.
+        Args:
+            query (str): The query text; it is cleaned with the same rules as the corpus.
+            mode (str, optional): "and" to require every query word, "or" for any of them. Defaults to "and".
+            label (optional): Only return rows with this label index or label name. Defaults to None.
+            snapshot (Optional[VocabSnapshot], optional): The version to search. Defaults to None (the latest).
+        Returns:
+            pd.DataFrame: The matching corpus rows.
+        """
+        snap = snapshot or self.snapshot()
+        terms = self._query_terms(query, snap)
+        label = self._resolve_label(label)
+        if mode == "and":
+            doc_ids = [] if None in terms else snap.index.search_and(terms, label)
+        elif mode == "or":
+            doc_ids = snap.index.search_or([t for t in terms if t is not None], label)
+        else:
+            raise ValueError(f"Unknown search mode: {mode}")
+        return snap.corpus[snap.corpus["doc_id"].isin(doc_ids)]
+
+    def rank(self, query: str, k: int = 10, label=None, snapshot: Optional[VocabSnapshot] = None) -> pd.DataFrame:
+        """
+        Return the top-k corpus rows for a query ranked by BM25.
+        Args:
+            query (str): The query text; it is cleaned with the same rules as the corpus.
+            k (int, optional): The number of rows to return. Defaults to 10.
+            label (optional): Only rank rows with this label index or label name. Defaults to None.
+            snapshot (Optional[VocabSnapshot], optional): The version to rank. Defaults to None (the latest).
+        Returns:
+            pd.DataFrame: The best matching rows, best first, with a "score" column.
+        """
+        snap = snapshot or self.snapshot()
+        terms = [t for t in self._query_terms(query, snap) if t is not None]
+        scores = dict(snap.index.bm25(terms, k, self._resolve_label(label)))
+        rows = snap.corpus[snap.corpus["doc_id"].isin(scores.keys())]
+        rows = rows.assign(score=rows["doc_id"].map(scores))
+        return rows.sort_values(["score", "doc_id"], ascending=[False, True])
+
+    def frequency(self, word: str) -> int:
+        """
+        Return the frequency of a word: exact, or the Count-Min estimate in approximate mode.
+        Args:
+            word (str): The word to look up.
+        Returns:
+            int: The frequency (an estimate is never below the true count).
+        """
+        return self.snapshot().frequency(word)
+
+    def most_common(self, k: int = 10) -> list[tuple[str, int]]:
+        """
+        Return the k most frequent words, ties broken alphabetically.
+        In approximate mode they come from the heavy-hitter summary, each with the smaller of its
+        Space-Saving count and Count-Min estimate (both only ever overestimate).
+        Args:
+            k (int, optional): The number of words to return. Defaults to 10.
+        Returns:
+            list[tuple[str, int]]: (word, frequency) pairs, most frequent first.
+        """
+        return self.snapshot().most_common(k)
+
+    def word_rank(self, word: str) -> Optional[int]:
+        """
+        Return the frequency rank of a word (1 = most frequent; tied words share a rank).
+        Args:
+            word (str): The word to look up.
+        Returns:
+            Optional[int]: The rank, or None if the word is not in the vocabulary.
+        """
+        return self.snapshot().word_rank(word)
+
+    def word_percentile(self, word: str) -> Optional[float]:
+        """
+        Return the percentage of vocabulary words whose frequency is at most this word's.
+        Args:
+            word (str): The word to look up.
+        Returns:
+            Optional[float]: The percentile, or None if the word is not in the vocabulary.
+        """
+        return self.snapshot().word_percentile(word)
+
+    def count_at_least(self, freq: int) -> int:
+        """
+        Return how many vocabulary words have frequency >= freq.
+        Args:
+            freq (int): The frequency threshold.
+        Returns:
+            int: The number of words.
+        """
+        return self.snapshot().count_at_least(freq)
+
+    def words_in_ranks(self, first: int, last: int) -> list[tuple[str, int]]:
+        """
+        Return the words at rank positions first..last (1-based, inclusive), ties broken alphabetically.
+        Args:
+            first (int): The first position.
+            last (int): The last position.
+        Returns:
+            list[tuple[str, int]]: (word, frequency) pairs.
+        """
+        return self.snapshot().words_in_ranks(first, last)
+
+    def ngram_key(self, words) -> Optional[int]:
+        """
+        Return the key of an n-gram given as words.
+        Args:
+            words (str | list[str]): The n-gram as a space-separated string or a list of words.
+        Returns:
+            Optional[int]: The 64-bit key, or None if a word has never been seen.
+        """
+        if isinstance(words, str):
+            words = words.lower().split()
+        term_ids = [self.term2id.get(w) for w in words]
+        if any(t is None for t in term_ids):
+            return None
+        return ngram_hash(term_ids)
+
+    def ngram_frequency(self, words) -> int:
+        """
+        Return the frequency of an n-gram, e.g. tp.ngram_frequency("oil prices").
+        Args:
+            words (str | list[str]): The n-gram as a space-separated string or a list of words.
+        Returns:
+            int: The frequency (0 if the n-gram was never seen or was pruned).
+        """
+        if isinstance(words, str):
+            words = words.lower().split()
+        key = self.ngram_key(words)
+        if key is None:
+            return 0
+        return self.snapshot().ngram_freq.get(len(words), {}).get(key, 0)
+
+    def resolve_ngram(self, key: int) -> Optional[str]:
+        """
+        Turn an n-gram key back into text (requires ngram_resolver=True).
+        Args:
+            key (int): An n-gram key.
+        Returns:
+            Optional[str]: The space-separated words, or None if the key is unknown.
+        """
+        if self._ngram_terms is None:
+            raise ValueError("Create the TextProcessor with ngram_resolver=True to resolve n-gram keys")
+        gram = self._ngram_terms.get(key)
+        return " ".join(self.id2term[t] for t in gram) if gram is not None else None
+
+    def most_common_ngrams(self, n: int = 2, k: int = 10) -> list[tuple[int, int]]:
+        """
+        Return the k most frequent n-grams of order n.
+        Args:
+            n (int, optional): The n-gram order. Defaults to 2.
+            k (int, optional): The number of n-grams to return. Defaults to 10.
+        Returns:
+            list[tuple[int, int]]: (key, frequency) pairs, most frequent first; use resolve_ngram() for text.
+        """
+        freq = self.snapshot().ngram_freq.get(n, {})
+        return heapq.nsmallest(k, freq.items(), key=lambda item: (-item[1], item[0]))
+
+    def error_bounds(self) -> Dict[str, float]:
+        """
+        Return the current error bounds of approximate mode (all 0 in exact mode).
+        Returns:
+            Dict[str, float]: "frequency": additive Count-Min error holding with probability 1 - delta;
+            "top_k": the largest possible overestimate of a heavy-hitter count.
+        """
+        if not self.approximate:
+            return {"frequency": 0.0, "top_k": 0.0}
+        return {"frequency": self.sketch.error_bound(), "top_k": self.heavy_hitters.error_bound()}
+
+    def merge_sketches(self, sketch_filepath: str) -> None:
+        """
+        Merge sketches saved by another approximate-mode run into this processor's sketches.
+        Args:
+            sketch_filepath (str): A file written by save() in approximate mode.
+        Returns:
+            None
+        """
+        with self._write_lock:
+            cms, heavy = load_sketches(sketch_filepath)
+            self.sketch.merge(cms)
+            self.heavy_hitters.merge(heavy)
+            self._publish_snapshot()
+
+    def _path(self, filename: str) -> str:
+        """Return the path of a vocabulary file in the output directory."""
+        return os.path.join(self.output_dir, filename)
 
     def load(self) -> None:
         """ 
-        Load vocabulary from the saved files (word_freq.txt, word2idx.txt, idx2word.txt).
+        Load vocabulary from the saved files (word_freq.txt, word2idx.txt, idx2word.txt) in the output directory.
         Returns:
             None"""
-        self.word_freq = {}
-        with open("word_freq.txt", 'r', encoding='utf-8') as f:
-            for line in f.readlines():
-                word, freq = line.strip().split(",")
-                self.word_freq[word] = int(freq)
-        # Load word2idx file
-        self.word2idx = {}
-        with open("word2idx.txt", 'r', encoding='utf-8') as f:
-            for line in f.readlines():
-                word, idx = line.strip().split(",")
-                self.word2idx[word] = int(idx)
-        # Load idx2word file
-        self.idx2word = {}
-        with open("idx2word.txt", 'r', encoding='utf-8') as f:
-            for line in f.readlines():
-                idx, word = line.strip().split(",")
-                self.idx2word[int(idx)] = word
+        with self._write_lock:
+            self.word_freq = {}
+            with open(self._path("word_freq.txt"), 'r', encoding='utf-8') as f:
+                for line in f.readlines():
+                    word, freq = line.strip().split(",")
+                    self.word_freq[word] = int(freq)
+            # Load word2idx file
+            self.word2idx = {}
+            with open(self._path("word2idx.txt"), 'r', encoding='utf-8') as f:
+                for line in f.readlines():
+                    word, idx = line.strip().split(",")
+                    self.word2idx[word] = int(idx)
+            # Load idx2word file
+            self.idx2word = {}
+            with open(self._path("idx2word.txt"), 'r', encoding='utf-8') as f:
+                for line in f.readlines():
+                    idx, word = line.strip().split(",")
+                    self.idx2word[int(idx)] = word
+            self._counts = self.word_freq
+            self._evicted = 0
+            self.ranks.rebuild(self.word_freq)
+            self._rank_changes = {}
+            self._publish_snapshot()
         
 
     def save(self) -> None:
         """ 
-        Save the current vocabulary to files (word_freq.txt, word2idx.txt, idx2word.txt).
+        Save the current vocabulary to files (word_freq.txt, word2idx.txt, idx2word.txt) in the output directory.
+        In approximate mode the sketches are saved to vocab_sketch.npz instead.
+        With write_behind the save is only scheduled; flush() waits for it.
         Returns:
             None"""
+        if not self.write_behind:
+            self._write_files()
+            return
+        with self._save_cond:
+            self._dirty = True
+            self._save_cond.notify_all()
+
+    def flush(self) -> None:
+        """
+        Write any pending save now and wait until it is on disk (no-op without write_behind).
+        Returns:
+            None
+        """
+        if self._writer is None:
+            return
+        with self._save_cond:
+            self._urgent = True
+            self._save_cond.notify_all()
+            while self._dirty or self._writing:
+                self._save_cond.wait()
+            self._urgent = False
+            error, self._save_error = self._save_error, None
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """
+        Flush pending saves and stop the background writer.
+        Returns:
+            None
+        """
+        if self._writer is None:
+            return
+        self.flush()
+        with self._save_cond:
+            self._closing = True
+            self._save_cond.notify_all()
+        self._writer.join()
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _writer_loop(self) -> None:
+        """Background writer: wait for a save request, let the burst settle, then write once."""
+        while True:
+            with self._save_cond:
+                while not self._dirty and not self._closing:
+                    self._save_cond.wait()
+                if not self._dirty:
+                    return
+                # Updates arriving during the delay are coalesced into this save
+                deadline = time.monotonic() + self.save_delay
+                while not self._urgent and not self._closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._save_cond.wait(remaining)
+                self._dirty = False
+                self._writing = True
+            try:
+                self._write_files()
+            except Exception as e:  # reported by the next flush()
+                self._save_error = e
+            finally:
+                with self._save_cond:
+                    self._writing = False
+                    self._save_cond.notify_all()
+
+    def _atomic_write(self, filename: str, lines) -> None:
+        """Write lines to a temporary file next to the target and rename it into place.
+        Args:
+            filename (str): The file name inside the output directory.
+            lines: Iterable of lines (with newlines) to write.
+        Returns:
+            None
+        """
+        fd, tmp_path = tempfile.mkstemp(prefix="." + filename, dir=self.output_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path(filename))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _write_files(self) -> None:
+        """Write the vocabulary files; every file is replaced atomically."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.approximate:
+            # The sketches are live objects, so they are written while updates are held off
+            with self._write_lock:
+                fd, tmp_path = tempfile.mkstemp(prefix=".vocab_sketch", suffix=".npz", dir=self.output_dir)
+                os.close(fd)
+                save_sketches(tmp_path, self.sketch, self.heavy_hitters)
+                os.replace(tmp_path, self._path("vocab_sketch.npz"))
+            return
+        # The snapshot never changes, so the word files are written without holding the write lock
+        snap = self.snapshot()
         # Save word-frequency file
-        with open("word_freq.txt", 'w', encoding='utf-8') as f:
-            sorted_freq = sorted(self.word_freq.items(), key=lambda item: (-item[1], item[0]))
-            for word, freq in sorted_freq:
-                f.write(f"{word},{freq}\n")
+        sorted_freq = sorted(snap.word_freq.items(), key=lambda item: (-item[1], item[0]))
+        self._atomic_write("word_freq.txt", (f"{word},{freq}\n" for word, freq in sorted_freq))
         # Save word to index file
-        with open("word2idx.txt", 'w', encoding='utf-8') as f:
-            for word, idx in sorted(self.word2idx.items()):
-                f.write(f"{word},{idx}\n")
+        self._atomic_write("word2idx.txt", (f"{word},{idx}\n" for word, idx in sorted(snap.word2idx.items())))
         # Save index to word file
-        with open("idx2word.txt", 'w', encoding='utf-8') as f:
-            for idx, word in sorted(self.idx2word.items()):
-                f.write(f"{idx},{word}\n")
+        self._atomic_write("idx2word.txt", (f"{idx},{word}\n" for idx, word in sorted(snap.idx2word.items())))
+        # Save n-gram file: order, key, frequency and the text when a resolver is kept
+        if self.ngram_freq:
+            with self._write_lock:
+                lines = []
+                for n, freq in self.ngram_freq.items():
+                    for key, count in sorted(freq.items(), key=lambda item: (-item[1], item[0])):
+                        text = self.resolve_ngram(key) if self._ngram_terms is not None else ""
+                        lines.append(f"{n},{key},{count},{text}\n")
+            self._atomic_write("ngram_freq.txt", lines)
 
 
 if __name__ == "__main__":
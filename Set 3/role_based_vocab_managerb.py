@@ -1,6 +1,6 @@
 from typing import Optional
 import os
-from task7 import TextProcessor
+from role_based_vocab_manager import TextProcessor
 
 
 class Role:
@@ -37,16 +37,28 @@ class RoleBasedVocabSys:
         users_info,
         stopwords_filepath = "data/stop_words_english.txt",
         corpus_filepath = "data/ag_news_test.csv",
-        idx2label_filepath = "data/idx2label.json"
+        idx2label_filepath = "data/idx2label.json",
+        text_processor: Optional[TextProcessor] = None
         ):
-        
+        """
+        Args:
+            users_info (dict): Account name -> {"role", "password", "name"}.
+            stopwords_filepath (str): Path to the stopwords file.
+            corpus_filepath (str): Path to the corpus file.
+            idx2label_filepath (str): Path to the index-to-label mapping file.
+            text_processor (Optional[TextProcessor]): A processor shared with other sessions; readers
+                query its snapshots and admin updates publish new ones. Defaults to None (load a new one).
+        """
         # The provided users information    
         self.users_info = users_info
 
-        self.text_processor = TextProcessor(
-            stopwords_filepath = stopwords_filepath,
-            corpus_filepath = corpus_filepath,
-            idx2label_filepath = idx2label_filepath)
+        self.text_processor = text_processor
+        if text_processor is None:
+            self.text_processor = TextProcessor(
+                stopwords_filepath = stopwords_filepath,
+                corpus_filepath = corpus_filepath,
+                idx2label_filepath = idx2label_filepath)
+            self.report_pruning()
         
         # The current logged-in user information (None if no user is logged in)
         self.current_user : Optional[Role] = None
@@ -71,6 +83,10 @@ class RoleBasedVocabSys:
         """
         path = self.prompt_existing_path()
         self.text_processor.add_file(path)  
+        if self.text_processor.dedup:
+            action = "Skipped" if self.text_processor.dedup == "skip" else "Found"
+            print(f"{action} {len(self.text_processor.duplicates)} near-duplicate rows")
+        self.report_pruning()
         print("done.")
 
     def update_vocab_delete(self):
@@ -79,15 +95,24 @@ class RoleBasedVocabSys:
         """
         path = self.prompt_existing_path()
         self.text_processor.delete_file(path) 
+        self.report_pruning()
         print("done.")
 
+    def report_pruning(self):
+        """
+        Print how many tokens and n-grams the last vocabulary rebuild pruned, if any.
+        """
+        tp = self.text_processor
+        if tp.pruned_count or tp.pruned_ngram_count:
+            print(f"Pruned {tp.pruned_count} tokens and {tp.pruned_ngram_count} n-grams "
+                  f"(min_count={tp.min_count}, max_vocab_size={tp.max_vocab_size})")
+
     def top_10_frequency(self):
         """
         Display the top 10 most frequent vocabulary words with their counts.
         """
-        sorted_vocab = sorted(self.text_processor.word_freq.items(), 
-                              key=lambda item: (-item[1], item[0]))
-        top_10 = sorted_vocab[:10]
+        # Read from the published snapshot, which an admin update in another session never modifies
+        top_10 = self.text_processor.snapshot().top_10
         print("========================================")
         for word, freq in top_10:
             print(f"{word} {freq}")
@@ -98,9 +123,11 @@ class RoleBasedVocabSys:
         """
         Display the 10 least frequent vocabulary words with their counts.
         """
-        bottom_vocab = sorted(self.text_processor.word_freq.items(), 
-                              key=lambda item: (item[1], item[0]))
-        last_10 = bottom_vocab[:10]
+        last_10 = self.text_processor.snapshot().last_10
+        if last_10 is None:
+            # The sketches only track the most frequent words
+            print("Least frequent words are not available in approximate mode.")
+            return
         print("========================================")
         for word, freq in last_10:
             print(f"{word} {freq}")
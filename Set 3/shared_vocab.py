@@ -0,0 +1,226 @@
+from collections.abc import Mapping
+from multiprocessing import resource_tracker, shared_memory
+from typing import Iterator, List, Optional
+import zlib
+
+import numpy as np
+
+_MAGIC = 0x564F434142  # "VOCAB"
+_HEADER_FIELDS = 8  # magic, n_words, n_slots, string bytes, stopword bytes, vocabulary version, 2 spare
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing block without letting this process's resource tracker unlink it on exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 has no track argument: skip the registration instead
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedVocabulary:
+    """
+    A TextProcessor vocabulary published into one multiprocessing.shared_memory block.
+
+    Layout (all integers int64): a header, the offsets of every word in the string table, the word
+    frequencies, and an open-addressing hash table of word indexes (-1 = empty slot, crc32 of the
+    UTF-8 word, linear probing), followed by the UTF-8 string table and the newline-joined stopwords.
+    Words are stored in alphabetical order, so a word's index is its word2idx id.
+
+    The publishing process owns the block: call unlink() when no worker needs it any more.
+    Workers attach by name with SharedVocabView.
+    """
+    def __init__(self, text_processor, name: Optional[str] = None) -> None:
+        """Copy the vocabulary of a TextProcessor into a new shared memory block.
+
+        Args:
+            text_processor (TextProcessor): The processor whose word_freq and stopwords are published.
+            name (Optional[str], optional): Name of the block. Defaults to None (a random name).
+        Returns:
+            None
+        """
+        if getattr(text_processor, "approximate", False):
+            raise ValueError("An approximate-mode vocabulary has no word_freq to publish")
+        words = sorted(text_processor.word_freq)
+        encoded = [w.encode('utf-8') for w in words]
+        offsets = np.zeros(len(words) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        freqs = np.array([text_processor.word_freq[w] for w in words], dtype=np.int64)
+        strings = b"".join(encoded)
+        stopwords = "\n".join(text_processor.stopwords).encode('utf-8')
+
+        # Power-of-two table at most half full
+        n_slots = 1
+        while n_slots < 2 * len(words):
+            n_slots *= 2
+        slots = np.full(n_slots, -1, dtype=np.int64)
+        mask = n_slots - 1
+        for idx, key in enumerate(encoded):
+            i = zlib.crc32(key) & mask
+            while slots[i] >= 0:
+                i = (i + 1) & mask
+            slots[i] = idx
+
+        header = np.array([_MAGIC, len(words), n_slots, len(strings), len(stopwords),
+                           getattr(text_processor, "version", 0), 0, 0], dtype=np.int64)
+        parts = [header.tobytes(), offsets.tobytes(), freqs.tobytes(), slots.tobytes(), strings, stopwords]
+        size = sum(len(p) for p in parts)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+        pos = 0
+        for part in parts:
+            self.shm.buf[pos:pos + len(part)] = part
+            pos += len(part)
+        self.name = self.shm.name
+        self.nbytes = size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+        self.unlink()
+
+    def close(self) -> None:
+        """Close the publisher's mapping (the block stays available to workers)."""
+        self.shm.close()
+
+    def unlink(self) -> None:
+        """Destroy the block once every worker has detached."""
+        self.shm.unlink()
+
+
+class SharedVocabView(Mapping):
+    """
+    Zero-copy, read-only access to a published vocabulary from any process.
+
+    The view is a Mapping of word -> frequency and also offers the parts of the TextProcessor
+    interface EssayScorer reads (stopwords, frequency(), version), so a scoring worker can use
+    it in place of its own TextProcessor.
+    """
+    def __init__(self, name: str) -> None:
+        """Attach to a block created by SharedVocabulary.
+
+        Args:
+            name (str): The block name (SharedVocabulary.name).
+        Returns:
+            None
+        """
+        self._shm = _attach(name)
+        buf = self._shm.buf
+        header = buf[:8 * _HEADER_FIELDS].cast('q')
+        if header[0] != _MAGIC:
+            self._shm.close()
+            raise ValueError(f"Shared memory block {name!r} does not hold a vocabulary")
+        n_words, n_slots, n_strings, n_stop, self.version = header[1], header[2], header[3], header[4], header[5]
+        header.release()
+
+        pos = 8 * _HEADER_FIELDS
+        self._offsets = buf[pos:pos + 8 * (n_words + 1)].cast('q')
+        pos += 8 * (n_words + 1)
+        self._freqs = buf[pos:pos + 8 * n_words].cast('q')
+        pos += 8 * n_words
+        self._slots = buf[pos:pos + 8 * n_slots].cast('q')
+        pos += 8 * n_slots
+        self._strings = buf[pos:pos + n_strings]
+        pos += n_strings
+        stop_blob = bytes(buf[pos:pos + n_stop])
+        self._n_words = n_words
+        self._mask = n_slots - 1
+        # The stopword list is small, so each process keeps its own list of it
+        self.stopwords: List[str] = stop_blob.decode('utf-8').split("\n") if stop_blob else []
+
+    def close(self) -> None:
+        """Detach from the block."""
+        for view in (self._offsets, self._freqs, self._slots, self._strings):
+            view.release()
+        self._shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def word_index(self, word: str) -> int:
+        """Return the word2idx id of a word, or -1 if it is not in the vocabulary."""
+        if self._n_words == 0:
+            return -1
+        key = word.encode('utf-8')
+        i = zlib.crc32(key) & self._mask
+        while True:
+            idx = self._slots[i]
+            if idx < 0:
+                return -1
+            if self._strings[self._offsets[idx]:self._offsets[idx + 1]] == key:
+                return idx
+            i = (i + 1) & self._mask
+
+    def word_at(self, idx: int) -> str:
+        """Return the word with a given word2idx id (idx2word)."""
+        if not 0 <= idx < self._n_words:
+            raise IndexError(idx)
+        return bytes(self._strings[self._offsets[idx]:self._offsets[idx + 1]]).decode('utf-8')
+
+    def __getitem__(self, word: str) -> int:
+        idx = self.word_index(word)
+        if idx < 0:
+            raise KeyError(word)
+        return self._freqs[idx]
+
+    def __contains__(self, word) -> bool:
+        return isinstance(word, str) and self.word_index(word) >= 0
+
+    def __len__(self) -> int:
+        return self._n_words
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.word_at(i) for i in range(self._n_words))
+
+    def frequency(self, word: str) -> int:
+        """Return the frequency of a word (0 if unknown), like TextProcessor.frequency."""
+        idx = self.word_index(word)
+        return self._freqs[idx] if idx >= 0 else 0
+
+    @property
+    def word_freq(self) -> "SharedVocabView":
+        """The view itself, for code written against TextProcessor.word_freq."""
+        return self
+
+
+_worker_vocab: Optional[SharedVocabView] = None
+
+
+def init_worker(name: str) -> None:
+    """Pool initializer: attach the worker process to a published vocabulary (see worker_vocab)."""
+    global _worker_vocab
+    _worker_vocab = SharedVocabView(name)
+
+
+def worker_vocab() -> SharedVocabView:
+    """Return the vocabulary attached by init_worker in this worker process."""
+    return _worker_vocab
+
+
+def _demo_lookup(word: str) -> tuple:
+    vocab = worker_vocab()
+    return word, vocab.frequency(word), vocab.word_index(word)
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ProcessPoolExecutor
+    from role_based_vocab_manager import TextProcessor
+
+    tp = TextProcessor(
+        stopwords_filepath="data/stop_words_english.txt",
+        corpus_filepath="data/ag_news_test.csv",
+        idx2label_filepath="data/idx2label.json",
+    )
+    with SharedVocabulary(tp) as shared:
+        print(f"Published {len(tp.word_freq)} words in {shared.nbytes} bytes as {shared.name}")
+        with ProcessPoolExecutor(max_workers=4, initializer=init_worker, initargs=(shared.name,)) as pool:
+            for word, freq, idx in pool.map(_demo_lookup, ["reuters", "oil", "notaword"]):
+                print(word, freq, idx)
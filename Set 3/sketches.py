@@ -0,0 +1,224 @@
+import hashlib
+import heapq
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+def _word_hashes(words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Return two independent 64-bit hashes per word (stable across processes and runs).
+
+    Args:
+        words (List[str]): The words to hash.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Two uint64 arrays with one hash per word.
+    """
+    digests = b"".join(hashlib.blake2b(w.encode("utf-8"), digest_size=16).digest() for w in words)
+    pairs = np.frombuffer(digests, dtype="<u8").reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1] | np.uint64(1)
+
+
+class CountMinSketch:
+    """
+    A Count-Min Sketch of word frequencies.
+
+    With width = ceil(e / epsilon) and depth = ceil(ln(1 / delta)), every estimate is at least
+    the true count and, with probability at least 1 - delta, at most true count + epsilon * N,
+    where N is the total of all counts added. Memory is depth * width 64-bit counters no matter
+    how many distinct words are seen. Rows are indexed by double hashing of a blake2b digest,
+    so sketches built in different runs with the same size can be merged by adding tables.
+    """
+    def __init__(self, epsilon: float = 1e-4, delta: float = 1e-3) -> None:
+        """Create an empty sketch.
+
+        Args:
+            epsilon (float, optional): Additive error as a fraction of the total count. Defaults to 1e-4.
+            delta (float, optional): Probability that an estimate exceeds that error. Defaults to 1e-3.
+        Returns:
+            None
+        """
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = int(math.ceil(math.e / epsilon))
+        self.depth = int(math.ceil(math.log(1.0 / delta)))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+
+    def _columns(self, words: List[str]) -> np.ndarray:
+        """Return the depth x len(words) matrix of column indexes of the words."""
+        h1, h2 = _word_hashes(words)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        with np.errstate(over="ignore"):
+            return ((h1[None, :] + rows * h2[None, :]) % np.uint64(self.width)).astype(np.intp)
+
+    def update(self, counts: Dict[str, int]) -> None:
+        """Add a batch of word counts (negative counts remove previously added occurrences).
+
+        Args:
+            counts (Dict[str, int]): Mapping of word to the count to add.
+        Returns:
+            None
+        """
+        if not counts:
+            return
+        words = list(counts)
+        values = np.fromiter(counts.values(), dtype=np.int64, count=len(words))
+        cols = self._columns(words)
+        for row in range(self.depth):
+            np.add.at(self.table[row], cols[row], values)
+        self.total += int(values.sum())
+
+    def estimate(self, word: str) -> int:
+        """Return the estimated count of a word (never below its true count)."""
+        return int(self.estimate_many([word])[0])
+
+    def estimate_many(self, words: List[str]) -> np.ndarray:
+        """Return the estimated counts of several words at once."""
+        if not words:
+            return np.zeros(0, dtype=np.int64)
+        cols = self._columns(list(words))
+        return self.table[np.arange(self.depth)[:, None], cols].min(axis=0)
+
+    def error_bound(self) -> float:
+        """Return the additive error epsilon * N that holds with probability 1 - delta."""
+        return self.epsilon * self.total
+
+    def copy(self) -> "CountMinSketch":
+        """Return an independent copy of the sketch."""
+        other = CountMinSketch.__new__(CountMinSketch)
+        other.epsilon, other.delta, other.width, other.depth = self.epsilon, self.delta, self.width, self.depth
+        other.table = self.table.copy()
+        other.total = self.total
+        return other
+
+    def merge(self, other: "CountMinSketch") -> None:
+        """Add another sketch of the same size into this one."""
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Only sketches with the same width and depth can be merged")
+        self.table += other.table
+        self.total += other.total
+
+
+class SpaceSaving:
+    """
+    The Space-Saving heavy-hitter summary with a fixed number of counters.
+
+    Each monitored word keeps a count that overestimates its true count by at most the
+    recorded error, which is itself at most N / capacity. Every word occurring more than
+    N / capacity times is guaranteed to be monitored.
+    """
+    def __init__(self, capacity: int = 1000) -> None:
+        """Create an empty summary.
+
+        Args:
+            capacity (int, optional): The number of counters kept. Defaults to 1000.
+        Returns:
+            None
+        """
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.total = 0
+
+    def min_count(self) -> int:
+        """Return the smallest monitored count (0 while there are free counters)."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def update(self, counts: Dict[str, int]) -> None:
+        """Add a batch of word counts; negative counts decrement monitored words only.
+
+        Args:
+            counts (Dict[str, int]): Mapping of word to the count to add.
+        Returns:
+            None
+        """
+        # Removals only touch monitored words
+        positive = {}
+        for word, c in counts.items():
+            if c > 0:
+                positive[word] = c
+            else:
+                self.total += c
+                if word in self.counts:
+                    self.counts[word] = max(0, self.counts[word] + c)
+        if not positive:
+            return
+        # The batch's exact top words form a summary of their own (every other word of the batch
+        # occurs at most as often as its smallest counter), which is merged in. Feeding the words
+        # one by one would let a long tail of rare words evict the heavy hitters of a large batch.
+        batch = SpaceSaving(self.capacity)
+        kept = heapq.nsmallest(self.capacity, positive.items(), key=lambda item: (-item[1], item[0]))
+        batch.counts = dict(kept)
+        batch.errors = {word: 0 for word, _ in kept}
+        batch.total = sum(positive.values())
+        self.merge(batch)
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        """Return the k monitored words with the largest counts, ties broken alphabetically."""
+        return heapq.nsmallest(k, self.counts.items(), key=lambda item: (-item[1], item[0]))
+
+    def error_bound(self) -> float:
+        """Return the maximum overestimate N / capacity of any monitored count."""
+        return self.total / self.capacity
+
+    def merge(self, other: "SpaceSaving") -> None:
+        """Merge another summary into this one, keeping the overestimate guarantee.
+
+        A word missing from a full summary may have occurred up to that summary's minimum
+        count times, so that minimum is added to both its count and its error.
+        """
+        min_self, min_other = self.min_count(), other.min_count()
+        merged = {}
+        for word in set(self.counts) | set(other.counts):
+            c1 = self.counts.get(word, min_self)
+            e1 = self.errors.get(word, min_self)
+            c2 = other.counts.get(word, min_other)
+            e2 = other.errors.get(word, min_other)
+            merged[word] = (c1 + c2, e1 + e2)
+        kept = heapq.nsmallest(self.capacity, merged.items(), key=lambda item: (-item[1][0], item[0]))
+        self.counts = {w: c for w, (c, _) in kept}
+        self.errors = {w: e for w, (_, e) in kept}
+        self.total += other.total
+
+
+def save_sketches(path: str, cms: CountMinSketch, heavy: SpaceSaving) -> None:
+    """Save a Count-Min Sketch and a Space-Saving summary to one .npz file.
+
+    Args:
+        path (str): The output file path.
+        cms (CountMinSketch): The frequency sketch.
+        heavy (SpaceSaving): The heavy-hitter summary.
+    Returns:
+        None
+    """
+    words = list(heavy.counts)
+    np.savez_compressed(
+        path,
+        table=cms.table,
+        params=np.array([cms.epsilon, cms.delta, cms.total, heavy.capacity, heavy.total], dtype=np.float64),
+        words=np.array(words, dtype=str),
+        counts=np.array([heavy.counts[w] for w in words], dtype=np.int64),
+        errors=np.array([heavy.errors[w] for w in words], dtype=np.int64))
+
+
+def load_sketches(path: str) -> Tuple[CountMinSketch, SpaceSaving]:
+    """Load sketches written by save_sketches.
+
+    Args:
+        path (str): The .npz file path.
+    Returns:
+        Tuple[CountMinSketch, SpaceSaving]: The frequency sketch and heavy-hitter summary.
+    """
+    with np.load(path) as data:
+        epsilon, delta, cms_total, capacity, heavy_total = data["params"]
+        cms = CountMinSketch(float(epsilon), float(delta))
+        cms.table[:] = data["table"]
+        cms.total = int(cms_total)
+        heavy = SpaceSaving(int(capacity))
+        heavy.counts = {str(w): int(c) for w, c in zip(data["words"], data["counts"])}
+        heavy.errors = {str(w): int(e) for w, e in zip(data["words"], data["errors"])}
+        heavy.total = int(heavy_total)
+    return cms, heavy
@@ -0,0 +1,67 @@
+import json
+
+import pandas as pd
+
+from essay_scorer import EssayScorer
+from grading_pipeline import GradingPipeline
+from role_based_vocab_manager import TextProcessor
+
+CORPUS = [
+    "Oil prices rose as markets reacted to supply news.",
+    "Schools use technology to help students learn online.",
+    "The team won the final match of the season.",
+]
+
+
+def _processor(tmp_path) -> TextProcessor:
+    (tmp_path / "stop.txt").write_text("the\nto\nof\nas\n", encoding="utf-8")
+    (tmp_path / "idx2label.json").write_text(json.dumps({"1": "World"}), encoding="utf-8")
+    pd.DataFrame({"label": [1] * len(CORPUS), "text": CORPUS}).to_csv(tmp_path / "corpus.csv", index=False)
+    return TextProcessor(str(tmp_path / "stop.txt"), str(tmp_path / "corpus.csv"), str(tmp_path / "idx2label.json"),
+                         output_dir=str(tmp_path))
+
+
+def _essays(tmp_path):
+    essays = tmp_path / "essays"
+    essays.mkdir()
+    (essays / "a.txt").write_text("Technology helps students learn. Online schools grow.", encoding="utf-8")
+    (essays / "b.txt").write_text("Oil markets and supply news moved prices this season.", encoding="utf-8")
+    return essays
+
+
+def _records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_pipeline_grades_every_essay_and_skips_them_on_rerun(tmp_path):
+    essays = _essays(tmp_path)
+    results = tmp_path / "grades.jsonl"
+    pipeline = GradingPipeline(EssayScorer(_processor(tmp_path)), str(results), workers=2)
+    summary = pipeline.run(str(essays), prompt="Technology in education.")
+    assert (summary["graded"], summary["failed"], summary["skipped"]) == (2, 0, 0)
+    records = _records(results)
+    assert sorted(r["path"] for r in records) == sorted(str(p) for p in essays.iterdir())
+    assert all("score" in r for r in records)
+
+    summary = pipeline.run(str(essays), prompt="Technology in education.")
+    assert (summary["graded"], summary["skipped"]) == (0, 2)
+    summary = pipeline.run(str(essays), prompt="Another prompt.")
+    assert summary["graded"] == 2
+
+
+class _FailingScorer:
+    """Scores every essay but b.txt, on which it raises an unexpected error."""
+    def score_essay(self, prompt, path):
+        if path.endswith("b.txt"):
+            raise KeyError("boom")
+        return {"total": 1}
+
+
+def test_pipeline_records_any_error_and_keeps_going(tmp_path):
+    essays = _essays(tmp_path)
+    results = tmp_path / "grades.jsonl"
+    summary = GradingPipeline(_FailingScorer(), str(results), workers=1).run(str(essays))
+    assert (summary["graded"], summary["failed"]) == (1, 1)
+    failed = [r for r in _records(results) if "error" in r]
+    assert len(failed) == 1 and failed[0]["path"].endswith("b.txt") and failed[0]["error"].startswith("KeyError")
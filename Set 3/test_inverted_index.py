@@ -0,0 +1,124 @@
+import json
+import math
+
+import pandas as pd
+
+from inverted_index import InvertedIndex
+from role_based_vocab_manager import TextProcessor
+
+# doc id -> (term id -> tf, label)
+DOCS = {
+    1: ({10: 2, 11: 1}, "World"),
+    2: ({10: 1, 12: 3}, "Sports"),
+    3: ({11: 1, 12: 1, 13: 4}, "World"),
+    4: ({10: 1, 11: 1, 12: 1}, "Business"),
+}
+
+CORPUS = [
+    (1, "Oil prices rise as supply tightens"),
+    (2, "Local team wins the league final"),
+    (1, "Oil exporters meet to discuss prices and supply"),
+    (3, "Markets rally as oil prices fall"),
+]
+
+
+def _index(order=(1, 2, 3, 4)) -> InvertedIndex:
+    index = InvertedIndex()
+    for doc_id in order:
+        terms, label = DOCS[doc_id]
+        index.add_document(doc_id, terms, label)
+    return index
+
+
+def _bm25_reference(query, k1=1.5, b=0.75):
+    """Score every document against the query term ids straight from DOCS."""
+    avg_len = sum(sum(t.values()) for t, _ in DOCS.values()) / len(DOCS)
+    scores = {}
+    for doc_id, (terms, _) in DOCS.items():
+        score = 0.0
+        for term_id in query:
+            df = sum(term_id in t for t, _ in DOCS.values())
+            tf = terms.get(term_id, 0)
+            if tf:
+                idf = math.log(1.0 + (len(DOCS) - df + 0.5) / (df + 0.5))
+                score += idf * tf * (k1 + 1.0) / (tf + k1 * (1.0 - b + b * sum(terms.values()) / avg_len))
+        if score:
+            scores[doc_id] = score
+    return scores
+
+
+def _processor(tmp_path) -> TextProcessor:
+    (tmp_path / "stop.txt").write_text("the\nas\nto\nand\n", encoding="utf-8")
+    (tmp_path / "idx2label.json").write_text(json.dumps({"1": "World", "2": "Sports", "3": "Business"}),
+                                             encoding="utf-8")
+    pd.DataFrame(CORPUS, columns=["label", "text"]).to_csv(tmp_path / "corpus.csv", index=False)
+    return TextProcessor(str(tmp_path / "stop.txt"), str(tmp_path / "corpus.csv"), str(tmp_path / "idx2label.json"),
+                         output_dir=str(tmp_path))
+
+
+def test_boolean_search_with_label_filter():
+    index = _index()
+    assert index.search_and([10, 11]) == [1, 4]
+    assert index.search_and([10, 99]) == []
+    assert index.search_or([11, 13]) == [1, 3, 4]
+    assert index.search_or([12], label="World") == [3]
+    assert index.doc_freq(12) == 3
+
+
+def test_out_of_order_inserts_keep_postings_sorted():
+    index = _index(order=(4, 2, 3, 1))
+    assert list(index.postings(10)) == [(1, 2), (2, 1), (4, 1)]
+    assert index.document_terms(3) == DOCS[3][0]
+
+
+def test_bm25_matches_reference_scores():
+    index = _index()
+    query = [10, 12, 13]
+    expected = _bm25_reference(query)
+    ranked = index.bm25(query, k=10)
+    assert [d for d, _ in ranked] == sorted(expected, key=lambda d: (-expected[d], d))
+    for doc_id, score in ranked:
+        assert math.isclose(score, expected[doc_id])
+    assert index.bm25(query, k=2) == ranked[:2]
+    assert [d for d, _ in index.bm25(query, label="World")] == [d for d, _ in ranked if DOCS[d][1] == "World"]
+
+
+def test_remove_documents_updates_postings_and_frequencies():
+    index = _index()
+    removed = index.remove_documents([2, 4, 99])
+    assert removed == {10: 2, 11: 1, 12: 4}
+    assert len(index) == 2 and 2 not in index
+    assert list(index.postings(12)) == [(3, 1)]
+    assert index.doc_freq(10) == 1
+    index.remove_document(1)
+    assert list(index.postings(10)) == [] and index.doc_freq(10) == 0
+
+
+def test_frozen_copy_does_not_see_later_updates():
+    index = _index(order=(1, 2))
+    frozen = index.freeze()
+    index.add_document(3, *DOCS[3])
+    index.remove_document(1)
+    assert frozen.search_or([10, 11, 13]) == [1, 2]
+    assert index.search_or([10, 11, 13]) == [2, 3]
+    assert index.freeze() is index.freeze()
+
+
+def test_text_processor_search_and_rank(tmp_path):
+    tp = _processor(tmp_path)
+    assert tp.search("oil prices")["text"].tolist() == [text for _, text in CORPUS if "prices" in text]
+    assert tp.search("oil team", mode="or")["text"].tolist() == [CORPUS[i][1] for i in (0, 1, 2, 3)]
+    assert tp.search("oil", label="Business")["text"].tolist() == [CORPUS[3][1]]
+    assert tp.search("oil unknownword").empty
+    ranked = tp.rank("supply prices", k=2)
+    assert len(ranked) == 2 and ranked["score"].is_monotonic_decreasing
+    assert set(ranked["text"]) <= {CORPUS[0][1], CORPUS[2][1]}
+
+
+def test_search_follows_deletes_but_old_snapshots_do_not(tmp_path):
+    tp = _processor(tmp_path)
+    before = tp.snapshot()
+    pd.DataFrame([CORPUS[0]], columns=["label", "text"]).to_csv(tmp_path / "delete.csv", index=False)
+    tp.delete_file(str(tmp_path / "delete.csv"))
+    assert CORPUS[0][1] not in tp.search("oil")["text"].tolist()
+    assert CORPUS[0][1] in tp.search("oil", snapshot=before)["text"].tolist()
@@ -0,0 +1,66 @@
+import random
+from collections import Counter
+
+from sketches import CountMinSketch, SpaceSaving, load_sketches, save_sketches
+
+
+def _zipf_counts(n_words: int = 20000, seed: int = 7) -> Counter:
+    """A few heavy words followed by a long tail of words seen once or twice."""
+    rng = random.Random(seed)
+    counts = Counter({f"heavy{i}": 1000 - 50 * i for i in range(10)})
+    counts.update({f"tail{i}": rng.choice((1, 1, 1, 2)) for i in range(n_words)})
+    return counts
+
+
+def test_heavy_hitters_survive_one_large_batch():
+    counts = _zipf_counts()
+    summary = SpaceSaving(capacity=50)
+    summary.update(dict(counts))
+    assert summary.top(10) == [(f"heavy{i}", 1000 - 50 * i) for i in range(10)]
+    assert summary.total == sum(counts.values())
+
+
+def test_heavy_hitters_over_many_batches_overestimate_within_bound():
+    counts = _zipf_counts()
+    items = list(counts.items())
+    summary = SpaceSaving(capacity=100)
+    for start in range(0, len(items), 1000):
+        summary.update(dict(items[start:start + 1000]))
+    for word, estimate in summary.counts.items():
+        assert counts[word] <= estimate <= counts[word] + summary.error_bound()
+    assert [w for w, _ in summary.top(10)] == [f"heavy{i}" for i in range(10)]
+
+
+def test_space_saving_removals_only_touch_monitored_words():
+    summary = SpaceSaving(capacity=10)
+    summary.update({"a": 5, "b": 3})
+    summary.update({"a": -2, "zzz": -4})
+    assert summary.counts == {"a": 3, "b": 3}
+    assert summary.total == 2
+
+
+def test_count_min_never_underestimates():
+    counts = _zipf_counts(5000)
+    sketch = CountMinSketch(epsilon=1e-3, delta=1e-3)
+    sketch.update(dict(counts))
+    words = list(counts)
+    estimates = sketch.estimate_many(words)
+    assert all(int(e) >= counts[w] for w, e in zip(words, estimates))
+    assert sum(int(e) - counts[w] for w, e in zip(words, estimates)) <= sketch.error_bound() * len(words)
+    sketch.update({"heavy0": -1000})
+    assert sketch.estimate("heavy0") >= 0
+
+
+def test_merge_and_round_trip(tmp_path):
+    left, right = CountMinSketch(1e-3), CountMinSketch(1e-3)
+    left.update({"oil": 3, "gas": 1})
+    right.update({"oil": 4})
+    left.merge(right)
+    assert left.estimate("oil") >= 7 and left.total == 8
+    heavy = SpaceSaving(5)
+    heavy.update({"oil": 7, "gas": 1})
+    save_sketches(str(tmp_path / "sketches.npz"), left, heavy)
+    cms, loaded = load_sketches(str(tmp_path / "sketches.npz"))
+    assert (cms.table == left.table).all() and cms.total == left.total
+    assert loaded.counts == heavy.counts and loaded.total == heavy.total
+    assert loaded.top(1) == [("oil", 7)]
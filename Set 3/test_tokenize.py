@@ -0,0 +1,45 @@
+import json
+from collections import Counter
+
+import pandas as pd
+
+from role_based_vocab_manager import TextProcessor
+
+# Text whose lowercasing and isalpha() differ between Python and other Unicode implementations:
+# dotted capital I, final sigma, title-case digraphs, ligatures, accents and non-Latin scripts
+TEXTS = [
+    "İstanbul ΟΔΟΣ straße, the İİ",
+    "ǅemal ﬁne Σίσυφος ΣΑΣ. Ὰι",
+    "The café naïve 東京 ½ x2 ab",
+    "Ǉubljana MAẞE ﬀ ß",
+]
+
+
+def _processor(tmp_path, **kwargs) -> TextProcessor:
+    (tmp_path / "stop.txt").write_text("the\n", encoding="utf-8")
+    (tmp_path / "idx2label.json").write_text(json.dumps({"1": "World"}), encoding="utf-8")
+    pd.DataFrame({"label": [1] * len(TEXTS), "text": TEXTS}).to_csv(tmp_path / "corpus.csv", index=False)
+    return TextProcessor(str(tmp_path / "stop.txt"), str(tmp_path / "corpus.csv"), str(tmp_path / "idx2label.json"),
+                         output_dir=str(tmp_path), **kwargs)
+
+
+def test_tokenize_column_matches_clean_text_on_non_ascii(tmp_path):
+    tp = _processor(tmp_path)
+    expected = [word for text in TEXTS for word in tp.clean_text(text)]
+    for dtype in (object, "str"):
+        tokens = tp._tokenize_column(pd.Series(TEXTS, dtype=dtype))
+        assert tokens.tolist() == expected
+        assert tokens.dtype == object
+
+
+def test_vocabulary_counts_match_clean_text_on_non_ascii(tmp_path):
+    tp = _processor(tmp_path)
+    assert tp.word_freq == Counter(word for text in TEXTS for word in tp.clean_text(text))
+
+
+def test_build_vocab_ngrams_do_not_span_lines(tmp_path):
+    tp = _processor(tmp_path, ngrams=2)
+    tp.build_vocab("oil prices\nmarkets rose\n")
+    assert tp.ngram_frequency("oil prices") == 1
+    assert tp.ngram_frequency("markets rose") == 1
+    assert tp.ngram_frequency("prices markets") == 0
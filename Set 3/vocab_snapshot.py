@@ -0,0 +1,111 @@
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from rank_index import RankIndex
+
+
+class VocabSnapshot:
+    """
+    An immutable, versioned view of a TextProcessor vocabulary.
+
+    A snapshot owns its own copy of the word frequencies and read-only proxies of the word2idx and
+    idx2word dicts (TextProcessor replaces those dicts on every update instead of modifying them),
+    so it never changes after it is published. Readers that hold a snapshot keep it alive; once the
+    last reference is dropped it is freed like any other object.
+
+    Every reader-facing query of TextProcessor (frequencies, ranks, n-grams, search and BM25
+    ranking) reads one snapshot, so all the numbers of one query come from the same version.
+    """
+    __slots__ = ("version", "word_freq", "word2idx", "idx2word", "top_10", "last_10", "sketch", "top_words",
+                 "index", "corpus", "term2id", "ngram_freq", "_ranks", "__weakref__")
+
+    def __init__(
+            self,
+            version: int,
+            word_freq: Dict[str, int],
+            word2idx: Dict[str, int],
+            idx2word: Dict[int, str],
+            top_10: List[Tuple[str, int]],
+            last_10: Optional[List[Tuple[str, int]]],
+            sketch=None,
+            top_words: Optional[List[Tuple[str, int]]] = None,
+            index=None,
+            corpus=None,
+            term2id: Optional[Dict[str, int]] = None,
+            ngram_freq: Optional[Dict[int, Dict[int, int]]] = None
+        ) -> None:
+        """Freeze the given vocabulary state.
+
+        Args:
+            version (int): The TextProcessor version the snapshot was taken at.
+            word_freq (Dict[str, int]): Word frequencies; copied.
+            word2idx (Dict[str, int]): Word to index mapping; must not be modified afterwards.
+            idx2word (Dict[int, str]): Index to word mapping; must not be modified afterwards.
+            top_10 (List[Tuple[str, int]]): The 10 most frequent words.
+            last_10 (Optional[List[Tuple[str, int]]]): The 10 least frequent words, or None if unknown.
+            sketch (CountMinSketch, optional): In approximate mode, a copy of the Count-Min sketch that
+                answers frequency(); must not be modified afterwards. Defaults to None (exact counts).
+            top_words (Optional[List[Tuple[str, int]]], optional): In approximate mode, the heavy hitters
+                with their refined counts, most frequent first. Defaults to None.
+            index (InvertedIndex, optional): A frozen copy of the inverted index. Defaults to None.
+            corpus (pd.DataFrame, optional): The corpus rows (TextProcessor replaces the frame on every
+                update instead of modifying it). Defaults to None.
+            term2id (Optional[Dict[str, int]], optional): Word to stable term id. It is only ever extended,
+                so ids the frozen index knows never change. Defaults to None.
+            ngram_freq (Optional[Dict[int, Dict[int, int]]], optional): n -> n-gram frequencies; copied.
+                Defaults to None.
+        Returns:
+            None
+        """
+        self.version = version
+        self.word_freq: Mapping[str, int] = MappingProxyType(dict(word_freq))
+        self.word2idx: Mapping[str, int] = MappingProxyType(word2idx)
+        self.idx2word: Mapping[int, str] = MappingProxyType(idx2word)
+        self.top_10 = tuple(top_10)
+        self.last_10 = tuple(last_10) if last_10 is not None else None
+        self.sketch = sketch
+        self.top_words = tuple(top_words) if top_words is not None else None
+        self.index = index
+        self.corpus = corpus
+        self.term2id: Mapping[str, int] = MappingProxyType(term2id if term2id is not None else {})
+        self.ngram_freq: Mapping[int, Mapping[int, int]] = MappingProxyType(
+            {n: MappingProxyType(dict(freq)) for n, freq in (ngram_freq or {}).items()})
+        self._ranks: Optional[RankIndex] = None
+
+    def frequency(self, word: str) -> int:
+        """Return the frequency of a word in this snapshot (0 if unknown; the Count-Min estimate in approximate mode)."""
+        if self.sketch is not None:
+            return self.sketch.estimate(word)
+        return self.word_freq.get(word, 0)
+
+    @property
+    def ranks(self) -> RankIndex:
+        """The rank index of this snapshot's frequencies, built on first use."""
+        if self._ranks is None:
+            self._ranks = RankIndex(self.word_freq)
+        return self._ranks
+
+    def most_common(self, k: int = 10) -> List[Tuple[str, int]]:
+        """Return the k most frequent words, ties broken alphabetically."""
+        if self.top_words is not None:
+            return list(self.top_words[:k])
+        return self.ranks.words_in_ranks(1, k)
+
+    def word_rank(self, word: str) -> Optional[int]:
+        """Return the frequency rank of a word (1 = most frequent), or None if it is not in the vocabulary."""
+        return self.ranks.rank(word)
+
+    def word_percentile(self, word: str) -> Optional[float]:
+        """Return the percentage of words whose frequency is at most this word's, or None if unknown."""
+        return self.ranks.percentile(word)
+
+    def count_at_least(self, freq: int) -> int:
+        """Return how many words have frequency >= freq."""
+        return self.ranks.count_at_least(freq)
+
+    def words_in_ranks(self, first: int, last: int) -> List[Tuple[str, int]]:
+        """Return the (word, frequency) pairs at rank positions first..last (1-based, inclusive)."""
+        return self.ranks.words_in_ranks(first, last)
+
+    def __len__(self) -> int:
+        return len(self.word_freq)
@@ -1,6 +1,12 @@
 # copy your task4 code here
-from typing import Tuple, List, Optional
+from typing import Dict, Tuple, List, Optional
 import os
+import sys
+
+# Modules shared by every set live in the repository's shared directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from fast_tokenizer import count_file_alnum, is_text_file, open_input
+from vocab_pruning import BoundedCounter, prune_counts
 
 
 def get_stopwords(stopwords_file: str) -> List[str]:
@@ -14,7 +20,7 @@ def get_stopwords(stopwords_file: str) -> List[str]:
         List[str]: A list of stop words.
     """
     words = []
-    with open(stopwords_file, 'r', encoding='utf-8') as f:
+    with open_input(stopwords_file, 'rt') as f:
         for line in f:
             w = line.strip().lower() # Convert to lowercase for case insensitivity
             if w: # Avoid adding empty lines
@@ -24,20 +30,19 @@ def get_stopwords(stopwords_file: str) -> List[str]:
 
 
 
-def get_vocabs(text: str, stopwords: List) -> Tuple[Tuple[str], Tuple[int]] | Tuple[()]:
+TOKENIZER_PROFILE = "task4-alnum-v1"  # identifies get_vocabs' rules in the token-count cache
+
+
+def count_vocabs(text: str, stopwords: List) -> Dict[str, int]:
     """
-    Get vocabulary and their counts from the text, excluding stop words.
-    
+    Count the vocabulary of the text, excluding stop words.
+
     Args:
         text (str): The input text.
         stopwords (List): A list of stop words to exclude.
-        
+
     Returns:
-        Tuple[Tuple[str], Tuple[int]] | Tuple[()]: A tuple containing:
-            - A tuple of unique words sorted alphabetically.
-            - A tuple of counts corresponding to each unique word.
-        Returns an empty tuple if no valid words are found.
-    
+        Dict[str, int]: A dictionary mapping each valid word to its count.
     """
     tokens = []
     current = "" 
@@ -52,7 +57,7 @@ def get_vocabs(text: str, stopwords: List) -> Tuple[Tuple[str], Tuple[int]] | Tu
         tokens.append(current.lower())
 
     sw = set(stopwords) # Convert stopwords list to a set(non-repetition) for faster lookup
-    filtered = []
+    counts = {}
     for t in tokens:
         if not t.isalpha(): # Filter out non-alphabetic tokens
             continue
@@ -60,14 +65,28 @@ def get_vocabs(text: str, stopwords: List) -> Tuple[Tuple[str], Tuple[int]] | Tu
             continue
         if t in sw: # Filter out stop words
             continue
-        filtered.append(t)
+        counts[t] = counts.get(t, 0) + 1 # Count occurrences of each word
+    return counts
+
+
+def get_vocabs(text: str, stopwords: List) -> Tuple[Tuple[str], Tuple[int]] | Tuple[()]:
+    """
+    Get vocabulary and their counts from the text, excluding stop words.
+    
+    Args:
+        text (str): The input text.
+        stopwords (List): A list of stop words to exclude.
         
-    if not filtered: # If no valid words remain after filtering, return empty tuple
-        return tuple() 
+    Returns:
+        Tuple[Tuple[str], Tuple[int]] | Tuple[()]: A tuple containing:
+            - A tuple of unique words sorted alphabetically.
+            - A tuple of counts corresponding to each unique word.
+        Returns an empty tuple if no valid words are found.
     
-    counts = {}
-    for w in filtered: # Count occurrences of each word
-        counts[w] = counts.get(w, 0) + 1
+    """
+    counts = count_vocabs(text, stopwords)
+    if not counts: # If no valid words remain after filtering, return empty tuple
+        return tuple() 
     
     vocab_sorted = tuple(sorted(counts.keys()))
     freqs = tuple(counts[w] for w in vocab_sorted)
@@ -75,10 +94,33 @@ def get_vocabs(text: str, stopwords: List) -> Tuple[Tuple[str], Tuple[int]] | Tu
     return vocab_sorted, freqs
 
 
+def count_file_vocabs(fpath: str, stopwords: List, cache=None) -> Dict[str, int]:
+    """
+    Count the vocabulary of one file, consulting a token-count cache when given.
+
+    Args:
+        fpath (str): Path of the text file.
+        stopwords (List): A list of stop words to exclude.
+        cache (TokenCountCache, optional): Cache of per-file counts. Defaults to None (always tokenize).
+
+    Returns:
+        Dict[str, int]: A dictionary mapping each valid word to its count.
+    """
+    # The file is memory-mapped and tokenized as bytes; counts equal count_vocabs(f.read())
+    if cache is not None:
+        return cache.get_counts(fpath, TOKENIZER_PROFILE, stopwords,
+                                lambda path: count_file_alnum(path, stopwords))
+    return count_file_alnum(fpath, stopwords)
+
+
 def process_mini_dataset(
         stop_words: List[str],
         data_path: str = 'data',
         category: Optional[str] = None,
+        cache=None,
+        min_count: int = 1,
+        max_vocab_size: Optional[int] = None,
+        max_tracked: Optional[int] = None,
     ):
     """Process a mini dataset of text files.
 
@@ -86,11 +128,20 @@ def process_mini_dataset(
         stop_words (List[str]): A list of stop words to exclude.
         data_path (str, optional): The path to the data directory. Defaults to 'data'.
         category (Optional[str], optional): The specific category to process. Defaults to None.
+        cache (TokenCountCache, optional): Cache of per-file token counts; unchanged files are
+            not re-tokenized. Defaults to None.
+        min_count (int, optional): Drop words seen fewer times. Defaults to 1 (keep all).
+        max_vocab_size (Optional[int], optional): Keep only this many of the most frequent words. Defaults to None.
+        max_tracked (Optional[int], optional): Bound the words held while counting by evicting the least
+            frequent ones (counts become approximate for evicted words). Defaults to None (exact counting).
 
     Returns:
         None
     """
-    texts = []
+    if max_tracked is not None and max_vocab_size is not None and max_tracked < 2 * max_vocab_size:
+        raise ValueError("max_tracked must be at least twice max_vocab_size")
+    counter = BoundedCounter(max_tracked)
+    found = False
     if category: #process a specific category
         root_path = os.path.join(data_path, category)  # construct the path to the category directory
         if not os.path.exists(root_path): # check if the directory exists, if not, return empty tuple
@@ -103,20 +154,25 @@ def process_mini_dataset(
     for folder in search_dirs:  # Iterate through each folder in the search directories
         for fname in os.listdir(folder):
             fpath = os.path.join(folder, fname)
-            if os.path.isfile(fpath) and fname.endswith('.txt'):
-                with open(fpath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    texts.append(content)
-    if not texts:  # If no valid texts were found, return empty tuple
+            if os.path.isfile(fpath) and is_text_file(fname):
+                found = True
+                # Files are counted one by one so each can be served from the cache
+                counter.update(count_file_vocabs(fpath, stop_words, cache))
+    if not found:  # If no valid texts were found, return empty tuple
         return tuple()
 
-    all_text = '\n'.join(texts)
-    result = get_vocabs(all_text, stop_words)
+    # Prune the long tail before anything is sorted or written
+    counts, pruned = prune_counts(counter.counts, min_count, max_vocab_size)
+    pruned += counter.evicted
+    if min_count > 1 or max_vocab_size is not None or max_tracked is not None:
+        print(f"Pruned {pruned} tokens (min_count={min_count}, max_vocab_size={max_vocab_size})")
+
     # If no vocabulary was found, return empty and do not write a file
-    if not result:
+    if not counts:
         return tuple()
 
-    vocab_sorted, freqs = result
+    vocab_sorted = tuple(sorted(counts.keys()))
+    freqs = tuple(counts[w] for w in vocab_sorted)
     # Pair and sort by frequency descending
     pairs = sorted(zip(vocab_sorted, freqs), key=lambda x: x[1], reverse=True)
 
@@ -1,15 +1,26 @@
-from task4 import get_stopwords, get_vocabs
+import os
+import sys
+
+# Modules shared by every set live in the repository's shared directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from task4 import get_stopwords, get_vocabs, count_file_vocabs, TOKENIZER_PROFILE
 from task5 import (
     load_word_freq, load_word2idx, load_idx2word,
     save_word_freq, save_word2idx, save_idx2word   
 )
-import os
+from token_cache import stopwords_hash
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import shutil
+import tempfile
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
 
-def extract_vocab(stopwords_path: str, files):
+def extract_vocab(stopwords_path: str, files, cache=None):
     """Read text from one or more files and extract vocabulary using stopwords.
     Args:
     - stopwords_path: path to a stopwords file (one word per line)
     - files: str or iterable of str (file paths to read)
+    - cache: optional TokenCountCache; files whose content is unchanged are not re-tokenized
     Returns: 
             (words_tuple, freqs_tuple) or tuple() if nothing extracted
     """
@@ -25,21 +36,22 @@ def extract_vocab(stopwords_path: str, files):
     except Exception:
         sw = []
 
-    
-    texts = []
+    # Count each file separately (so it can be served from the cache) and sum the counts
+    counts = {}
     for fp in files:  # Iterate through each file path
         try:
-            with open(fp, 'r', encoding='utf-8') as f:
-                texts.append(f.read())
+            file_counts = count_file_vocabs(fp, sw, cache)
         except Exception:
             # Skip unreadable/missing files
             continue
+        for w, c in file_counts.items():
+            counts[w] = counts.get(w, 0) + c
 
-    if not texts:
+    if not counts:
         return tuple()
 
-    all_text = "\n".join(texts)
-    return get_vocabs(all_text, sw)
+    vocab_sorted = tuple(sorted(counts.keys()))
+    return vocab_sorted, tuple(counts[w] for w in vocab_sorted)
 
 def updating_for_adding(
         stopwords_path: str,
@@ -193,10 +205,6 @@ def updating_for_deleting(
     
     wf_path_out = os.path.join(out_path, "word_freq.txt")
     
-    save_word_freq(tuple(curr_wf.keys()),
-                    tuple(curr_wf[w] for w in curr_wf.keys()), 
-                    wf_path_out)
-    
     save_idx2word(tuple(curr_wf.keys()), os.path.join(out_path, "idx2word.txt"))
     save_word2idx(tuple(curr_wf.keys()), os.path.join(out_path, "word2idx.txt"))
     
@@ -208,3 +216,390 @@ def updating_for_deleting(
         for w, cnt in pairs:
             f.write(f"{w} {cnt}\n")
 
+
+def _read_pairs(file_path: str) -> Iterator[Tuple[str, int]]:
+    """Stream "word count" pairs from a file, skipping malformed lines.
+
+    Args:
+        file_path (str): Path to a file with one "word count" pair per line.
+
+    Returns: Iterator of (word, count) tuples in file order.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) != 2:
+                continue
+            try:
+                yield parts[0], int(parts[1])
+            except ValueError:
+                continue
+
+
+def _external_sort(
+        pairs: Iterable[Tuple[str, int]],
+        key: Callable,
+        tmp_dir: str,
+        chunk_size: int = 100000
+    ) -> Iterator[Tuple[str, int]]:
+    """
+    Sort (word, count) pairs with bounded memory.
+
+    The input is cut into chunks of at most chunk_size pairs; each chunk is sorted in memory
+    and written to a run file in tmp_dir, and the runs are then lazily k-way merged.
+
+    Args:
+        pairs (Iterable[Tuple[str, int]]): The pairs to sort.
+        key (Callable): Sort key applied to each (word, count) pair.
+        tmp_dir (str): Directory for the temporary run files.
+        chunk_size (int): Maximum number of pairs held in memory at once.
+
+    Returns: Iterator of the sorted pairs.
+    """
+    run_paths = []
+    chunk = []
+
+    def flush_run():
+        chunk.sort(key=key)
+        fd, run_path = tempfile.mkstemp(suffix='.run', dir=tmp_dir)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.writelines(f"{w} {c}\n" for w, c in chunk)
+        run_paths.append(run_path)
+        chunk.clear()
+
+    for pair in pairs:
+        chunk.append(pair)
+        if len(chunk) >= chunk_size:
+            flush_run()
+    if chunk:
+        flush_run()
+    return heapq.merge(*(_read_pairs(p) for p in run_paths), key=key)
+
+
+def _merge_counts(*streams: Iterable[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+    """Merge-join word-sorted (word, count) streams, summing the counts of equal words.
+
+    Args:
+        *streams: Streams of (word, count) pairs, each sorted by word.
+
+    Returns: Iterator of (word, total_count) pairs sorted by word.
+    """
+    current, total = None, 0
+    for w, c in heapq.merge(*streams, key=lambda kv: kv[0]):
+        if w == current:
+            total += c
+            continue
+        if current is not None:
+            yield current, total
+        current, total = w, c
+    if current is not None:
+        yield current, total
+
+
+VOCAB_FILES = ("word_freq.txt", "word2idx.txt", "idx2word.txt")
+
+# Versioned layout: each version of the vocabulary files is written to its own generation
+# subdirectory, and the CURRENT pointer file names the live one
+CURRENT_FILE = "CURRENT"
+_GENERATION_PREFIX = ".vocab-gen-"
+
+
+def vocab_dir(path: str) -> str:
+    """
+    Return the directory holding the live vocabulary files of a vocabulary directory.
+
+    Writers that publish generations (apply_vocab_transaction, updating_for_adding_external and
+    reduce_shards) switch CURRENT to a new generation with one os.replace, so resolving the
+    directory once and reading every file from it always gives one consistent version. A
+    directory without CURRENT (e.g. written by updating_for_adding) holds the files itself.
+
+    Args:
+        path (str): The vocabulary directory.
+
+    Returns: the directory to read word_freq.txt, word2idx.txt and idx2word.txt from.
+    """
+    try:
+        with open(os.path.join(path, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return path
+    return os.path.join(path, name)
+
+
+def _fsync(path: str):
+    """Flush a file, or a directory entry where the platform allows it, to disk."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # directories cannot be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _publish_vocab(out_path: str, write: Callable[[str], None]):
+    """
+    Write a new generation of the vocabulary files and make it live in one atomic step.
+
+    write(gen_dir) creates the three files in a fresh generation subdirectory; they are fsynced
+    and CURRENT is then replaced to point at it. A reader sees either the old or the new version
+    of all three files, never a mix. The generation that was live before is kept for readers
+    still on it; older generations are removed. Nothing else in out_path is touched.
+
+    Args:
+        out_path (str): The vocabulary directory.
+        write (Callable[[str], None]): Writes VOCAB_FILES into the directory it is given.
+
+    Returns: None
+    """
+    os.makedirs(out_path, exist_ok=True)
+    previous = os.path.basename(vocab_dir(out_path))
+    gen_dir = tempfile.mkdtemp(prefix=_GENERATION_PREFIX, dir=out_path)
+    try:
+        write(gen_dir)
+        for name in VOCAB_FILES:
+            _fsync(os.path.join(gen_dir, name))
+        _fsync(gen_dir)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{CURRENT_FILE}.", suffix=".tmp", dir=out_path)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(os.path.basename(gen_dir) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, os.path.join(out_path, CURRENT_FILE))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except BaseException:
+        shutil.rmtree(gen_dir, ignore_errors=True)
+        raise
+    _fsync(out_path)
+    keep = {os.path.basename(gen_dir), previous}
+    for entry in os.listdir(out_path):
+        if entry.startswith(_GENERATION_PREFIX) and entry not in keep:
+            shutil.rmtree(os.path.join(out_path, entry), ignore_errors=True)
+
+
+def updating_for_adding_external(
+        stopwords_path: str,
+        added_files: str | list,
+        in_path: str,
+        out_path: str,
+        chunk_size: int = 100000
+    ):
+    """
+    Update vocabulary by adding words from new files, without loading the vocabulary into memory.
+
+    The existing word_freq.txt is externally sorted by word and merge-joined with the
+    word-sorted counts of the added files; word2idx.txt and idx2word.txt are written during
+    that same pass, and the merged counts are externally sorted again by frequency to
+    produce word_freq.txt. At most chunk_size pairs are held in memory by either sort.
+    Words of equal frequency are written in alphabetical order. The files are published as a
+    new generation of out_path (see vocab_dir) only once complete.
+
+    Args:
+        stopwords_path (str): Path to the stopwords file.
+        added_files (str | list): A single file path or a list of file paths to add.
+        in_path (str): Directory path containing existing vocabulary files.
+        out_path (str): Directory path to save updated vocabulary files (may equal in_path).
+        chunk_size (int): Maximum number of (word, count) pairs held in memory per sort run.
+
+    Returns: None
+    """
+    wf_path_in = os.path.join(vocab_dir(in_path), "word_freq.txt")
+    files = [added_files] if isinstance(added_files, str) else list(added_files)
+    result = extract_vocab(stopwords_path, files)
+    new_pairs = zip(*result) if result else iter(())  # already sorted by word
+
+    os.makedirs(out_path, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=out_path) as tmp_dir:
+        def write(gen_dir):
+            old_pairs = _read_pairs(wf_path_in) if os.path.isfile(wf_path_in) else iter(())
+            old_sorted = _external_sort(old_pairs, lambda kv: kv[0], tmp_dir, chunk_size)
+
+            # Single merge pass: write the index files and spill the merged counts for the frequency sort
+            w2i_path = os.path.join(gen_dir, "word2idx.txt")
+            i2w_path = os.path.join(gen_dir, "idx2word.txt")
+            with open(w2i_path, 'w', encoding='utf-8') as w2i, open(i2w_path, 'w', encoding='utf-8') as i2w:
+                def merged_with_index():
+                    for idx, (w, cnt) in enumerate(_merge_counts(old_sorted, new_pairs)):
+                        w2i.write(f"{w} {idx}\n")
+                        i2w.write(f"{idx} {w}\n")
+                        yield w, cnt
+                by_freq = _external_sort(merged_with_index(), lambda kv: (-kv[1], kv[0]), tmp_dir, chunk_size)
+
+            with open(os.path.join(gen_dir, "word_freq.txt"), 'w', encoding='utf-8') as f:
+                for w, cnt in by_freq:
+                    f.write(f"{w} {cnt}\n")
+
+        # The new generation goes live only after every input has been fully read
+        _publish_vocab(out_path, write)
+
+# Stopwords of a transaction worker process, set once by the pool initializer
+_worker_stopwords: List[str] = []
+
+
+def _init_count_worker(stopwords: List[str]):
+    """Pool initializer: keep the stopwords in the worker so they are sent once, not per file."""
+    global _worker_stopwords
+    _worker_stopwords = stopwords
+
+
+def _count_file(fp: str) -> Dict[str, int]:
+    """Count the vocabulary of one file with the worker's stopwords.
+
+    Args:
+        fp (str): Path of the file to count.
+
+    Returns: dict mapping word to count (empty if the file is unreadable or has no words).
+    """
+    try:
+        return count_file_vocabs(fp, _worker_stopwords)
+    except Exception:
+        # Skip unreadable/missing files, like extract_vocab
+        return {}
+
+
+def _count_files(
+        files: List[str],
+        stopwords: List[str],
+        workers: int | None,
+        cache=None
+    ) -> List[Dict[str, int]]:
+    """Count the vocabulary of each file, in a process pool when there is more than one file.
+
+    Args:
+        files (List[str]): File paths to count.
+        stopwords (List[str]): Stop words to exclude.
+        workers (int | None): Number of worker processes; None uses the CPU count, 1 counts in-process.
+        cache (TokenCountCache, optional): Cache consulted first; only misses are tokenized.
+
+    Returns: list of per-file count dicts, in the order of files.
+    """
+    results: List[Dict[str, int] | None] = [None] * len(files)
+    pending = []  # (position, fingerprint) of cache misses
+    if cache is not None:
+        sw_hash = stopwords_hash(stopwords)
+        for pos, fp in enumerate(files):
+            try:
+                counts, fingerprint = cache.lookup(fp, TOKENIZER_PROFILE, sw_hash)
+            except OSError:
+                results[pos] = {}
+                continue
+            if counts is None:
+                pending.append((pos, fingerprint))
+            else:
+                results[pos] = counts
+    else:
+        pending = [(pos, None) for pos in range(len(files))]
+
+    todo = [files[pos] for pos, _ in pending]
+    if workers == 1 or len(todo) <= 1:
+        _init_count_worker(stopwords)
+        counted = [_count_file(fp) for fp in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_count_worker,
+                                 initargs=(stopwords,)) as pool:
+            counted = list(pool.map(_count_file, todo))
+
+    for (pos, fingerprint), counts in zip(pending, counted):
+        results[pos] = counts
+        if fingerprint is not None:
+            cache.store(fingerprint, counts)
+    return results
+
+
+def _load_current_word_freq(in_path: str) -> Dict[str, int]:
+    """Load word_freq.txt from a vocabulary directory, skipping malformed lines.
+
+    Args:
+        in_path (str): Directory path containing existing vocabulary files.
+
+    Returns: dict mapping word to count (empty if the file does not exist).
+    """
+    wf_path_in = os.path.join(vocab_dir(in_path), "word_freq.txt")
+    if not os.path.isfile(wf_path_in):
+        return {}
+    return dict(_read_pairs(wf_path_in))
+
+
+def _write_vocab_generation(curr_wf: Dict[str, int], out_path: str):
+    """
+    Publish word_freq.txt, word2idx.txt and idx2word.txt as a new generation of out_path.
+
+    Args:
+        curr_wf (Dict[str, int]): The vocabulary to write.
+        out_path (str): The vocabulary directory.
+
+    Returns: None
+    """
+    words = tuple(curr_wf.keys())
+
+    def write(gen_dir):
+        save_word_freq(words, tuple(curr_wf[w] for w in words), os.path.join(gen_dir, "word_freq.txt"))
+        save_word2idx(words, os.path.join(gen_dir, "word2idx.txt"))
+        save_idx2word(words, os.path.join(gen_dir, "idx2word.txt"))
+
+    _publish_vocab(out_path, write)
+
+
+def apply_vocab_transaction(
+        stopwords_path: str,
+        added_files: str | list,
+        excluded_files: str | list,
+        in_path: str,
+        out_path: str,
+        workers: int | None = None,
+        cache=None
+    ):
+    """
+    Apply any number of added and excluded files to a vocabulary in one transaction.
+
+    The stopwords and the existing vocabulary are read once, every file is counted (in parallel
+    across processes when there are several), and the net change is applied once: added counts
+    first, then excluded counts, with words whose count drops to 0 or below removed - the same
+    result as calling updating_for_adding and then updating_for_deleting. The output directory
+    is written once, as a new generation switched in atomically (see vocab_dir).
+
+    Args:
+        stopwords_path (str): Path to the stopwords file.
+        added_files (str | list): A single file path or a list of file paths to add.
+        excluded_files (str | list): A single file path or a list of file paths to exclude.
+        in_path (str): Directory path containing existing vocabulary files.
+        out_path (str): Directory path to save updated vocabulary files (may equal in_path).
+        workers (int | None): Number of worker processes; None uses the CPU count, 1 disables the pool.
+        cache (TokenCountCache, optional): Per-file token-count cache; unchanged files are not re-tokenized.
+
+    Returns: dict with the number of added/excluded files and the resulting vocabulary size.
+    """
+    added = [added_files] if isinstance(added_files, str) else list(added_files)
+    excluded = [excluded_files] if isinstance(excluded_files, str) else list(excluded_files)
+    try:
+        sw = get_stopwords(stopwords_path)
+    except Exception:
+        sw = []
+
+    all_counts = _count_files(added + excluded, sw, workers, cache)
+    add_total: Dict[str, int] = {}
+    for counts in all_counts[:len(added)]:
+        for w, c in counts.items():
+            add_total[w] = add_total.get(w, 0) + c
+    del_total: Dict[str, int] = {}
+    for counts in all_counts[len(added):]:
+        for w, c in counts.items():
+            del_total[w] = del_total.get(w, 0) + c
+
+    curr_wf = _load_current_word_freq(in_path)
+    for w, c in add_total.items():
+        curr_wf[w] = curr_wf.get(w, 0) + c
+    for w, c in del_total.items():
+        if w in curr_wf:
+            curr_wf[w] -= c
+            if curr_wf[w] <= 0:
+                del curr_wf[w]
+
+    _write_vocab_generation(curr_wf, out_path)
+    return {"added_files": len(added), "excluded_files": len(excluded), "vocab_size": len(curr_wf)}
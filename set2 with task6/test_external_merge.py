@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from task4 import get_stopwords
+from task5 import load_word2idx
+from task6 import (CURRENT_FILE, _external_sort, _merge_counts, _read_pairs, extract_vocab,
+                   updating_for_adding, updating_for_adding_external, vocab_dir)
+from vocab_mapreduce import assign_shard, build_vocab_sharded, map_shard, reduce_shards
+
+TEXTS = [
+    "The oil price rose as oil supply fell",
+    "Markets fell and the price of gas rose",
+    "Gas and oil exporters met to talk about supply",
+    "A quiet day on the markets",
+]
+
+
+def _corpus(tmp_path):
+    (tmp_path / "stop.txt").write_text("the\nand\nas\nof\nto\na\non\n", encoding="utf-8")
+    files = []
+    for i, text in enumerate(TEXTS):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_text(text + "\n", encoding="utf-8")
+        files.append(str(path))
+    return str(tmp_path / "stop.txt"), files
+
+
+def _vocab(path):
+    """Read the live word_freq.txt pairs (in file order) and word2idx mapping of a vocabulary directory."""
+    live = vocab_dir(path)
+    return list(_read_pairs(os.path.join(live, "word_freq.txt"))), load_word2idx(os.path.join(live, "word2idx.txt"))
+
+
+def _expected(counts):
+    """word_freq pairs and word2idx of a vocabulary, as the external paths write them."""
+    by_freq = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+    return by_freq, {w: i for i, w in enumerate(sorted(counts))}
+
+
+def test_external_sort_and_merge_counts_with_tiny_runs(tmp_path):
+    pairs = [(f"w{i % 7}", i) for i in range(50)]
+    assert list(_external_sort(pairs, lambda kv: kv, str(tmp_path), chunk_size=3)) == sorted(pairs)
+    merged = list(_merge_counts([("a", 1), ("c", 2)], [("a", 3), ("b", 1)], [("c", 1)]))
+    assert merged == [("a", 4), ("b", 1), ("c", 3)]
+
+
+def test_external_update_matches_in_memory_update(tmp_path):
+    stopwords, files = _corpus(tmp_path)
+    updating_for_adding(stopwords, files[:2], str(tmp_path / "none"), str(tmp_path / "base"))
+    updating_for_adding(stopwords, files[2:], str(tmp_path / "base"), str(tmp_path / "memory"))
+    updating_for_adding_external(stopwords, files[2:], str(tmp_path / "base"), str(tmp_path / "external"),
+                                 chunk_size=2)
+    memory_freq, memory_w2i = _vocab(str(tmp_path / "memory"))
+    assert _vocab(str(tmp_path / "external")) == _expected(dict(memory_freq))
+    assert memory_w2i == _expected(dict(memory_freq))[1]
+
+
+def test_external_update_in_place_publishes_generations(tmp_path):
+    stopwords, files = _corpus(tmp_path)
+    vocab = str(tmp_path / "vocab")
+    for path in files:
+        updating_for_adding_external(stopwords, path, vocab, vocab, chunk_size=2)
+    words, freqs = extract_vocab(stopwords, files)
+    assert _vocab(vocab) == _expected(dict(zip(words, freqs)))
+    assert os.path.isfile(os.path.join(vocab, CURRENT_FILE))
+    generations = [e for e in os.listdir(vocab) if os.path.isdir(os.path.join(vocab, e))]
+    assert os.path.basename(vocab_dir(vocab)) in generations and len(generations) == 2
+
+
+def test_sharded_build_matches_single_pass(tmp_path):
+    stopwords, files = _corpus(tmp_path)
+    shards = [assign_shard(files, i, 3) for i in range(3)]
+    assert sorted(f for shard in shards for f in shard) == sorted(files)
+    shard_paths = [str(tmp_path / "shards" / f"shard-{i}.txt") for i in range(3)]
+    for shard, shard_path in zip(shards, shard_paths):
+        map_shard(stopwords, shard, shard_path)
+    words, freqs = extract_vocab(stopwords, files)
+    assert reduce_shards(shard_paths, str(tmp_path / "reduced"), chunk_size=2) == len(words)
+    assert _vocab(str(tmp_path / "reduced")) == _expected(dict(zip(words, freqs)))
+    assert build_vocab_sharded(stopwords, files, str(tmp_path / "built"), n_shards=2, chunk_size=2) == len(words)
+    assert _vocab(str(tmp_path / "built")) == _vocab(str(tmp_path / "reduced"))
+    assert "oil" in words and not set(words) & set(get_stopwords(stopwords))
+
+
+def test_unsorted_shard_leaves_the_live_vocabulary_alone(tmp_path):
+    out = str(tmp_path / "out")
+    good, bad = tmp_path / "good.txt", tmp_path / "bad.txt"
+    good.write_text("gas 1\noil 2\n", encoding="utf-8")
+    bad.write_text("oil 2\ngas 1\n", encoding="utf-8")
+    reduce_shards([str(good)], out)
+    before = _vocab(out)
+    with pytest.raises(ValueError):
+        reduce_shards([str(good), str(bad)], out)
+    assert _vocab(out) == before == ([("oil", 2), ("gas", 1)], {"gas": 0, "oil": 1})
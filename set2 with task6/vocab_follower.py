@@ -0,0 +1,224 @@
+import os
+import sys
+
+# Modules shared by every set live in the repository's shared directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from task4 import get_stopwords, count_file_vocabs
+from fast_tokenizer import is_text_file
+from token_cache import _encode_counts, _decode_counts
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class VocabFollower:
+    """
+    Keep a vocabulary in step with a data/<category>/*.txt tree by applying only the changes.
+
+    Each poll stats the tree with os.scandir and compares (size, mtime) fingerprints with the
+    ones recorded at the last apply. Added and modified files are tokenized, and the difference
+    between their new counts and the counts stored for them (nothing, for new files) is applied
+    to a persistent vocabulary; removed files have their stored counts subtracted. The state
+    lives in a SQLite file, so a restarted follower resumes where it stopped.
+    """
+    def __init__(
+            self,
+            stop_words: List[str],
+            data_path: str = 'data',
+            category: Optional[str] = None,
+            state_path: str = '.vocab_follow.sqlite',
+            out_path: Optional[str] = None,
+            quiet_polls: int = 1,
+            max_delay: float = 30.0,
+            cache=None
+        ) -> None:
+        """Open (or create) the follower state.
+
+        Args:
+            stop_words (List[str]): A list of stop words to exclude.
+            data_path (str, optional): The path to the data directory. Defaults to 'data'.
+            category (Optional[str], optional): Only follow this category directory. Defaults to None.
+            state_path (str, optional): SQLite file holding file fingerprints, per-file counts and the vocabulary.
+            out_path (Optional[str], optional): Where word_freq.txt is written. Defaults to the current directory.
+            quiet_polls (int, optional): Number of polls a change set must stay unchanged before it is applied,
+                so a burst of writes is applied once. Defaults to 1.
+            max_delay (float, optional): Apply pending changes after this many seconds even if the tree keeps
+                changing. Defaults to 30.0.
+            cache (TokenCountCache, optional): Per-file token-count cache used when tokenizing. Defaults to None.
+        Returns:
+            None
+        """
+        self.stop_words = stop_words
+        self.data_path = data_path
+        self.category = category
+        self.out_path = out_path if out_path is not None else os.path.join(os.getcwd(), 'word_freq.txt')
+        self.quiet_polls = quiet_polls
+        self.max_delay = max_delay
+        self.cache = cache
+
+        self._conn = sqlite3.connect(state_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, counts BLOB)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS vocab (word TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+        self._conn.commit()
+        # Fingerprints of the applied state, kept in memory so a poll does not touch the database
+        self._applied: Dict[str, Tuple[int, int]] = {
+            path: (size, mtime_ns) for path, size, mtime_ns in self._conn.execute("SELECT path, size, mtime_ns FROM files")}
+        self._last_scan: Optional[Dict[str, Tuple[int, int]]] = None
+        self._stable_polls = 0
+        self._pending_since: Optional[float] = None
+
+    def close(self) -> None:
+        """Close the state file."""
+        self._conn.close()
+
+    def _search_dirs(self) -> List[str]:
+        """Return the category directories to scan, like process_mini_dataset."""
+        if self.category:
+            root_path = os.path.join(self.data_path, self.category)
+            return [root_path] if os.path.isdir(root_path) else []
+        if not os.path.isdir(self.data_path):
+            return []
+        with os.scandir(self.data_path) as it:
+            return [entry.path for entry in it if entry.is_dir()]
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        """Stat every followed .txt file (plain or compressed).
+
+        Returns:
+            Dict[str, Tuple[int, int]]: Mapping of file path to its (size, mtime_ns) fingerprint.
+        """
+        current = {}
+        for folder in self._search_dirs():
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if is_text_file(entry.name) and entry.is_file():
+                        st = entry.stat()
+                        current[entry.path] = (st.st_size, st.st_mtime_ns)
+        return current
+
+    def diff(self, current: Dict[str, Tuple[int, int]]) -> Tuple[List[str], List[str], List[str]]:
+        """Compare a scan with the applied state.
+
+        Args:
+            current (Dict[str, Tuple[int, int]]): The result of scan().
+        Returns:
+            Tuple[List[str], List[str], List[str]]: The added, modified and removed file paths.
+        """
+        added = [p for p in current if p not in self._applied]
+        modified = [p for p, fp in current.items() if p in self._applied and self._applied[p] != fp]
+        removed = [p for p in self._applied if p not in current]
+        return added, modified, removed
+
+    def apply(self, current: Dict[str, Tuple[int, int]], changed: List[str], removed: List[str]) -> int:
+        """Apply the count deltas of changed and removed files to the vocabulary.
+
+        Args:
+            current (Dict[str, Tuple[int, int]]): The scan the changes were detected in.
+            changed (List[str]): Added or modified files to (re)count.
+            removed (List[str]): Files that no longer exist.
+        Returns:
+            int: The number of vocabulary words whose count changed.
+        """
+        delta: Dict[str, int] = {}
+        file_rows = []
+        for path in changed:
+            try:
+                new_counts = count_file_vocabs(path, self.stop_words, self.cache)
+            except FileNotFoundError:
+                # Vanished since the scan: remove it now
+                removed = removed + [path]
+                continue
+            except (OSError, EOFError, ValueError) as e:
+                # Unreadable, undecodable or truncated: record this fingerprint with no counts so it is
+                # not retried on every poll; a rewrite changes the fingerprint and counts it again
+                print(f"Skipping {path}: {type(e).__name__}: {e}")
+                new_counts = {}
+            for w, c in new_counts.items():
+                delta[w] = delta.get(w, 0) + c
+            for w, c in self._stored_counts(path).items():
+                delta[w] = delta.get(w, 0) - c
+            size, mtime_ns = current[path]
+            file_rows.append((path, size, mtime_ns, _encode_counts(new_counts)))
+        for path in removed:
+            for w, c in self._stored_counts(path).items():
+                delta[w] = delta.get(w, 0) - c
+
+        delta = {w: c for w, c in delta.items() if c != 0}
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO vocab (word, count) VALUES (?, ?) "
+                "ON CONFLICT(word) DO UPDATE SET count = count + excluded.count", delta.items())
+            self._conn.execute("DELETE FROM vocab WHERE count <= 0")
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", file_rows)
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed])
+        for path, size, mtime_ns, _ in file_rows:
+            self._applied[path] = (size, mtime_ns)
+        for path in removed:
+            self._applied.pop(path, None)
+        return len(delta)
+
+    def _stored_counts(self, path: str) -> Dict[str, int]:
+        """Return the counts recorded for a file at the last apply (empty for unknown files)."""
+        row = self._conn.execute("SELECT counts FROM files WHERE path = ?", (path,)).fetchone()
+        return _decode_counts(row[0]) if row is not None else {}
+
+    def write_word_freq(self) -> None:
+        """Write the vocabulary to word_freq.txt in process_mini_dataset's format (frequency descending)."""
+        tmp_path = self.out_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as wf:
+            for word, count in self._conn.execute("SELECT word, count FROM vocab ORDER BY count DESC, word"):
+                wf.write(f"{word}\t{count}\n")
+        os.replace(tmp_path, self.out_path)
+
+    def poll(self) -> Optional[dict]:
+        """Scan once and apply the pending changes if they have settled.
+
+        Returns:
+            Optional[dict]: Counts of applied added/modified/removed files, or None if nothing was applied.
+        """
+        current = self.scan()
+        added, modified, removed = self.diff(current)
+        if not (added or modified or removed):
+            self._last_scan, self._stable_polls, self._pending_since = current, 0, None
+            return None
+
+        now = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = now
+        # A burst is still in progress while consecutive scans keep differing
+        self._stable_polls = self._stable_polls + 1 if current == self._last_scan else 0
+        self._last_scan = current
+        if self._stable_polls < self.quiet_polls and now - self._pending_since < self.max_delay:
+            return None
+
+        self.apply(current, added + modified, removed)
+        self.write_word_freq()
+        self._stable_polls, self._pending_since = 0, None
+        return {"added": len(added), "modified": len(modified), "removed": len(removed)}
+
+    def follow(self, interval: float = 2.0, max_polls: Optional[int] = None) -> None:
+        """Poll the tree every interval seconds until interrupted (or for max_polls polls).
+
+        Args:
+            interval (float, optional): Seconds between scans. Defaults to 2.0.
+            max_polls (Optional[int], optional): Stop after this many polls. Defaults to None (forever).
+        Returns:
+            None
+        """
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                applied = self.poll()
+                if applied:
+                    print(f"Applied {applied['added']} added, {applied['modified']} modified, "
+                          f"{applied['removed']} removed files")
+                polls += 1
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    follower = VocabFollower(get_stopwords("data/stop_words_english.txt"), "data")
+    follower.follow()
@@ -0,0 +1,153 @@
+from task6 import extract_vocab, _external_sort, _merge_counts, _publish_vocab, _read_pairs
+from concurrent.futures import ProcessPoolExecutor
+import os
+import tempfile
+from typing import Iterator, List, Tuple
+
+
+def assign_shard(files: List[str], shard_index: int, n_shards: int) -> List[str]:
+    """Return the files one node of a sharded build counts.
+
+    Files are sorted and dealt round-robin, so every node computes the same partition from the
+    same file list without coordinating.
+
+    Args:
+        files (List[str]): Every input file of the build.
+        shard_index (int): This node's shard, 0 <= shard_index < n_shards.
+        n_shards (int): Number of nodes.
+
+    Returns: list of the file paths of this shard.
+    """
+    if not 0 <= shard_index < n_shards:
+        raise ValueError(f"shard_index must be in [0, {n_shards})")
+    return sorted(files)[shard_index::n_shards]
+
+
+def map_shard(stopwords_path: str, files: List[str], shard_path: str, cache=None) -> int:
+    """
+    Map step: count the vocabulary of some files and write it as a word-sorted shard.
+
+    The shard has one "word count" line per word in alphabetical order, the input the reducer
+    merges. It is written to a temporary file and renamed, so a reducer never sees half a shard.
+
+    Args:
+        stopwords_path (str): Path to the stopwords file.
+        files (List[str]): The file paths of this shard (see assign_shard).
+        shard_path (str): Path of the shard file to write.
+        cache (TokenCountCache, optional): Per-file token-count cache; unchanged files are not re-tokenized.
+
+    Returns: the number of distinct words in the shard.
+    """
+    result = extract_vocab(stopwords_path, files, cache)
+    words, freqs = result if result else ((), ())
+    shard_dir = os.path.dirname(os.path.abspath(shard_path))
+    os.makedirs(shard_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=shard_dir)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.writelines(f"{w} {c}\n" for w, c in zip(words, freqs))
+        os.replace(tmp_path, shard_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(words)
+
+
+def _sorted_shard(shard_path: str) -> Iterator[Tuple[str, int]]:
+    """Stream a shard's pairs, checking that its words are strictly increasing."""
+    previous = None
+    for w, c in _read_pairs(shard_path):
+        if previous is not None and w <= previous:
+            raise ValueError(f"Shard {shard_path} is not sorted by word at {w!r}")
+        previous = w
+        yield w, c
+
+
+def reduce_shards(shard_paths: List[str], out_path: str, chunk_size: int = 100000) -> int:
+    """
+    Reduce step: k-way merge word-sorted shards into word_freq.txt, word2idx.txt and idx2word.txt.
+
+    The shards are read line by line and merged with a heap holding one pair per shard, summing
+    the counts of equal words; word2idx.txt and idx2word.txt are written during that pass, since
+    the merge already yields words in alphabetical order. word_freq.txt (frequency descending,
+    then alphabetical) is produced by _external_sort, which holds at most chunk_size pairs and
+    spills sorted runs to disk. Memory therefore grows with the number of shards and chunk_size,
+    not with the vocabulary. The three files are published as a new generation of out_path
+    (see task6.vocab_dir) only once complete.
+
+    Args:
+        shard_paths (List[str]): Shard files written by map_shard, in any order.
+        out_path (str): Directory to write the vocabulary files to.
+        chunk_size (int): Maximum number of (word, count) pairs held in memory by the frequency sort.
+
+    Returns: the vocabulary size.
+    """
+    os.makedirs(out_path, exist_ok=True)
+    size = 0
+    with tempfile.TemporaryDirectory(dir=out_path) as tmp_dir:
+        def write(gen_dir):
+            w2i_path = os.path.join(gen_dir, "word2idx.txt")
+            i2w_path = os.path.join(gen_dir, "idx2word.txt")
+            with open(w2i_path, 'w', encoding='utf-8') as w2i, open(i2w_path, 'w', encoding='utf-8') as i2w:
+                def merged_with_index():
+                    nonlocal size
+                    for idx, (w, cnt) in enumerate(_merge_counts(*(_sorted_shard(p) for p in shard_paths))):
+                        w2i.write(f"{w} {idx}\n")
+                        i2w.write(f"{idx} {w}\n")
+                        size = idx + 1
+                        yield w, cnt
+                by_freq = _external_sort(merged_with_index(), lambda kv: (-kv[1], kv[0]), tmp_dir, chunk_size)
+
+            with open(os.path.join(gen_dir, "word_freq.txt"), 'w', encoding='utf-8') as f:
+                for w, cnt in by_freq:
+                    f.write(f"{w} {cnt}\n")
+
+        _publish_vocab(out_path, write)
+    return size
+
+
+def _map_node(args: Tuple[str, List[str], int, int, str]) -> str:
+    """Run the map step of one simulated node and return its shard path."""
+    stopwords_path, files, shard_index, n_shards, shard_dir = args
+    shard_path = os.path.join(shard_dir, f"shard-{shard_index:05d}.txt")
+    map_shard(stopwords_path, assign_shard(files, shard_index, n_shards), shard_path)
+    return shard_path
+
+
+def build_vocab_sharded(
+        stopwords_path: str,
+        files: List[str],
+        out_path: str,
+        n_shards: int = 4,
+        chunk_size: int = 100000
+    ) -> int:
+    """
+    Run a whole sharded build on this machine, with worker processes standing in for nodes.
+
+    Each process maps its shard of the files into a shard file, then the shards are reduced
+    into out_path. On a cluster, each node runs map_shard(assign_shard(...)) instead and one
+    node runs reduce_shards over the collected shard files.
+
+    Args:
+        stopwords_path (str): Path to the stopwords file.
+        files (List[str]): Every input file of the build.
+        out_path (str): Directory to write the vocabulary files to.
+        n_shards (int): Number of simulated nodes.
+        chunk_size (int): Maximum number of pairs held in memory by the reducer's frequency sort.
+
+    Returns: the vocabulary size.
+    """
+    os.makedirs(out_path, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=out_path) as shard_dir:
+        jobs = [(stopwords_path, list(files), i, n_shards, shard_dir) for i in range(n_shards)]
+        with ProcessPoolExecutor(max_workers=n_shards) as pool:
+            shard_paths = list(pool.map(_map_node, jobs))
+        return reduce_shards(shard_paths, out_path, chunk_size)
+
+
+# WARNING!!! *DO NOT* REMOVE THIS LINE
+# THIS ENSURES THAT THE CODE BELOW ONLY RUNS WHEN YOU HIT THE GREEN `Run` BUTTON, AND NOT THE BLUE `Test` BUTTON
+if __name__ == "__main__":
+    data_files = [os.path.join("data", f) for f in os.listdir("data") if f.startswith("new_add")]
+    vocab_size = build_vocab_sharded("data/stop_words_english.txt", data_files, "vocab_sharded", n_shards=2)
+    print(f"Reduced {vocab_size} words into vocab_sharded/")
@@ -0,0 +1,235 @@
+import bz2
+from collections import Counter
+import gzip
+import lzma
+import mmap
+import re
+from typing import Dict, Iterable, Iterator
+
+# Bytes that can be part of a get_vocabs token: ASCII letters/digits, plus every byte of a
+# multi-byte UTF-8 character (>= 0x80), so a character is never split between two runs.
+_ALNUM_RUN = re.compile(rb'[0-9A-Za-z\x80-\xff]+')
+_NOT_ALNUM = re.compile(rb'[^0-9A-Za-z\x80-\xff]')
+# The ASCII characters str.split() treats as whitespace (bytes.split() misses \x1c-\x1f)
+_CHUNK = re.compile(rb'[^ \t\n\r\x0b\x0c\x1c-\x1f]+')
+_WHITESPACE = re.compile(rb'[ \t\n\r\x0b\x0c\x1c-\x1f]')
+
+PUNCTUATION = ".,!?';:\"()[]{}#%&*/\\-=_+<>$"
+_PUNCT_TO_SPACE = bytes.maketrans(PUNCTUATION.encode('ascii'), b' ' * len(PUNCTUATION))
+
+WINDOW_SIZE = 16 * 1024 * 1024
+BLOCK_SIZE = 1024 * 1024
+
+# Compressed inputs are decompressed as a stream by the matching module
+_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+TEXT_SUFFIXES = ('.txt',) + tuple('.txt' + ext for ext in _OPENERS)
+
+
+def is_compressed(path: str) -> bool:
+    """Return True if the path has a .gz, .bz2 or .xz suffix."""
+    return any(path.endswith(ext) for ext in _OPENERS)
+
+
+def is_text_file(name: str) -> bool:
+    """Return True for .txt files, plain or compressed (.txt.gz, .txt.bz2, .txt.xz)."""
+    return name.endswith(TEXT_SUFFIXES)
+
+
+def open_input(path: str, mode: str = 'rb', encoding: str | None = None):
+    """Open a plain or compressed input file; compressed files are decompressed while reading.
+
+    Args:
+        path (str): Path of the file; the suffix selects gzip, bz2 or lzma.
+        mode (str, optional): 'rb' for bytes or 'rt' for text. Defaults to 'rb'.
+        encoding (str | None, optional): Text encoding for mode 'rt'. Defaults to None (UTF-8).
+    Returns:
+        A file object.
+    """
+    if 't' in mode and encoding is None:
+        encoding = 'utf-8'
+    for ext, opener in _OPENERS.items():
+        if path.endswith(ext):
+            return opener(path, mode, encoding=encoding)
+    return open(path, mode, encoding=encoding)
+
+
+def _windowed_runs(buf, pattern: re.Pattern, boundary: re.Pattern, window: int) -> Iterator[list]:
+    """Yield the matches of pattern over buf one window at a time.
+
+    Windows are cut at the first boundary byte after each window end, so no match spans two
+    windows and only one window's worth of tokens is materialised at a time.
+
+    Args:
+        buf: A bytes-like object (e.g. an mmap).
+        pattern (re.Pattern): The token pattern.
+        boundary (re.Pattern): Matches a byte that can never be inside a token.
+        window (int): The approximate window size in bytes.
+    Returns:
+        Iterator[list]: The list of matched byte strings of each window.
+    """
+    pos = 0
+    n = len(buf)
+    while pos < n:
+        end = min(pos + window, n)
+        if end < n:
+            m = boundary.search(buf, end)
+            end = m.start() if m else n
+        yield pattern.findall(buf, pos, end)
+        pos = end
+
+
+def _streamed_runs(f, pattern: re.Pattern, boundary: re.Pattern, block: int) -> Iterator[list]:
+    """Yield the matches of pattern in a binary stream one block at a time.
+
+    The bytes after the last boundary byte of each block are carried into the next one, so no
+    match (nor a multi-byte character) is split across blocks.
+
+    Args:
+        f: A binary file object, e.g. a gzip stream.
+        pattern (re.Pattern): The token pattern.
+        boundary (re.Pattern): Matches a byte that can never be inside a token.
+        block (int): The number of bytes read per step.
+    Returns:
+        Iterator[list]: The list of matched byte strings of each block.
+    """
+    carry = b''
+    while True:
+        data = f.read(block)
+        if not data:
+            break
+        buf = carry + data
+        cut = len(buf)
+        while cut > 0 and not boundary.match(buf, cut - 1):
+            cut -= 1
+        yield pattern.findall(buf, 0, cut)
+        carry = buf[cut:]
+    if carry:
+        yield pattern.findall(carry)
+
+
+def _file_runs(path: str, pattern: re.Pattern, boundary: re.Pattern, window: int) -> Iterator[list]:
+    """Yield the token matches of a file: streamed if it is compressed, memory-mapped otherwise."""
+    if is_compressed(path):
+        with open_input(path) as f:
+            yield from _streamed_runs(f, pattern, boundary, min(window, BLOCK_SIZE))
+        return
+    for buf in _map_file(path):
+        yield from _windowed_runs(buf, pattern, boundary, window)
+
+
+def _map_file(path: str) -> Iterator:
+    """Yield a read-only mmap of a file (or b'' for an empty file) and close it afterwards."""
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            yield b''
+            return
+        try:
+            yield mm
+        finally:
+            mm.close()
+
+
+def _unicode_alnum_tokens(text: str) -> Iterator[str]:
+    """Split text into get_vocabs tokens with the original character-by-character rules."""
+    current = ""
+    for ch in text:
+        if ch.isdigit() or ch.isalpha():
+            current += ch.lower()
+        elif current:
+            yield current.lower()
+            current = ""
+    if current:
+        yield current.lower()
+
+
+def count_alnum_runs(raw: Counter, stopwords: Iterable[str]) -> Dict[str, int]:
+    """Turn counts of raw byte runs into get_vocabs word counts.
+
+    Args:
+        raw (Counter): Counts of the byte runs matched by the alphanumeric pattern.
+        stopwords (Iterable[str]): Stop words to exclude.
+    Returns:
+        Dict[str, int]: Mapping of word to count, identical to count_vocabs on the decoded text.
+    """
+    sw = set(stopwords)
+    counts: Dict[str, int] = {}
+    for run, n in raw.items():
+        if run.isascii():
+            # ASCII fast path: the run is exactly one token
+            tokens = (run.lower().decode('ascii'),)
+        else:
+            # Only runs holding non-ASCII bytes are decoded, and may split into several tokens
+            tokens = _unicode_alnum_tokens(run.decode('utf-8'))
+        for t in tokens:
+            if t.isalpha() and len(t) >= 2 and t not in sw:
+                counts[t] = counts.get(t, 0) + n
+    return counts
+
+
+def count_file_alnum(path: str, stopwords: Iterable[str], window: int = WINDOW_SIZE) -> Dict[str, int]:
+    """Count a file's words with get_vocabs' rules, tokenizing the memory-mapped bytes directly.
+
+    Compressed files (.gz, .bz2, .xz) are decompressed as a stream straight into the tokenizer.
+
+    Args:
+        path (str): Path of a UTF-8 text file, optionally compressed.
+        stopwords (Iterable[str]): Stop words to exclude.
+        window (int, optional): Bytes tokenized per step. Defaults to 16 MiB.
+    Returns:
+        Dict[str, int]: Mapping of word to count.
+    """
+    raw = Counter()
+    for runs in _file_runs(path, _ALNUM_RUN, _NOT_ALNUM, window):
+        raw.update(runs)
+    return count_alnum_runs(raw, stopwords)
+
+
+def _keep_stopword_tokens(chunk: str) -> Iterator[str]:
+    """Apply EssayScorer._clean_keep_stopwords to one whitespace-free chunk of text."""
+    text = chunk.lower()
+    for p in PUNCTUATION:
+        text = text.replace(p, " ")
+    for w in text.split():
+        if len(w) >= 2 and not w.isdigit() and w.isalpha():
+            yield w
+
+
+def count_chunks_keep_stopwords(raw: Counter) -> Dict[str, int]:
+    """Turn counts of raw whitespace-delimited byte chunks into _clean_keep_stopwords token counts.
+
+    Args:
+        raw (Counter): Counts of the byte chunks between ASCII whitespace.
+    Returns:
+        Dict[str, int]: Mapping of token to count.
+    """
+    counts: Dict[str, int] = {}
+    for chunk, n in raw.items():
+        if chunk.isascii():
+            words = chunk.lower().translate(_PUNCT_TO_SPACE).split()
+            tokens = (w.decode('ascii') for w in words if len(w) >= 2 and not w.isdigit() and w.isalpha())
+        else:
+            # Lowercasing is done per whitespace chunk, which is what str.lower() sees
+            # (its context rules never look across whitespace)
+            tokens = _keep_stopword_tokens(chunk.decode('utf-8'))
+        for t in tokens:
+            counts[t] = counts.get(t, 0) + n
+    return counts
+
+
+def count_file_keep_stopwords(path: str, window: int = WINDOW_SIZE) -> Dict[str, int]:
+    """Count a file's tokens with EssayScorer._clean_keep_stopwords' rules over memory-mapped bytes.
+
+    Compressed files (.gz, .bz2, .xz) are decompressed as a stream straight into the tokenizer.
+
+    Args:
+        path (str): Path of a UTF-8 text file, optionally compressed.
+        window (int, optional): Bytes tokenized per step. Defaults to 16 MiB.
+    Returns:
+        Dict[str, int]: Mapping of token to count.
+    """
+    raw = Counter()
+    for chunks in _file_runs(path, _CHUNK, _WHITESPACE, window):
+        raw.update(chunks)
+    return count_chunks_keep_stopwords(raw)
@@ -0,0 +1,95 @@
+import os
+import sqlite3
+from collections import Counter
+
+from token_cache import TokenCountCache, _decode_counts, _encode_counts, stopwords_hash
+
+STOPWORDS = ["the", "a"]
+
+
+class _Tokenizer:
+    """Counts whitespace tokens and remembers which files it was asked to read."""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, path):
+        self.calls.append(path)
+        with open(path, encoding="utf-8") as f:
+            return dict(Counter(w for w in f.read().split() if w not in STOPWORDS))
+
+
+def _write(path, text, mtime_ns=None):
+    path.write_text(text, encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_encode_round_trip_and_stopword_hash_ignores_order():
+    counts = {"oil": 3, "ölpreis": 1, "x": 10}
+    assert _decode_counts(_encode_counts(counts)) == counts
+    assert stopwords_hash(["b", "a", "a"]) == stopwords_hash(["a", "b"]) != stopwords_hash(["a"])
+
+
+def test_second_read_is_a_hit_and_same_content_elsewhere_too(tmp_path):
+    tokenize = _Tokenizer()
+    first = _write(tmp_path / "one.txt", "the oil price the oil")
+    copy = _write(tmp_path / "two.txt", "the oil price the oil")
+    with TokenCountCache(str(tmp_path / "cache.sqlite")) as cache:
+        assert cache.get_counts(first, "v1", STOPWORDS, tokenize) == {"oil": 2, "price": 1}
+        assert cache.get_counts(first, "v1", STOPWORDS, tokenize) == {"oil": 2, "price": 1}
+        assert cache.get_counts(copy, "v1", STOPWORDS, tokenize) == {"oil": 2, "price": 1}
+        assert tokenize.calls == [first]
+        assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_changed_content_profile_or_stopwords_miss(tmp_path):
+    tokenize = _Tokenizer()
+    path = _write(tmp_path / "essay.txt", "oil price", mtime_ns=1_000_000_000)
+    with TokenCountCache(str(tmp_path / "cache.sqlite")) as cache:
+        cache.get_counts(path, "v1", STOPWORDS, tokenize)
+        _write(tmp_path / "essay.txt", "gas price", mtime_ns=2_000_000_000)
+        assert cache.get_counts(path, "v1", STOPWORDS, tokenize) == {"gas": 1, "price": 1}
+        cache.get_counts(path, "v2", STOPWORDS, tokenize)
+        cache.get_counts(path, "v1", ["price"], tokenize)
+        assert len(tokenize.calls) == 4
+
+
+def test_counts_are_not_stored_if_the_file_changed_after_lookup(tmp_path):
+    path = _write(tmp_path / "essay.txt", "oil price", mtime_ns=1_000_000_000)
+    with TokenCountCache(str(tmp_path / "cache.sqlite")) as cache:
+        counts, fingerprint = cache.lookup(path, "v1", stopwords_hash(STOPWORDS))
+        assert counts is None
+        _write(tmp_path / "essay.txt", "oil price gas", mtime_ns=2_000_000_000)
+        cache.store(fingerprint, {"oil": 1, "price": 1})
+        assert cache.lookup(path, "v1", stopwords_hash(STOPWORDS))[0] is None
+
+
+def test_entries_persist_and_least_recently_used_are_evicted(tmp_path):
+    tokenize = _Tokenizer()
+    paths = [_write(tmp_path / f"f{i}.txt", " ".join(f"word{i}x{j}" for j in range(200))) for i in range(3)]
+    blob_size = len(_encode_counts(tokenize(paths[0])))
+    tokenize.calls.clear()
+    db = str(tmp_path / "cache.sqlite")
+    with TokenCountCache(db, max_bytes=int(blob_size * 2.5)) as cache:
+        for path in paths:
+            cache.get_counts(path, "v1", STOPWORDS, tokenize)
+    with TokenCountCache(db, max_bytes=int(blob_size * 2.5)) as cache:
+        cache.get_counts(paths[2], "v1", STOPWORDS, tokenize)
+        cache.get_counts(paths[0], "v1", STOPWORDS, tokenize)
+    assert tokenize.calls == paths + [paths[0]]
+
+
+def test_verify_drops_corrupt_entries(tmp_path):
+    tokenize = _Tokenizer()
+    path = _write(tmp_path / "essay.txt", "oil price")
+    db = str(tmp_path / "cache.sqlite")
+    with TokenCountCache(db) as cache:
+        cache.get_counts(path, "v1", STOPWORDS, tokenize)
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE entries SET blob = X'00'")
+    with TokenCountCache(db) as cache:
+        assert cache.verify() == {"checked": 1, "corrupt": 1, "sqlite_ok": True}
+        assert cache.verify() == {"checked": 0, "corrupt": 0, "sqlite_ok": True}
+        assert cache.get_counts(path, "v1", STOPWORDS, tokenize) == {"oil": 1, "price": 1}
+    assert len(tokenize.calls) == 2
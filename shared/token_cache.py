@@ -0,0 +1,230 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+
+def stopwords_hash(stopwords: Iterable[str]) -> str:
+    """Return a short, order-independent fingerprint of a stopword list.
+
+    Args:
+        stopwords (Iterable[str]): The stop words.
+    Returns:
+        str: Hex digest identifying the set of stop words.
+    """
+    h = hashlib.sha1()
+    for w in sorted(set(stopwords)):
+        h.update(w.encode('utf-8'))
+        h.update(b'\n')
+    return h.hexdigest()[:16]
+
+
+def _encode_counts(counts: Dict[str, int]) -> bytes:
+    """Serialise token counts as zlib-compressed "word\\tcount" lines."""
+    text = "".join(f"{w}\t{c}\n" for w, c in sorted(counts.items()))
+    return zlib.compress(text.encode('utf-8'), 6)
+
+
+def _decode_counts(blob: bytes) -> Dict[str, int]:
+    """Inverse of _encode_counts."""
+    counts = {}
+    for line in zlib.decompress(blob).decode('utf-8').splitlines():
+        w, c = line.split('\t')
+        counts[w] = int(c)
+    return counts
+
+
+class TokenCountCache:
+    """
+    A persistent on-disk cache of per-file token counts.
+
+    Entries are keyed by (content hash, tokenizer profile, stopword-list hash) and stored as
+    compressed blobs in a SQLite file, so the same content is tokenized once no matter where
+    it lives. A second table remembers (path, size, mtime) -> content hash, so a file whose
+    stat has not changed is not even read again. When the blobs exceed max_bytes the least
+    recently used entries are evicted. One cache can be shared by several threads.
+    """
+    def __init__(self, db_path: str = ".token_cache.sqlite", max_bytes: int = 64 * 1024 * 1024) -> None:
+        """Open (or create) a cache.
+
+        Args:
+            db_path (str, optional): Path of the SQLite cache file. Defaults to ".token_cache.sqlite".
+            max_bytes (int, optional): Upper bound on the total size of the stored blobs. Defaults to 64 MiB.
+        Returns:
+            None
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        # The connection is shared between threads; every use of it holds this lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, blob BLOB NOT NULL, checksum INTEGER NOT NULL,"
+            " nbytes INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_used)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT, profile TEXT, sw_hash TEXT, size INTEGER, mtime_ns INTEGER,"
+            " content_hash TEXT, PRIMARY KEY (path, profile, sw_hash))")
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Commit pending writes and close the cache file."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+    def _maybe_commit(self) -> None:
+        self._pending += 1
+        if self._pending >= 64:
+            self._conn.commit()
+            self._pending = 0
+
+    def lookup(self, path: str, profile: str, sw_hash: str) -> Tuple[Optional[Dict[str, int]], tuple]:
+        """Look up the cached token counts of a file.
+
+        Args:
+            path (str): Path of the file.
+            profile (str): Name of the tokenizer (bump it when tokenization rules change).
+            sw_hash (str): Fingerprint of the stopword list, from stopwords_hash().
+        Returns:
+            Tuple: (counts or None on a miss, fingerprint to pass to store()).
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, content_hash FROM files WHERE path=? AND profile=? AND sw_hash=?",
+                (path, profile, sw_hash)).fetchone()
+        if row is not None and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            content_hash = row[2]
+        else:
+            # Stat changed (or first sight): hash the content, which is far cheaper than tokenizing.
+            # Hashing happens outside the lock so other threads are not held up by the I/O.
+            h = hashlib.sha1()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    h.update(block)
+            content_hash = h.hexdigest()
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, profile, sw_hash, st.st_size, st.st_mtime_ns, content_hash))
+                self._maybe_commit()
+
+        key = f"{content_hash}:{profile}:{sw_hash}"
+        fingerprint = (key, path, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            entry = self._conn.execute("SELECT blob, checksum FROM entries WHERE key=?", (key,)).fetchone()
+            if entry is not None and zlib.crc32(entry[0]) == entry[1]:
+                self._conn.execute("UPDATE entries SET last_used=? WHERE key=?", (time.time(), key))
+                self._maybe_commit()
+                self.hits += 1
+                return _decode_counts(entry[0]), fingerprint
+            self.misses += 1
+        return None, fingerprint
+
+    def store(self, fingerprint: tuple, counts: Dict[str, int]) -> None:
+        """Store the token counts of a file looked up with lookup().
+
+        Nothing is stored if the file changed after lookup(), since the counts may then
+        not belong to the hashed content.
+
+        Args:
+            fingerprint (tuple): The fingerprint returned by lookup().
+            counts (Dict[str, int]): The file's token counts.
+        Returns:
+            None
+        """
+        key, path, size, mtime_ns = fingerprint
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+            return
+        blob = _encode_counts(counts)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, blob, zlib.crc32(blob), len(blob), time.time()))
+            self._evict()
+            self._maybe_commit()
+
+    def get_counts(
+            self,
+            path: str,
+            profile: str,
+            stopwords: Iterable[str],
+            tokenize: Callable[[str], Dict[str, int]]
+        ) -> Dict[str, int]:
+        """Return the token counts of a file, tokenizing it only on a cache miss.
+
+        Args:
+            path (str): Path of the file.
+            profile (str): Name of the tokenizer (bump it when tokenization rules change).
+            stopwords (Iterable[str]): The stop words the tokenizer applies.
+            tokenize (Callable[[str], Dict[str, int]]): Maps the file path to its token counts.
+        Returns:
+            Dict[str, int]: Mapping of token to count.
+        """
+        counts, fingerprint = self.lookup(path, profile, stopwords_hash(stopwords))
+        if counts is None:
+            counts = tokenize(path)
+            self.store(fingerprint, counts)
+        return counts
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the blobs fit in max_bytes."""
+        total = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, nbytes in self._conn.execute("SELECT key, nbytes FROM entries ORDER BY last_used").fetchall():
+            self._conn.execute("DELETE FROM entries WHERE key=?", (key,))
+            total -= nbytes
+            if total <= self.max_bytes:
+                break
+
+    def verify(self, repair: bool = True) -> Dict[str, int]:
+        """Check every stored entry against its checksum and that it decodes.
+
+        Args:
+            repair (bool, optional): Delete the entries that fail. Defaults to True.
+        Returns:
+            dict: The number of entries checked and found corrupt, and whether SQLite reports the file intact.
+        """
+        checked = 0
+        corrupt = []
+        with self._lock:
+            rows = self._conn.execute("SELECT key, blob, checksum FROM entries").fetchall()
+        for key, blob, checksum in rows:
+            checked += 1
+            try:
+                if zlib.crc32(blob) != checksum:
+                    raise ValueError("checksum mismatch")
+                _decode_counts(blob)
+            except Exception:
+                corrupt.append(key)
+        with self._lock:
+            if repair and corrupt:
+                self._conn.executemany("DELETE FROM entries WHERE key=?", [(k,) for k in corrupt])
+                self._conn.commit()
+            integrity = self._conn.execute("PRAGMA integrity_check").fetchone()[0]
+        return {"checked": checked, "corrupt": len(corrupt), "sqlite_ok": integrity == "ok"}
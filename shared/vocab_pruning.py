@@ -0,0 +1,78 @@
+import heapq
+from typing import Dict, Optional, Tuple
+
+
+def prune_counts(
+        counts: Dict[str, int],
+        min_count: int = 1,
+        max_vocab_size: Optional[int] = None
+    ) -> Tuple[Dict[str, int], int]:
+    """Drop rare words from a vocabulary.
+
+    Args:
+        counts (Dict[str, int]): Mapping of word to frequency.
+        min_count (int, optional): Words seen fewer times are dropped. Defaults to 1 (keep all).
+        max_vocab_size (Optional[int], optional): Keep at most this many of the most frequent words,
+            ties broken alphabetically. Defaults to None (no cap).
+    Returns:
+        Tuple[Dict[str, int], int]: The kept counts (possibly the input dict itself, so do not
+        modify it) and the number of words dropped.
+    """
+    if min_count <= 1 and max_vocab_size is None:
+        return counts, 0
+    kept = {w: c for w, c in counts.items() if c >= min_count} if min_count > 1 else counts
+    if max_vocab_size is not None and len(kept) > max_vocab_size:
+        kept = dict(heapq.nsmallest(max_vocab_size, kept.items(), key=lambda item: (-item[1], item[0])))
+    return kept, len(counts) - len(kept)
+
+
+class BoundedCounter:
+    """
+    Word counts that never track more than max_tracked distinct words.
+
+    When the limit is exceeded, the least frequent half of the words are evicted (ties broken
+    alphabetically). An evicted word that shows up again starts counting from zero, so the counts
+    of frequent words stay exact as long as they are not evicted while still rare.
+    """
+    def __init__(self, max_tracked: Optional[int] = None) -> None:
+        """Create an empty counter.
+
+        Args:
+            max_tracked (Optional[int], optional): Upper bound on the number of distinct words held.
+                Defaults to None (unbounded, exact counting).
+        Returns:
+            None
+        """
+        if max_tracked is not None and max_tracked < 2:
+            raise ValueError("max_tracked must be at least 2")
+        self.max_tracked = max_tracked
+        self.counts: Dict[str, int] = {}
+        self.evicted = 0
+
+    def add(self, word: str, n: int = 1) -> None:
+        """Add n occurrences of a word."""
+        self.counts[word] = self.counts.get(word, 0) + n
+        if self.max_tracked is not None and len(self.counts) > self.max_tracked:
+            self._evict()
+
+    def update(self, counts: Dict[str, int]) -> None:
+        """Add a batch of word counts, evicting afterwards if the limit is exceeded."""
+        for w, c in counts.items():
+            self.counts[w] = self.counts.get(w, 0) + c
+        if self.max_tracked is not None and len(self.counts) > self.max_tracked:
+            self._evict()
+
+    def subtract(self, counts: Dict[str, int]) -> None:
+        """Remove previously added counts; words whose count drops to zero are forgotten."""
+        for w, c in counts.items():
+            left = self.counts.get(w, 0) - c
+            if left > 0:
+                self.counts[w] = left
+            else:
+                self.counts.pop(w, None)
+
+    def _evict(self) -> None:
+        """Keep only the most frequent max_tracked // 2 words."""
+        keep = self.max_tracked // 2
+        self.evicted += len(self.counts) - keep
+        self.counts = dict(heapq.nsmallest(keep, self.counts.items(), key=lambda item: (-item[1], item[0])))